@@ -93,7 +93,7 @@ class DashGenerator():
                                                               window_width=window_width)
             dp_erratic_spike_r2, _ = dp_peak.erratic_spike_r2(dp_data, dp_spike, mb_data, mb_spike, mb_th=mb_th,
                                                               window_width=window_width)
-            dp_erratic_spike = dp_erratic_spike_r1.append(dp_erratic_spike_r2)
+            dp_erratic_spike = pd.concat([dp_erratic_spike_r1, dp_erratic_spike_r2])
             dp_spike_count = pd.Series(1, index=dp_erratic_spike.index).resample('1D').count()
 
             dp_spike_agg = pd.Series()
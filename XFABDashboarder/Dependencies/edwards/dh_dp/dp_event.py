@@ -1,19 +1,11 @@
-import pandas as pd
-
-
 def pump_swap_event(pump_hour):
     """
     From pump run hours, output pump swap timestamp
     :param pump_hour:
     :return:
     """
-    swap_ts = None
-    pump_hour = pump_hour.sort_index()
-    pump_hour = pump_hour.fillna(method='ffill').dropna()
-    df_hour = pd.DataFrame()
-    df_hour['run hour'] = pump_hour
-    df_hour['diff'] = df_hour['run hour'].diff(1)
-    df_hour = df_hour[df_hour['diff'] != 0]
-    swap_ts = list(df_hour[df_hour['diff'] < 0].index)
+    pump_hour = pump_hour.sort_index().ffill().dropna()
+    x = pump_hour.to_numpy(dtype=float)
+    swap_ts = list(pump_hour.index[1:][x[1:] < x[:-1]])
 
     return swap_ts
@@ -3,6 +3,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import warnings
 
+from edwards.utils import cal_spike_count, cal_local_mean_std, match_events
+
 warnings.filterwarnings("ignore")
 
 
@@ -24,21 +26,12 @@ def spike_detect(data, spike_t, peak_t, lag, parameter_name, system_name=None, p
     avg = np.mean(data)
     spike_upper_limit = avg + spike_t * std
     spike_lower_limit = avg - spike_t * std
-    pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-    spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[i + 1:i + lag]) == 0) else 0 for i in range(len(pre_spike))]
-    spike_count = [sum(spike[:i + 1]) if spike[i] == 1 else np.nan for i in range(len(spike))]
-    spike = pd.Series(spike, data.index)
-    spike_count = pd.Series(spike_count, data.index)
-    spike_count.dropna(inplace=True)
+    spike_count = cal_spike_count(data, upper_limit=spike_upper_limit, lower_limit=spike_lower_limit, lag=lag)
 
     peak_upper_limit = avg + peak_t * std
     peak_lower_limit = avg - peak_t * std
-    pre_peak = [1 if (peak_upper_limit < i < spike_upper_limit) else 0 for i in data]
-    peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[i + 1:i + lag]) == 0) else 0 for i in range(len(pre_peak))]
-    peak_count = [sum(peak[:i + 1]) if peak[i] == 1 else np.nan for i in range(len(peak))]
-    peak = pd.Series(peak, data.index)
-    peak_count = pd.Series(peak_count, data.index)
-    peak_count.dropna(inplace=True)
+    peak_count = cal_spike_count(data, upper_limit=spike_upper_limit, lower_limit=peak_upper_limit, lag=lag,
+                                 between=True)
 
     if plot:
         plt.figure(figsize=(10, 6))
@@ -74,7 +67,8 @@ def spike_detect(data, spike_t, peak_t, lag, parameter_name, system_name=None, p
     return spike_count, peak_count
 
 
-def spike_detect_local(data_all, spike_t, peak_t, lag, parameter_name, system_name=None, window_size=50000, plot=True):
+def spike_detect_local(data_all, spike_t, peak_t, lag, parameter_name, system_name=None, window_size=50000, plot=True,
+                       rolling=False):
     """
     To detect spike and count the number within a local window
 
@@ -83,75 +77,21 @@ def spike_detect_local(data_all, spike_t, peak_t, lag, parameter_name, system_na
     :param peak_t: std threshold for peak
     :param lag: within lag it count 1 spike
     :param parameter_name: for plot label
-    :param window_size: size of window
+    :param window_size: size of window, number of data points (int) or time offset (str, e.g. '7D')
+    :param rolling: if True use rolling mean/std, else mean/std of consecutive blocks of window_size
     :return spike_count: number of spike
     """
     data_all = data_all.dropna().sort_index()
 
-    length = len(data_all)
-    if length > window_size:
-        N = length // window_size
-        R = length % window_size
-
-        spike_all = pd.Series([0], [data_all.index[0]])
-        peak_all = pd.Series([0], [data_all.index[0]])
-
-        for i in range(N + 1):
-            if i != N:
-                data = data_all[window_size * i: window_size * (i + 1)]
-            else:
-                data = data_all[window_size * i: window_size * (i + 1) + R]
-            std = np.std(data)
-            avg = np.mean(data)
-            spike_upper_limit = avg + spike_t * std
-            spike_lower_limit = avg - spike_t * std
-            pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-            spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[i + 1:i + lag]) == 0) else 0 for i in
-                     range(len(pre_spike))]
-            spike = pd.Series(spike, data.index)
-            spike_all = spike_all.append(spike)
-
-            peak_upper_limit = avg + peak_t * std
-            peak_lower_limit = avg - peak_t * std
-            pre_peak = [1 if (peak_upper_limit < i < spike_upper_limit) else 0 for i in data]
-            peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[i + 1:i + lag]) == 0) else 0 for i in
-                    range(len(pre_peak))]
-            peak = pd.Series(peak, data.index)
-            peak_all = peak_all.append(peak)
-
-        spike_count = [sum(spike_all[:i + 1]) if spike_all[i] == 1 else np.nan for i in range(1, len(spike_all))]
-
-        spike_count = pd.Series(spike_count, data_all.index)
-        spike_count.dropna(inplace=True)
-
-        peak_count = [sum(peak_all[:i + 1]) if peak_all[i] == 1 else np.nan for i in range(1, len(peak_all))]
-
-        peak_count = pd.Series(peak_count, data_all.index)
-        peak_count.dropna(inplace=True)
-
-    else:
-        data = data_all
-
-        std = np.std(data)
-        avg = np.mean(data)
-        spike_upper_limit = avg + spike_t * std
-        spike_lower_limit = avg - spike_t * std
-        pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-        spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[i + 1:i + lag]) == 0) else 0 for i in
-                 range(len(pre_spike))]
-        spike_count = [sum(spike[:i + 1]) if spike[i] == 1 else np.nan for i in range(len(spike))]
-        spike = pd.Series(spike, data.index)
-        spike_count = pd.Series(spike_count, data.index)
-        spike_count.dropna(inplace=True)
-
-        peak_upper_limit = avg + peak_t * std
-        peak_lower_limit = avg - peak_t * std
-        pre_peak = [1 if (i > peak_upper_limit) else 0 for i in data]
-        peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[i + 1:i + lag]) == 0) else 0 for i in range(len(pre_peak))]
-        peak_count = [sum(peak[:i + 1]) if peak[i] == 1 else np.nan for i in range(len(peak))]
-        peak = pd.Series(peak, data.index)
-        peak_count = pd.Series(peak_count, data.index)
-        peak_count.dropna(inplace=True)
+    avg, std, segment = cal_local_mean_std(data_all, window=window_size, rolling=rolling)
+    spike_upper_limit = avg + spike_t * std
+    spike_lower_limit = avg - spike_t * std
+    spike_count = cal_spike_count(data_all, upper_limit=spike_upper_limit, lower_limit=spike_lower_limit, lag=lag,
+                                  segment=segment)
+
+    peak_upper_limit = avg + peak_t * std
+    peak_count = cal_spike_count(data_all, upper_limit=spike_upper_limit, lower_limit=peak_upper_limit, lag=lag,
+                                 between=True, segment=segment)
 
     if plot:
         plt.figure(figsize=(10, 6))
@@ -166,11 +106,11 @@ def spike_detect_local(data_all, spike_t, peak_t, lag, parameter_name, system_na
             try:
                 plt.plot(spike_count.index, [data_all[i] for i in spike_count.index], 'x', label='Spike')
             except ValueError:
-                plt.plot(spike_count.index, np.zeros(len(spike_count)) + spike_upper_limit, 'x', label='Spike')
+                plt.plot(spike_count.index, np.zeros(len(spike_count)) + spike_upper_limit[-1], 'x', label='Spike')
         try:
             plt.plot(peak_count.index, [data_all[i] for i in peak_count.index], 'x', label='Peak')
         except ValueError:
-            plt.plot(peak_count.index, np.zeros(len(peak_count)) + peak_upper_limit, 'x', label='Peak')
+            plt.plot(peak_count.index, np.zeros(len(peak_count)) + peak_upper_limit[-1], 'x', label='Peak')
         plt.xticks(rotation=30)
         plt.legend()
 
@@ -204,21 +144,12 @@ def spike_detect_abs_threshold(data, spike_t, peak_t, lag, parameter_name, syste
 
     spike_upper_limit = spike_t
     spike_lower_limit = -spike_t
-    pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-    spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[i + 1:i + lag]) == 0) else 0 for i in range(len(pre_spike))]
-    spike_count = [sum(spike[:i + 1]) if spike[i] == 1 else np.nan for i in range(len(spike))]
-    spike = pd.Series(spike, data.index)
-    spike_count = pd.Series(spike_count, data.index)
-    spike_count.dropna(inplace=True)
+    spike_count = cal_spike_count(data, upper_limit=spike_upper_limit, lower_limit=spike_lower_limit, lag=lag)
 
     peak_upper_limit = peak_t
     peak_lower_limit = -peak_t
-    pre_peak = [1 if (peak_upper_limit < i < spike_upper_limit) else 0 for i in data]
-    peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[i + 1:i + lag]) == 0) else 0 for i in range(len(pre_peak))]
-    peak_count = [sum(peak[:i + 1]) if peak[i] == 1 else np.nan for i in range(len(peak))]
-    peak = pd.Series(peak, data.index)
-    peak_count = pd.Series(peak_count, data.index)
-    peak_count.dropna(inplace=True)
+    peak_count = cal_spike_count(data, upper_limit=spike_upper_limit, lower_limit=peak_upper_limit, lag=lag,
+                                 between=True)
 
     if plot:
         plt.figure(figsize=(10, 6))
@@ -285,7 +216,7 @@ def spike_detect_slope(data, th_slope, th_duration='1T'):
 def erratic_spike_r1(dp_data, dp_spike, mb_data, mb_spike, window_width='10m'):
     """
     Detect erratic spike where there is a spike in dp_data and there is no spike in mb_data
-    :param dp_data: dp Series with datetime index
+    :param dp_data: deprecated, unused, only kept for backward compatibility of positional arguments
     :param dp_spike: dp spike Series with datetime index
     :param mb_data: mb Series with datetime index
     :param mb_spike: mb spike Series with datetime index
@@ -293,48 +224,17 @@ def erratic_spike_r1(dp_data, dp_spike, mb_data, mb_spike, window_width='10m'):
     :return: Datetime indexed Series for dp erratic spikes, the first one with dp_data amplitude,
     second with mb_data amplitude
     """
-    dp_data.dropna(inplace=True)
-    mb_data.dropna(inplace=True)
-    steps = round(pd.to_timedelta(window_width)/pd.to_timedelta('30s'))
-
-    df_dp = pd.DataFrame(index=dp_data.index, columns=['dp_value', 'dp_spike', 'dp_index'])
-    df_dp['dp_value'] = dp_data
-    df_dp['dp_spike'] = [1 if i in dp_spike.index else 0 for i in dp_data.index]
-    df_dp['dp_index'] = pd.to_datetime(dp_data.index)
-    df_dp = df_dp.resample('30s').max()
-
-    df_mb = pd.DataFrame(index=mb_data.index, columns=['mb_value', 'mb_spike', 'mb_index'])
-    df_mb['mb_value'] = mb_data
-    df_mb['mb_spike'] = [1 if i in mb_spike.index else 0 for i in mb_data.index]
-    df_mb['mb_index'] = pd.to_datetime(mb_data.index)
-    df_mb = df_mb.resample('30s').max()
-
-    df = pd.merge(df_dp, df_mb, left_index=True, right_index=True)
-    df.fillna(method='ffill', inplace=True)
-    for i in range(-round(steps/2), round(steps/2)):
-        if i != 0:
-            mb_s_title = 'mb_spike_' + str(i)
-            df[mb_s_title] = df['mb_spike'].shift(i)
-
-    spike_cols = ['dp_spike', 'mb_spike']
-    for i in range(-round(steps/2), round(steps/2)):
-        if i != 0:
-            spike_cols.append('mb_spike_' + str(i))
-
-    df['spike'] = df[spike_cols].sum(axis=1)
-    df = df[df['spike'] != 0]
-
-    df_erratic = df[(df['spike'] == 1) & (df['dp_spike'] == 1)]
-    df_erratic.set_index('dp_index', inplace=True)
-    df_erratic = df_erratic[~df_erratic.index.duplicated()]
-    return df_erratic['dp_value'], df_erratic['mb_value']
+    matched = match_events(dp_spike, mb_spike, tolerance=pd.to_timedelta(window_width) / 2, resample_window='30s')
+    df_erratic = matched[~matched['matched']]
+    mb_value = match_events(df_erratic['value_1'], mb_data, tolerance=pd.to_timedelta(window_width) / 2)['value_2']
+    return df_erratic['value_1'].rename('dp_value'), mb_value.rename('mb_value')
 
 
 def erratic_spike_r2(dp_data, dp_spike, mb_data, mb_spike, mb_th, window_width='10m'):
     """
     Detect erratic spike where there is a spike in dp_data and there is a spike in mb_data
     but mb_data within range of mb_th
-    :param dp_data: dp Series with datetime index
+    :param dp_data: deprecated, unused, only kept for backward compatibility of positional arguments
     :param dp_spike: dp spike Series with datetime index
     :param mb_data: mb Series with datetime index
     :param mb_spike: mb spike Series with datetime index
@@ -342,42 +242,9 @@ def erratic_spike_r2(dp_data, dp_spike, mb_data, mb_spike, mb_th, window_width='
     :param window_width: search synchronise spike in this window size
     :return: Datetime indexed Series for dp erratic spikes, the first one with dp_data value, second with mb_data value
     """
-    dp_data.dropna(inplace=True)
-    mb_data.dropna(inplace=True)
-    steps = round(pd.to_timedelta(window_width)/pd.to_timedelta('30s'))
-
-    df_dp = pd.DataFrame(index=dp_data.index, columns=['dp_value', 'dp_spike', 'dp_index'])
-    df_dp['dp_value'] = dp_data
-    df_dp['dp_spike'] = [1 if i in dp_spike.index else 0 for i in dp_data.index]
-    df_dp['dp_index'] = pd.to_datetime(dp_data.index)
-    df_dp = df_dp.resample('30s').max()
-
-    df_mb = pd.DataFrame(index=mb_data.index, columns=['mb_value', 'mb_spike', 'mb_index'])
-    df_mb['mb_value'] = mb_data
-    df_mb['mb_spike'] = [1 if i in mb_spike.index else 0 for i in mb_data.index]
-    df_mb['mb_index'] = pd.to_datetime(mb_data.index)
-    df_mb = df_mb.resample('30s').max()
-
-    df = pd.merge(df_dp, df_mb, left_index=True, right_index=True)
-    df.fillna(method='ffill', inplace=True)
-    for i in range(-round(steps/2), round(steps/2)):
-        if i != 0:
-            mb_s_title = 'mb_spike_' + str(i)
-            df[mb_s_title] = df['mb_spike'].shift(i)
-
-    spike_cols = ['dp_spike', 'mb_spike']
-    for i in range(-round(steps/2), round(steps/2)):
-        if i != 0:
-            spike_cols.append('mb_spike_' + str(i))
-
-    df['spike'] = df[spike_cols].sum(axis=1)
-    df = df[df['spike'] != 0]
-
-    df_erratic = df[(df['dp_spike'] == 1) & (df['mb_spike'] == 1) &
-                    (df['mb_value'] <= mb_th[1]) & (df['mb_value'] >= mb_th[0])]
-    df_erratic.set_index('dp_index', inplace=True)
-    df_erratic = df_erratic[~df_erratic.index.duplicated()]
-    return df_erratic['dp_value'], df_erratic['mb_value']
+    matched = match_events(dp_spike, mb_spike, tolerance=pd.to_timedelta(window_width) / 2, resample_window='30s')
+    df_erratic = matched[matched['matched'] & matched['value_2'].between(mb_th[0], mb_th[1])]
+    return df_erratic['value_1'].rename('dp_value'), df_erratic['value_2'].rename('mb_value')
 
 
 def spike_remove_baseline(data, baseline_outlier_th=13, resample_rule='30min', resample_func='min',
@@ -14,6 +14,7 @@ from ._switching_count import SwitchingCount
 from ._similarity_search import SimilaritySearch
 from ._no_baseline_spike import NoBaselineSpike
 from ._vi_trend import ViTrend
+from ._graph import DerivedParameterGraph
 
 __all__ = [
     'Base',
@@ -27,4 +28,5 @@ __all__ = [
     'SimilaritySearch',
     'NoBaselineSpike',
     'ViTrend',
+    'DerivedParameterGraph',
 ]
@@ -5,18 +5,27 @@
 import os
 import copy
 import json
+import inspect
+import functools
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from typing import (
     Callable,
 )
 
 from .. import COLOR_ALERT
-from ..utils import create_vis_df, iir, cal_alert_periods
+from ..utils import create_vis_df, iir, cal_alert_periods, cal_alert_sweep, \
+    cal_alert_frame, StageCache, MemoryStageCache, profile_step, JsonLinesSink
+from ..utils._cal_alert_table import _per_column
 from ..vis import plt_maximize
 
+# Pipeline steps that do not update `derived_parameter_` and are therefore
+# always run rather than loaded from cache
+_UNCACHED_STEPS = ('_run_threshold',)
+
 
 class Base:
     """
@@ -65,6 +74,12 @@ class Base:
         A pd.DataFrame used to store `results_` and also plot-related info
         such as alerts and thresholds for post-processing and further
         visualization. Assigned after call method `save_vis_as_df()`.
+    report_ : list of dict
+        One record per processing step run by `process()`, with keys
+        'system_name', 'parameter_name', 'class', 'step', 'func', 'kwargs',
+        'start', 'wall_time', 'cpu_time', 'peak_memory', 'allocated_blocks',
+        'rows_in' and 'rows_out'. 'peak_memory' is None unless enabled by
+        `set_instrumentation()`.
     """
 
     def __init__(self):
@@ -86,10 +101,20 @@ class Base:
         self.graph_results_ = None
         self.vis_as_df_ = None
         self.processing_time_ = None
+        self.report_ = []
         self.pipeline_ = {}
 
+        # Instrumentation and memoization attributes
+        # To be set by methods `set_instrumentation()` and `set_cache()`
+        self.sink = None
+        self.trace_memory = False
+        self.verbose = False
+        self.cache = None
+
         # Model status attributes
         self.skip = False
+        self._lineage = []
+        self._data_key = None
 
     def reset(self, pipeline: bool = True) -> None:
         """
@@ -111,6 +136,9 @@ class Base:
         self.graph_results_ = None
         self.vis_as_df_ = None
         self.processing_time_ = None
+        self.report_ = []
+        self._lineage = []
+        self._data_key = None
 
         if pipeline:
             self.pipeline_ = {}
@@ -150,23 +178,188 @@ class Base:
         # Run processing steps if any in pipeline
         self.skip = True
         if self.pipeline_:
-            print('Start processing ...\n')
+            if self.verbose:
+                print('Start processing ...\n')
+            # Each step is keyed by the key of the previous step, i.e.,
+            # the data is hashed only once.
+            key = None
+            if (self.cache is not None) \
+                    and (self.derived_parameter_ is not None):
+                key = StageCache.key(self.derived_parameter_)
             for k, v in self.pipeline_.items():
                 for func, kwargs in v.items():
-                    t1 = datetime.now()
-                    getattr(self, func)(**kwargs)
-                    t2 = datetime.now()
-                    print(f'{datetime.now()}: step {k} - {func}'
-                          f' {kwargs} - time spent {t2 - t1}\n')
-            print('Processing completed!\n')
+                    if (key is None) | (func in _UNCACHED_STEPS):
+                        run = functools.partial(getattr(self, func), **kwargs)
+                    else:
+                        key = StageCache.key(key, func, kwargs)
+                        run = functools.partial(
+                            self._run_cached_step, key, func, kwargs)
+                    record = self._run_step(k, func, kwargs, run)
+                    if self.verbose:
+                        print(f'{datetime.now()}: step {k} - {func}'
+                              f' {kwargs} - time spent'
+                              f' {timedelta(seconds=record["wall_time"])}\n')
+            if self.verbose:
+                print('Processing completed!\n')
         self.skip = False
 
         end = datetime.now()
         self.processing_time_ = end - start
-        print(f'Total time spent {self.processing_time_}')
+        if self.verbose:
+            print(f'Total time spent {self.processing_time_}')
+
+        return self
+
+    def set_instrumentation(self,
+                            sink: Callable | str | None = None,
+                            trace_memory: bool = True,
+                            verbose: bool = False):
+        """
+        Configure instrumentation of processing steps.
+
+        Each step run by `process()` is always recorded in `self.report_`
+        with wall time, CPU time, allocated blocks, and input/output row
+        counts of `derived_parameter_`.
+
+        Parameters
+        ----------
+        sink : callable, str or None, default None
+            Called with each record as it is made, e.g., `LoggingSink()`.
+            If str, path of a JSON lines file the records are appended to.
+        trace_memory : bool, default True
+            Whether to trace peak memory of each step by `tracemalloc`,
+            which slows down allocation-heavy steps.
+        verbose : bool, default False
+            Whether to print progress and time spent to stdout.
+        """
+        if isinstance(sink, str):
+            sink = JsonLinesSink(sink)
+        self.sink = sink
+        self.trace_memory = trace_memory
+        self.verbose = verbose
+        return self
+
+    def _run_step(self, step, func: str, kwargs: dict,
+                  run: Callable) -> dict:
+        """Run and profile one processing step, and record it."""
+        rows_in = self._count_rows(self.derived_parameter_)
+        _, stats = profile_step(run, trace_memory=self.trace_memory)
+        record = {'system_name': self.system_name,
+                  'parameter_name': self.parameter_name,
+                  'class': type(self).__name__,
+                  'step': step,
+                  'func': func,
+                  'kwargs': kwargs,
+                  **stats,
+                  'rows_in': rows_in,
+                  'rows_out': self._count_rows(self.derived_parameter_)}
+        self.report_.append(record)
+        if self.sink is not None:
+            self.sink(record)
+        return record
+
+    @staticmethod
+    def _count_rows(x):
+        return None if x is None else len(x)
+
+    def set_cache(self, cache: StageCache | MemoryStageCache | str | None):
+        """
+        Enable memoization of processing stages on disk.
+
+        Results of pipeline steps (and of expensive stages of derived
+        classes) are cached by a hash of their input data, their parameters
+        and the library version. Changing e.g. only the threshold reuses
+        all cached upstream stages.
 
+        Parameters
+        ----------
+        cache : StageCache, MemoryStageCache, str or None
+            Cache, or directory of a StageCache. None disables memoization.
+        """
+        if isinstance(cache, str):
+            cache = StageCache(cache)
+        self.cache = cache
         return self
 
+    def _stage(self, func: Callable, stage: str, params):
+        """
+        Return `func()`, the result of processing stage `stage` with
+        parameters `params`, memoized if a cache is set by `set_cache()`.
+
+        Stages are keyed by their lineage, i.e., `self.data` and all stages
+        run so far, so that objects sharing a cache also share the results
+        of identical upstream stages.
+        """
+        self._lineage = self._lineage + [[stage, params]]
+        if self.cache is None:
+            return func()
+        if self._data_key is None:
+            self._data_key = self.cache.data_key(self.data)
+        return self.cache.get_or_compute(
+            StageCache.key(self._data_key, self._lineage), func)
+
+    @staticmethod
+    def _remove_outliers(x: pd.Series | pd.DataFrame,
+                         upper_limit: float | int | dict = None,
+                         lower_limit: float | int | dict = None
+                         ) -> pd.Series | pd.DataFrame:
+        """
+        Replace values out of [`lower_limit`, `upper_limit`] with NA. Limits
+        of pd.DataFrame can be dict/pd.Series keyed by column.
+        """
+        if isinstance(x, pd.DataFrame):
+            if upper_limit is not None:
+                upper_limit = _per_column(upper_limit, x.columns, np.inf)
+            if lower_limit is not None:
+                lower_limit = _per_column(lower_limit, x.columns, -np.inf)
+        if upper_limit is not None:
+            x = x.where(x <= upper_limit)
+        if lower_limit is not None:
+            x = x.where(x >= lower_limit)
+        return x
+
+    @staticmethod
+    def _resample(x: pd.Series, rule, func) -> pd.Series:
+        """Aggregate right-closed, right-labelled bins from start of day."""
+        return x.resample(rule=rule,
+                          closed='right',
+                          label='right',
+                          origin='start_day').agg(func=func)
+
+    @staticmethod
+    def _fillna(x: pd.Series | pd.DataFrame,
+                value: float | int | dict = None,
+                method: str = None,
+                **kwargs) -> pd.Series | pd.DataFrame:
+        """Fill NA by `method` ('ffill'/'pad' or 'bfill'/'backfill'), and
+        then with `value`, which can be dict keyed by column."""
+        if method in ('ffill', 'pad'):
+            x = x.ffill(**kwargs)
+        elif method in ('bfill', 'backfill'):
+            x = x.bfill(**kwargs)
+        elif method is not None:
+            raise ValueError(f"Invalid fill method '{method}'. Expected "
+                             f"'ffill', 'pad', 'bfill' or 'backfill'.")
+        if value is not None:
+            x = x.fillna(value, **kwargs)
+        return x
+
+    def _run_cached_step(self, key: str, func: str, kwargs: dict) -> None:
+        """Run pipeline step `func`, or load its result from cache."""
+        x = self.cache.get(key)
+        if x is None:
+            getattr(self, func)(**kwargs)
+            if self.derived_parameter_ is not None:
+                self.cache.put(key, self.derived_parameter_)
+        else:
+            self.derived_parameter_ = x
+            title = kwargs.get(
+                'title',
+                inspect.signature(getattr(self, func)).parameters.get(
+                    'title', inspect.Parameter.empty).default)
+            if title is not inspect.Parameter.empty:
+                self._add_to_results(self.derived_parameter_, title=title)
+
     def parse_src(self, src):
         """Extract data, system_name, and parameter_name from `src`."""
         self.data, self.system_name, self.parameter_name = self._parse_src(src)
@@ -212,6 +405,51 @@ class Base:
 
         return data, system_name, parameter_name
 
+    def sweep_threshold(self,
+                        configs: list | dict,
+                        merged: bool = False,
+                        n_jobs: int = 1) -> pd.DataFrame:
+        """
+        Evaluate alert configurations against `self.derived_parameter_`.
+
+        Call `process()` first, e.g., with `threshold` None. The derived
+        parameter is computed once and is not recomputed for each
+        configuration.
+
+        Parameters
+        ----------
+        configs : list of dict or dict
+            Configurations with keys 'threshold', 'is_upper', 't_min_high'
+            and 't_min_low'. Missing keys default to the configuration of
+            this object, and minimum times to zero if this object has none.
+            See `cal_alert_sweep` for more info.
+        merged : bool, default False
+            If True, statistics of merged alert periods.
+        n_jobs : int, default 1
+            Number of threads evaluating configurations in parallel.
+
+        Returns
+        -------
+        pd.DataFrame with alert count, total duration and first alert time
+        per configuration and level. See `cal_alert_sweep` for more info.
+        """
+        if self.derived_parameter_ is None:
+            raise ValueError('No derived parameter, call process() first.')
+
+        default = {'threshold': self.threshold,
+                   'is_upper': getattr(self, 'is_upper', True),
+                   't_min_high': getattr(self, 't_min_high', None),
+                   't_min_low': getattr(self, 't_min_low', None)}
+        if isinstance(configs, dict):
+            configs = {**{k: [v] for k, v in default.items()}, **configs}
+        else:
+            configs = [{**default, **c} for c in configs]
+
+        return cal_alert_sweep(data=self.derived_parameter_,
+                               configs=configs,
+                               merged=merged,
+                               n_jobs=n_jobs)
+
     def plot_results(self,
                      color: dict[str, str] = COLOR_ALERT,
                      path: str = None):
@@ -426,22 +664,22 @@ class Base:
 
         Parameters
         ----------
-        upper_limit : float or int, default None
+        upper_limit : float, int, dict or pd.Series, default None
             Values greater than `upper_limit` will be replaced with NA.
-        lower_limit : float or int, default None
+            If dict/pd.Series, limits of pd.DataFrame columns, while other
+            columns are not limited.
+        lower_limit : float, int, dict or pd.Series, default None
             Values less than `lower_limit` will be replaced with NA.
+            If dict/pd.Series, limits of pd.DataFrame columns, while other
+            columns are not limited.
         """
 
         self._add_to_pipeline(self._run_remove_outliers.__name__,
                               kwargs=locals())
 
         if self.derived_parameter_ is not None:
-            if upper_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ <= upper_limit, inplace=True)
-            if lower_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ >= lower_limit, inplace=True)
+            self.derived_parameter_ = self._remove_outliers(
+                self.derived_parameter_, upper_limit, lower_limit)
 
         self._add_to_results(self.derived_parameter_, title=title)
 
@@ -472,11 +710,13 @@ class Base:
                     value=None,
                     method=None,
                     title: str | None = 'After filling NA',
-                    *args,
                     **kwargs):
         """
         Fill NA/NaN values using the specified value or method.
 
+        `value` can be dict keyed by column of pd.DataFrame. `method` is
+        one of 'ffill'/'pad' and 'bfill'/'backfill'.
+
         See Also
         --------
         pandas.DataFrame.fillna
@@ -487,11 +727,10 @@ class Base:
 
         if self.derived_parameter_ is not None:
             if (value is not None) | (method is not None):
-                self.derived_parameter_.fillna(
+                self.derived_parameter_ = self._fillna(
+                    self.derived_parameter_,
                     value=value,
                     method=method,
-                    inplace=True,
-                    *args,
                     **kwargs)
 
         self._add_to_results(self.derived_parameter_, title=title)
@@ -527,18 +766,21 @@ class Base:
 
         if self.derived_parameter_ is not None:
             if (rule is not None) & (func is not None):
+                # Deprecated arguments are passed only if not default
+                deprecated = {k: v for k, v in {'axis': axis,
+                                                'kind': kind}.items()
+                              if v not in (0, None)}
                 self.derived_parameter_ = \
                     (self.derived_parameter_
                      .resample(rule=rule,
-                               axis=axis,
                                closed=closed,
                                label=label,
                                convention=convention,
-                               kind=kind,
                                on=on,
                                level=level,
                                origin=origin,
-                               offset=offset)
+                               offset=offset,
+                               **deprecated)
                      .aggregate(func=func, *args, **kwargs))
 
         self._add_to_results(self.derived_parameter_, title=title)
@@ -571,6 +813,8 @@ class Base:
         self._add_to_pipeline(self._run_rolling.__name__, kwargs=locals())
 
         if self.derived_parameter_ is not None:
+            # Deprecated argument is passed only if not default
+            deprecated = {'axis': axis} if axis != 0 else {}
             self.derived_parameter_ = \
                 (self.derived_parameter_
                  .rolling(window=window,
@@ -578,10 +822,10 @@ class Base:
                           center=center,
                           win_type=win_type,
                           on=on,
-                          axis=axis,
                           closed=closed,
                           step=step,
-                          method=method)
+                          method=method,
+                          **deprecated)
                  .aggregate(func=func, *args, **kwargs))
 
         self._add_to_results(self.derived_parameter_, title=title)
@@ -592,7 +836,7 @@ class Base:
                  alpha: float | int,
                  title: str | None = 'After IIR filtering'):
         """
-        IIR filter.
+        IIR filter, column-wise if pd.DataFrame.
 
         See Also
         --------
@@ -602,10 +846,6 @@ class Base:
         self._add_to_pipeline(self._run_iir.__name__, kwargs=locals())
 
         if self.derived_parameter_ is not None:
-
-            if not isinstance(self.derived_parameter_, pd.Series):
-                raise TypeError('IIR supports only pd.Series.')
-
             self.derived_parameter_.loc[:] = iir(
                 x=self.derived_parameter_.values, alpha=alpha)
 
@@ -622,9 +862,14 @@ class Base:
         Compare `self.derived_parameter_` against thresholds to get alert
         periods.
 
+        If `self.derived_parameter_` is pd.DataFrame, all columns are
+        compared at once, and `threshold`, `is_upper`, `t_min_high` and
+        `t_min_low` can be per column, see `cal_alert_frame`.
+
         See Also
         --------
         cal_alert_periods
+        cal_alert_frame
         """
 
         self._add_to_pipeline(self._run_threshold.__name__, kwargs=locals())
@@ -632,15 +877,18 @@ class Base:
         self.threshold = threshold
 
         if self.derived_parameter_ is not None:
-
-            if not isinstance(self.derived_parameter_, pd.Series):
-                raise TypeError('IIR supports only pd.Series.')
-
-            self.alert_ = cal_alert_periods(data=self.derived_parameter_,
-                                            threshold=threshold,
-                                            is_upper=is_upper,
-                                            t_min_high=t_min_high,
-                                            t_min_low=t_min_low)
+            if isinstance(self.derived_parameter_, pd.DataFrame):
+                self.alert_ = cal_alert_frame(data=self.derived_parameter_,
+                                              threshold=threshold,
+                                              is_upper=is_upper,
+                                              t_min_high=t_min_high,
+                                              t_min_low=t_min_low)
+            else:
+                self.alert_ = cal_alert_periods(data=self.derived_parameter_,
+                                                threshold=threshold,
+                                                is_upper=is_upper,
+                                                t_min_high=t_min_high,
+                                                t_min_low=t_min_low)
         return self
 
     def _run(self,
@@ -0,0 +1,118 @@
+"""Class for computing a set of derived parameters with shared stages."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from ._base import Base
+from ..utils import MemoryStageCache
+
+
+class DerivedParameterGraph:
+    """
+    Compute a set of derived parameters of one system, sharing identical
+    upstream processing stages.
+
+    Each node is a derived parameter object, e.g., `Trend`, declared with
+    the name(s) of its input parameter(s). Its preprocessing stages, e.g.,
+    outlier removal, resampling and filling NA, are declared by its own
+    configuration. Stages are keyed by input data and all stages up to
+    them, so identical upstream stages of different nodes, e.g., the same
+    resampling of the same parameter, are computed once and shared through
+    an in-memory cache. Nodes are independent branches and run in parallel
+    threads.
+
+    Parameters
+    ----------
+    n_jobs : int, default 1
+        Number of threads processing nodes in parallel.
+
+    Attributes
+    ----------
+    nodes : dict
+        {name: (model, inputs)} of added nodes.
+    models_ : dict
+        {name: processed copy of model}. Assigned after call method `run()`.
+    cache_ : MemoryStageCache
+        Stage results of the last call of `run()`, with hit/miss counts.
+
+    Examples
+    --------
+    >>> graph = DerivedParameterGraph(n_jobs=4)
+    >>> graph.add('trend', Trend(resample_rule='1h'), 'Pressure')
+    >>> graph.add('stft', SwitchingSTFT(resample_rule='1h'), 'Pressure')
+    >>> models = graph.run(df, system_name='A1-PUMP')
+    >>> models['trend'].derived_parameter_
+    """
+
+    def __init__(self, n_jobs: int = 1):
+        self.n_jobs = n_jobs
+        self.nodes = {}
+        self.models_ = {}
+        self.cache_ = None
+
+    def add(self, name: str, model: Base, inputs: str | list[str]):
+        """
+        Add a derived parameter.
+
+        Parameters
+        ----------
+        name : str
+            Name of the node.
+        model : Base
+            Derived parameter object, configured but not processed.
+        inputs : str or list of str
+            Name(s) of input parameter(s), passed to `model.process()` in
+            order, e.g., two for `IndependentSpike`.
+        """
+        if name in self.nodes:
+            raise ValueError(f'node {name} already exists!')
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self.nodes[name] = (model, list(inputs))
+        return self
+
+    def run(self,
+            data: pd.DataFrame | dict,
+            system_name: str | None = None) -> dict:
+        """
+        Process all nodes.
+
+        Parameters
+        ----------
+        data : pd.DataFrame or dict
+            Input parameters, as columns or {parameter_name: pd.Series}.
+        system_name : str, default None
+            System name passed to each model.
+
+        Returns
+        -------
+        dict
+            {name: processed copy of model}, also saved as `self.models_`.
+        """
+        self.cache_ = MemoryStageCache()
+        # Take each input out once, as stages are keyed by the identity of
+        # their input data, and a column of a DataFrame is a new object each
+        # time it is taken out
+        columns = {k: data[k]
+                   for k in dict.fromkeys(k for _, inputs in self.nodes.values()
+                                          for k in inputs)}
+
+        def process(name):
+            model, inputs = self.nodes[name]
+            model = model.copy().set_cache(self.cache_)
+            model.process(*[{'data': columns[k],
+                             'system_name': system_name,
+                             'parameter_name': k} for k in inputs])
+            model.set_cache(None)
+            return model
+
+        names = list(self.nodes.keys())
+        if self.n_jobs > 1:
+            with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+                models = list(executor.map(process, names))
+        else:
+            models = [process(k) for k in names]
+
+        self.models_ = dict(zip(names, models))
+        return self.models_
@@ -14,6 +14,7 @@ import matplotlib.pyplot as plt
 import os
 import datetime
 from ..utils._cal_alert_periods import cal_alert_periods
+from ..utils._match_events import match_events
 from .. import COLOR_ALERT
 
 class IndependentSpike(Base):
@@ -84,6 +85,8 @@ class IndependentSpike(Base):
         @param t_min_high: PdM duration threshold to raise PdM alerts
         @param t_min_low: PdM duration threshold to reset PdM alerts
         """
+        super().__init__()
+
         # Configurations
         self.th_slope_1 = th_slope_1
         self.th_slope_2 = th_slope_2
@@ -116,8 +119,6 @@ class IndependentSpike(Base):
         self.parameter_name = None
         self.parameter_name_2 = None
 
-        super(Base, self).__init__()
-
     def process(self, src_1, src_2):
         """
         Note
@@ -200,7 +201,7 @@ class IndependentSpike(Base):
             #self.results_['independent spike rule 2'] = copy.deepcopy(self.derived_parameter_)
 
             # (5) Combine independent spike of rule 1 and rule 2
-                src_1_erratic_spike = src_1_erratic_spike_r1.append(src_1_erratic_spike_r2)
+                src_1_erratic_spike = pd.concat([src_1_erratic_spike_r1, src_1_erratic_spike_r2])
                 self.derived_parameter_ = src_1_erratic_spike
                 self.results_['independent spike rule 1 and 2'] = copy.deepcopy(self.derived_parameter_)
 
@@ -358,42 +359,13 @@ class IndependentSpike(Base):
         :return: Datetime indexed Series for dp erratic spikes, the first one with src_1 amplitude,
         second with mb_data amplitude
         """
-        src_1.dropna(inplace=True)
-        src_2.dropna(inplace=True)
-        steps = round(pd.to_timedelta(rolling_window) / pd.to_timedelta(resample_window))
-
-        df_dp = pd.DataFrame(index=src_1.index, columns=[self.parameter_name, 'spike_1', 'index_1'])
-        df_dp[self.parameter_name] = src_1
-        df_dp['spike_1'] = [1 if i in src_1_spike.index else 0 for i in src_1.index]
-        df_dp['index_1'] = pd.to_datetime(src_1.index)
-        df_dp = df_dp.resample(resample_window).max()
-
-        df_mb = pd.DataFrame(index=src_2.index, columns=[self.parameter_name_2, 'spike_2', 'index_2'])
-        df_mb[self.parameter_name_2] = src_2
-        df_mb['spike_2'] = [1 if i in src_2_spike.index else 0 for i in src_2.index]
-        df_mb['index_2'] = pd.to_datetime(src_2.index)
-        df_mb = df_mb.resample(resample_window).max()
-
-        df = pd.merge(df_dp, df_mb, left_index=True, right_index=True)
-        df.fillna(method='ffill', inplace=True)
-        for i in range(-round(steps / 2), round(steps / 2)):
-            if i != 0:
-                mb_s_title = 'spike_2_' + str(i)
-                df[mb_s_title] = df['spike_2'].shift(i)
-
-        spike_cols = ['spike_1', 'spike_2']
-        for i in range(-round(steps / 2), round(steps / 2)):
-            if i != 0:
-                spike_cols.append('spike_2_' + str(i))
-
-        df['spike'] = df[spike_cols].sum(axis=1)
-        df = df[df['spike'] != 0]
-
-        df_erratic = df[(df['spike'] == 1) & (df['spike_1'] == 1)]
-        df_erratic.set_index('index_1', inplace=True)
-        df_erratic = df_erratic[~df_erratic.index.duplicated()]
-        return df_erratic[self.parameter_name], df_erratic[self.parameter_name_2]
-
+        matched = match_events(pd.Series(src_1_spike, dtype='float64'), pd.Series(src_2_spike, dtype='float64'),
+                               tolerance=pd.to_timedelta(rolling_window) / 2, resample_window=resample_window)
+        df_erratic = matched[~matched['matched']]
+        # src_2 value nearest to each erratic spike
+        src_2_value = match_events(df_erratic['value_1'], src_2, tolerance=pd.to_timedelta(rolling_window) / 2)['value_2']
+        return (df_erratic['value_1'].rename(self.parameter_name),
+                src_2_value.rename(self.parameter_name_2))
 
     def erratic_spike_r2(self, src_1, src_1_spike, src_2, src_2_spike,
                          src_1_th=None, src_2_th=None, window_width='10m', resample_window='30s'):
@@ -410,47 +382,13 @@ class IndependentSpike(Base):
         :param resample_window: select maximum peak point in batch within the resample window
         :return: Datetime indexed Series for dp erratic spikes, the first one with dp_data value, second with mb_data value
         """
-        src_1.dropna(inplace=True)
-        src_2.dropna(inplace=True)
-        steps = round(pd.to_timedelta(window_width) / pd.to_timedelta(resample_window))
-
-        df_dp = pd.DataFrame(index=src_1.index, columns=[self.parameter_name, 'spike_1', 'index_1'])
-        df_dp[self.parameter_name] = src_1
-        df_dp['spike_1'] = [1 if i in src_1_spike.index else 0 for i in src_1.index]
-        df_dp['index_1'] = pd.to_datetime(src_1.index)
-        df_dp = df_dp.resample(resample_window).max()
-
-        df_mb = pd.DataFrame(index=src_2.index, columns=[self.parameter_name_2, 'spike_2', 'index_2'])
-        df_mb[self.parameter_name_2] = src_2
-        df_mb['spike_2'] = [1 if i in src_2_spike.index else 0 for i in src_2.index]
-        df_mb['index_2'] = pd.to_datetime(src_2.index)
-        df_mb = df_mb.resample(resample_window).max()
-
-        df = pd.merge(df_dp, df_mb, left_index=True, right_index=True)
-        df.fillna(method='ffill', inplace=True)
-        for i in range(-round(steps / 2), round(steps / 2)):
-            if i != 0:
-                mb_s_title = 'spike_2_' + str(i)
-                df[mb_s_title] = df['spike_2'].shift(i)
-
-        spike_cols = ['spike_1', 'spike_2']
-        spike2_cols = ['spike_2']
-        for i in range(-round(steps / 2), round(steps / 2)):
-            if i != 0:
-                spike_cols.append('spike_2_' + str(i))
-                spike2_cols.append('spike_2_' + str(i))
-
-        df['spike'] = df[spike_cols].sum(axis=1)
-        df['spike_2_all'] = df[spike2_cols].sum(axis=1)
-        df = df[df['spike'] != 0]
-        if src_1_th is None:
-            df_erratic = df[(df['spike_1'] == 1) & (df['spike_2_all'] >= 1) &
-                            (df[self.parameter_name_2] <= src_2_th[1]) & (df[self.parameter_name_2] >= src_2_th[0])]
-        else:
-            df_erratic = df[(df['spike_1'] == 1) & (df['spike_2_all'] >= 1) &
-                            (df[self.parameter_name_2] <= src_2_th[1]) & (df[self.parameter_name_2] >= src_2_th[0])&
-                            (df[self.parameter_name] <= src_1_th[1]) & (df[self.parameter_name] >= src_1_th[0])]
-
-        df_erratic.set_index('index_1', inplace=True)
-        df_erratic = df_erratic[~df_erratic.index.duplicated()]
-        return df_erratic[self.parameter_name], df_erratic[self.parameter_name_2]
\ No newline at end of file
+        matched = match_events(pd.Series(src_1_spike, dtype='float64'), pd.Series(src_2_spike, dtype='float64'),
+                               tolerance=pd.to_timedelta(window_width) / 2, resample_window=resample_window)
+        is_erratic = matched['matched']
+        if src_2_th is not None:
+            is_erratic = is_erratic & matched['value_2'].between(src_2_th[0], src_2_th[1])
+        if src_1_th is not None:
+            is_erratic = is_erratic & matched['value_1'].between(src_1_th[0], src_1_th[1])
+        df_erratic = matched[is_erratic]
+        return (df_erratic['value_1'].rename(self.parameter_name),
+                df_erratic['value_2'].rename(self.parameter_name_2))
@@ -10,6 +10,8 @@ import pandas as pd
 
 from ._base import Base
 from ..utils._cal_alert_periods import cal_alert_periods
+from ..utils._spike_count import cal_spike_count, cal_local_mean_std
+from ..utils._cal_segments import cal_segments
 
 
 class NoBaselineSpike(Base):
@@ -21,6 +23,8 @@ class NoBaselineSpike(Base):
                  peak_t=3.0,
                  lag=2.0,
                  local_spike=False,
+                 local_window=50000,
+                 local_rolling=False,
                  resample_rule='30min',
                  resample_func='min',
                  upper_limit=None,
@@ -43,6 +47,8 @@ class NoBaselineSpike(Base):
         @param peak_t: threshold of peak
         @param lag: minimum number of data points between 2 detections
         @param local_spike: if True use moving window average, else use global average
+        @param local_window: window of local average, number of data points (int) or time offset (str, e.g. '7D')
+        @param local_rolling: if True use rolling window, else consecutive blocks of local_window
         @param resample_rule: resample resolution
         @param resample_func: 'min','max', or 'mean'
         @param upper_limit: max value to eliminate outliers
@@ -59,12 +65,16 @@ class NoBaselineSpike(Base):
         @param t_min_low: PdM duration threshold to reset PdM alerts
         @param total_count: if True final result includes total accumulation count
         """
+        super().__init__()
+
         # Configurations
         self.sigma_t = sigma_t
         self.spike_t = spike_t
         self.peak_t = peak_t
         self.lag = lag
         self.local_spike = local_spike
+        self.local_window = local_window
+        self.local_rolling = local_rolling
         self.resample_rule = resample_rule
         self.resample_func = resample_func
         self.upper_limit = upper_limit
@@ -81,8 +91,6 @@ class NoBaselineSpike(Base):
         self.t_min_low = t_min_low
         self.total_count = total_count
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """
         Note
@@ -106,27 +114,31 @@ class NoBaselineSpike(Base):
 
             # (1) Aggregate and fill NA with most recent non-NA value
             self.derived_parameter_ = copy.deepcopy(self.data)
-            self.derived_parameter_ = self.derived_parameter_.resample(
-                rule=self.resample_rule,
-                closed='right',
-                label='right',
-                origin='start_day').agg(func=self.resample_func)
-            self.derived_parameter_.fillna(method='ffill', inplace=True)
+            self.derived_parameter_ = self._stage(
+                lambda: self._resample(self.derived_parameter_,
+                                       self.resample_rule,
+                                       self.resample_func),
+                'resample', [self.resample_rule, self.resample_func])
+            self.derived_parameter_ = self._stage(
+                lambda: self._fillna(self.derived_parameter_,
+                                     method='ffill'),
+                'fillna', [None, 'ffill'])
             self.results_['after aggregation & ffill'] = copy.deepcopy(
                 self.derived_parameter_)
 
             # (2) Replace outliers with a fixed value or
             # most recent non-outlier value (optional)
-            if self.upper_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ <= self.upper_limit, inplace=True)
-            if self.lower_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ >= self.lower_limit, inplace=True)
             if (self.upper_limit is not None) | (self.lower_limit is not None):
-                self.derived_parameter_.fillna(value=self.fillna_value,
-                                               method=self.fillna_method,
-                                               inplace=True)
+                self.derived_parameter_ = self._stage(
+                    lambda: self._remove_outliers(self.derived_parameter_,
+                                                  self.upper_limit,
+                                                  self.lower_limit),
+                    'remove_outliers', [self.upper_limit, self.lower_limit])
+                self.derived_parameter_ = self._stage(
+                    lambda: self._fillna(self.derived_parameter_,
+                                         self.fillna_value,
+                                         self.fillna_method),
+                    'fillna', [self.fillna_value, self.fillna_method])
                 self.results_['after outlier removal & replacement'] = \
                     copy.deepcopy(self.derived_parameter_)
 
@@ -163,7 +175,9 @@ class NoBaselineSpike(Base):
                                                             lag=self.lag, sigma_t=self.sigma_t)
             elif self.local_spike:
                 spike_count, peak_count = self.spike_detect_local(data_all=self.derived_parameter_, spike_t=self.spike_t,
-                                                                  peak_t=self.peak_t, lag=self.lag)
+                                                                  peak_t=self.peak_t, lag=self.lag,
+                                                                  window_size=self.local_window,
+                                                                  rolling=self.local_rolling)
 
             self.results_['spike count'] = spike_count
             spike_daily = spike_count.resample('1D').count()
@@ -225,24 +239,14 @@ class NoBaselineSpike(Base):
             spike_lower_limit = spike_t[0]
             peak_upper_limit = peak_t[1]
             peak_lower_limit = peak_t[0]
-        pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-        spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[int(i + 1):int(i + lag)]) == 0) else 0 for i in range(len(pre_spike))]
-        spike_count = [sum(spike[:i + 1]) if spike[i] == 1 else np.nan for i in range(len(spike))]
-        spike = pd.Series(spike, data.index)
-        spike_count = pd.Series(spike_count, data.index)
-        spike_count.dropna(inplace=True)
-
-        pre_peak = [1 if (peak_upper_limit < i < spike_upper_limit) else 0 for i in data]
-        peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[int(i + 1):int(i + lag)]) == 0) else 0 for i in range(len(pre_peak))]
-        peak_count = [sum(peak[:i + 1]) if peak[i] == 1 else np.nan for i in range(len(peak))]
-        peak = pd.Series(peak, data.index)
-        peak_count = pd.Series(peak_count, data.index)
-        peak_count.dropna(inplace=True)
+        spike_count = cal_spike_count(data, upper_limit=spike_upper_limit, lower_limit=spike_lower_limit, lag=lag)
+        peak_count = cal_spike_count(data, upper_limit=spike_upper_limit, lower_limit=peak_upper_limit, lag=lag,
+                                     between=True)
 
         return spike_count, peak_count
 
     @staticmethod
-    def spike_detect_local(data_all, spike_t, peak_t, lag, window_size=50000):
+    def spike_detect_local(data_all, spike_t, peak_t, lag, window_size=50000, rolling=False):
         """
         To detect spike and count the number within a local window
 
@@ -250,76 +254,21 @@ class NoBaselineSpike(Base):
         :param spike_t: std threshold for spike
         :param peak_t: std threshold for peak
         :param lag: within lag it count 1 spike
-        :param parameter_name: for plot label
-        :param window_size: size of window
+        :param window_size: size of window, number of data points (int) or time offset (str, e.g. '7D')
+        :param rolling: if True use rolling mean/std, else mean/std of consecutive blocks of window_size
         :return spike_count: number of spike
         """
         data_all = data_all.dropna().sort_index()
 
-        length = len(data_all)
-        if length > window_size:
-            N = length // window_size
-            R = length % window_size
-
-            spike_all = pd.Series([0], [data_all.index[0]])
-            peak_all = pd.Series([0], [data_all.index[0]])
-
-            for i in range(N + 1):
-                if i != N:
-                    data = data_all[window_size * i: window_size * (i + 1)]
-                else:
-                    data = data_all[window_size * i: window_size * (i + 1) + R]
-                std = np.std(data)
-                avg = np.mean(data)
-                spike_upper_limit = avg + spike_t * std
-                spike_lower_limit = avg - spike_t * std
-                pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-                spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[int(i + 1):int(i + lag)]) == 0) else 0 for i in
-                         range(len(pre_spike))]
-                spike = pd.Series(spike, data.index)
-                spike_all = spike_all.append(spike)
-
-                peak_upper_limit = avg + peak_t * std
-                peak_lower_limit = avg - peak_t * std
-                pre_peak = [1 if (peak_upper_limit < i < spike_upper_limit) else 0 for i in data]
-                peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[int(i + 1):int(i + lag)]) == 0) else 0 for i in
-                        range(len(pre_peak))]
-                peak = pd.Series(peak, data.index)
-                peak_all = peak_all.append(peak)
-
-            spike_count = [sum(spike_all[:i + 1]) if spike_all[i] == 1 else np.nan for i in range(1, len(spike_all))]
-
-            spike_count = pd.Series(spike_count, data_all.index)
-            spike_count.dropna(inplace=True)
-
-            peak_count = [sum(peak_all[:i + 1]) if peak_all[i] == 1 else np.nan for i in range(1, len(peak_all))]
-
-            peak_count = pd.Series(peak_count, data_all.index)
-            peak_count.dropna(inplace=True)
+        avg, std, segment = cal_local_mean_std(data_all, window=window_size, rolling=rolling)
+        spike_upper_limit = avg + spike_t * std
+        spike_lower_limit = avg - spike_t * std
+        peak_upper_limit = avg + peak_t * std
 
-        else:
-            data = data_all
-
-            std = np.std(data)
-            avg = np.mean(data)
-            spike_upper_limit = avg + spike_t * std
-            spike_lower_limit = avg - spike_t * std
-            pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-            spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[i + 1:i + lag]) == 0) else 0 for i in
-                     range(len(pre_spike))]
-            spike_count = [sum(spike[:i + 1]) if spike[i] == 1 else np.nan for i in range(len(spike))]
-            spike = pd.Series(spike, data.index)
-            spike_count = pd.Series(spike_count, data.index)
-            spike_count.dropna(inplace=True)
-
-            peak_upper_limit = avg + peak_t * std
-            peak_lower_limit = avg - peak_t * std
-            pre_peak = [1 if (i > peak_upper_limit) else 0 for i in data]
-            peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[i + 1:i + lag]) == 0) else 0 for i in range(len(pre_peak))]
-            peak_count = [sum(peak[:i + 1]) if peak[i] == 1 else np.nan for i in range(len(peak))]
-            peak = pd.Series(peak, data.index)
-            peak_count = pd.Series(peak_count, data.index)
-            peak_count.dropna(inplace=True)
+        spike_count = cal_spike_count(data_all, upper_limit=spike_upper_limit, lower_limit=spike_lower_limit,
+                                      lag=lag, segment=segment)
+        peak_count = cal_spike_count(data_all, upper_limit=spike_upper_limit, lower_limit=peak_upper_limit,
+                                     lag=lag, between=True, segment=segment)
 
         return spike_count, peak_count
 
@@ -329,18 +278,7 @@ class NoBaselineSpike(Base):
         data = data.dropna().sort_index()
         data_mean = data.rolling(rolling_window).agg('mean')
         data_diff = data - data_mean
-        df = pd.DataFrame()
-        df['diff'] = data_diff
-        df['level'] = [0 if i<=th_level else 1 for i in df['diff']]
-        df['change'] = df['level'].diff(1)
-        df['start'] = np.nan
-        df['stop'] = np.nan
-        df['start'][:-1] = [df.index[i] if (df.iloc[i+1]['change']==1) else np.nan for i in range(len(df.index)-1)]
-        df['stop'] = [df.index[i] if (df.iloc[i]['change'] == -1) else np.nan for i in range(len(df.index))]
-        df_spike = pd.DataFrame()
-        df_spike['start'] = df['start'].dropna().values[:len(df['stop'].dropna().values)]
-        df_spike['stop'] = df['stop'].dropna().values
-        df_spike['duration'] = df_spike['stop'] - df_spike['start']
+        df_spike = cal_segments(data, ~(data_diff.values <= th_level), amplitude=data_diff)
         min_duration = pd.to_timedelta(th_duration[0])
         max_duration = pd.to_timedelta(th_duration[1])
         df_spike = df_spike[(df_spike['duration'] >= min_duration) & (df_spike['duration'] <= max_duration)]
@@ -348,25 +286,11 @@ class NoBaselineSpike(Base):
             assert all(df_spike['duration']>pd.Timedelta('0.001s'))
         except AssertionError:
             print('Miss match between start and stop')
-        df_spike['max'] = [max(data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']]) for i in
-                           range(len(df_spike.index))]
-        df_spike['min'] = [min(data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']]) for i in
-                           range(len(df_spike.index))]
-        df_spike['diff'] = df_spike['max'] - df_spike['min']
-        df_spike['mean'] = [np.mean(data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']]) for i in
-                           range(len(df_spike.index))]
 
         df_spike = df_spike[df_spike['max'] >= th_spike[0]]
         df_spike = df_spike[df_spike['min'] <= th_spike[1]]
         df_spike = df_spike[(th_mean[0] <=df_spike['mean']) & (df_spike['mean'] <= th_mean[1])]
         df_spike = df_spike[(th_diff[0] <= df_spike['diff']) & (df_spike['diff'] <= th_diff[1])]
-
-        df_spike['peak_ts'] = [data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']][data==max(data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']])].index[0] for i in
-                               range(len(df_spike.index))]
-
-        df_spike['gap'] = np.nan
-        if len(df_spike.index) > 1:
-            df_spike['gap'][:-1] = [df_spike.iloc[i+1]['start'] - df_spike.iloc[i]['stop'] for i in
-                                    range(len(df_spike.index)-1)]
+        df_spike = df_spike.assign(gap=df_spike['start'].shift(-1) - df_spike['stop'])
 
         return df_spike
\ No newline at end of file
@@ -141,6 +141,8 @@ class PdMTrend(Base):
                  t_min_high: dict = None,
                  t_min_low: dict = None):
 
+        super().__init__()
+
         self.resample_rule = resample_rule
         self.resample_func = resample_func
         self.upper_limit = upper_limit
@@ -156,8 +158,6 @@ class PdMTrend(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """Process data.
 
@@ -183,27 +183,31 @@ class PdMTrend(Base):
             self.derived_parameter_ = self.data.copy()
 
             # (1) Aggregate and fill NA with most recent non-NA value
-            self.derived_parameter_ = self.derived_parameter_.resample(
-                rule=self.resample_rule,
-                closed='right',
-                label='right',
-                origin='start_day').agg(func=self.resample_func)
-            self.derived_parameter_.fillna(method='ffill', inplace=True)
+            self.derived_parameter_ = self._stage(
+                lambda: self._resample(self.derived_parameter_,
+                                       self.resample_rule,
+                                       self.resample_func),
+                'resample', [self.resample_rule, self.resample_func])
+            self.derived_parameter_ = self._stage(
+                lambda: self._fillna(self.derived_parameter_,
+                                     method='ffill'),
+                'fillna', [None, 'ffill'])
             self.results_['After aggregation & ffill'] = \
                 self.derived_parameter_.copy()
 
             # (2) Replace outliers with a fixed value
             # or most recent non-outlier value
-            if self.upper_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ <= self.upper_limit, inplace=True)
-            if self.lower_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ >= self.lower_limit, inplace=True)
             if (self.upper_limit is not None) | (self.lower_limit is not None):
-                self.derived_parameter_.fillna(value=self.fillna_value,
-                                               method=self.fillna_method,
-                                               inplace=True)
+                self.derived_parameter_ = self._stage(
+                    lambda: self._remove_outliers(self.derived_parameter_,
+                                                  self.upper_limit,
+                                                  self.lower_limit),
+                    'remove_outliers', [self.upper_limit, self.lower_limit])
+                self.derived_parameter_ = self._stage(
+                    lambda: self._fillna(self.derived_parameter_,
+                                         self.fillna_value,
+                                         self.fillna_method),
+                    'fillna', [self.fillna_value, self.fillna_method])
                 self.results_['After replacing outlier'] = \
                     self.derived_parameter_.copy()
 
@@ -7,7 +7,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 
 from . import Base
-from ..utils import cal_alert_periods, iir, cor
+from ..utils import cal_alert_periods, iir, cor, cal_rolling_cor
 
 
 class SimilaritySearch(Base):
@@ -16,10 +16,14 @@ class SimilaritySearch(Base):
 
     Parameters
     ----------
-    cor_pattern: pd.Series or (datetime.datetime, datetime.datetime)
-        Pattern to be searched within data.
-    cor_func : Callable function, default cor
-        Function to calculate correlation.
+    cor_pattern: pd.Series or (datetime.datetime, datetime.datetime) or dict
+        Pattern to be searched within data. If dict, values are patterns
+        which are searched at once and the derived parameter is the highest
+        correlation among all patterns.
+    cor_func : Callable function or str, default cor
+        Function to calculate correlation. `cor`, 'spearman' and 'pearson'
+        use the vectorized rolling correlation `cal_rolling_cor`, while
+        any other function is applied to each window.
     upper_limit : float or int, default None
         Values greater than `upper_limit` will be replaced with NA.
     lower_limit : float or int, default None
@@ -102,8 +106,10 @@ class SimilaritySearch(Base):
         A pd.DataFrame used to store `results_` and also plot-related info
         such as alerts and thresholds for post-processing and further
         visualization. Assigned after call method `save_vis_as_df()`.
-    cor_pattern_ : pd.Series
-        Pattern to be searched within data.
+    cor_pattern_ : pd.Series or dict
+        Pattern(s) to be searched within data.
+    cor_all_ : pd.DataFrame
+        Correlation with each pattern if `cor_pattern` is dict.
 
     Notes
     -----
@@ -137,7 +143,7 @@ class SimilaritySearch(Base):
     """
 
     def __init__(self,
-                 cor_pattern: pd.Series | tuple | list,
+                 cor_pattern: pd.Series | tuple | list | dict,
                  cor_func=cor,
                  upper_limit: float | int = None,
                  lower_limit: float | int = None,
@@ -154,6 +160,8 @@ class SimilaritySearch(Base):
                  t_min_high: dict = None,
                  t_min_low: dict = None):
 
+        super().__init__()
+
         self.cor_pattern = cor_pattern
         self.cor_func = cor_func
         self.upper_limit = upper_limit
@@ -171,10 +179,9 @@ class SimilaritySearch(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        # Additional output attribute
+        # Additional output attributes
         self.cor_pattern_ = None
-
-        super(Base, self).__init__()
+        self.cor_all_ = None
 
     def process(self, src):
         """Process data.
@@ -246,19 +253,32 @@ class SimilaritySearch(Base):
                     self.derived_parameter_.copy(deep=True)
 
             # (5) Cross correlation
-            if isinstance(self.cor_pattern, pd.Series):
-                self.cor_pattern_ = self.cor_pattern
+            if isinstance(self.cor_pattern, dict):
+                self.cor_pattern_ = {k: self._get_pattern(v)
+                                     for k, v in self.cor_pattern.items()}
+            else:
+                self.cor_pattern_ = self._get_pattern(self.cor_pattern)
+
+            if (self.cor_func is cor) | (self.cor_func == 'spearman'):
+                self.derived_parameter_ = cal_rolling_cor(
+                    self.derived_parameter_, self.cor_pattern_,
+                    method='spearman')
+            elif self.cor_func == 'pearson':
+                self.derived_parameter_ = cal_rolling_cor(
+                    self.derived_parameter_, self.cor_pattern_,
+                    method='pearson')
+            elif isinstance(self.cor_pattern_, dict):
+                self.derived_parameter_ = pd.DataFrame(
+                    {k: self._rolling_cor_func(self.derived_parameter_, v)
+                     for k, v in self.cor_pattern_.items()})
             else:
-                self.cor_pattern_ = self.derived_parameter_[
-                                    self.cor_pattern[0]:self.cor_pattern[1]
-                                    ].copy(deep=True)
-
-            self.derived_parameter_ = self.derived_parameter_.rolling(
-                window=len(self.cor_pattern_),
-                min_periods=len(self.cor_pattern_),
-                center=False,
-                win_type=None,
-                closed='right').agg(func=self.cor_func, y=self.cor_pattern_)
+                self.derived_parameter_ = self._rolling_cor_func(
+                    self.derived_parameter_, self.cor_pattern_)
+
+            if isinstance(self.derived_parameter_, pd.DataFrame):
+                self.cor_all_ = self.derived_parameter_
+                self.derived_parameter_ = self.cor_all_.max(axis=1)
+                self.derived_parameter_.name = self.parameter_name
             self.results_['Correlation'] = \
                 self.derived_parameter_.copy(deep=True)
 
@@ -270,8 +290,28 @@ class SimilaritySearch(Base):
                                                 t_min_high=self.t_min_high,
                                                 t_min_low=self.t_min_low)
 
+    def _get_pattern(self, pattern):
+        """Return `pattern`, or the derived parameter within period
+        `pattern` if it is (start, end)."""
+        if isinstance(pattern, pd.Series):
+            return pattern
+        return self.derived_parameter_[pattern[0]:pattern[1]].copy(deep=True)
+
+    def _rolling_cor_func(self, data, pattern):
+        """Apply `cor_func` to each window of `data`."""
+        return data.rolling(window=len(pattern),
+                            min_periods=len(pattern),
+                            center=False,
+                            win_type=None,
+                            closed='right').agg(func=self.cor_func, y=pattern)
+
     def plot_cor_pattern(self):
         fig, ax = plt.subplots()
-        ax.plot(self.cor_pattern_.index, self.cor_pattern_.values)
+        if isinstance(self.cor_pattern_, dict):
+            for k, v in self.cor_pattern_.items():
+                ax.plot(v.index, v.values, label=k)
+            ax.legend()
+        else:
+            ax.plot(self.cor_pattern_.index, self.cor_pattern_.values)
         ax.set_xlabel('')
         ax.set_ylabel('')
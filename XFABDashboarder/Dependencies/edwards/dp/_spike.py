@@ -40,6 +40,8 @@ class Spike(Base):
         @param t_min_high: PdM duration threshold to raise PdM alerts
         @param t_min_low: PdM duration threshold to reset PdM alerts
         """
+        super().__init__()
+
         # Configurations
         self.th_slope = th_slope
         self.th_duration = th_duration
@@ -49,8 +51,6 @@ class Spike(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """
         Note
@@ -7,6 +7,7 @@ import copy
 import pandas as pd
 import numpy as np
 from ._base import Base
+from ..utils._cal_segments import cal_segments
 from ..vis._plt_maximize import plt_maximize
 import matplotlib.pyplot as plt
 import os
@@ -47,6 +48,8 @@ class Spike2(Base):
         @param t_min_high: PdM duration threshold to raise PdM alerts
         @param t_min_low: PdM duration threshold to reset PdM alerts
         """
+        super().__init__()
+
         # Configurations
         self.rolling_window = rolling_window
         self.th_level = th_level
@@ -59,7 +62,9 @@ class Spike2(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        super(Base, self).__init__()
+        # Additional output attribute: table of located spikes, one row per
+        # segment above mean (see `edwards.utils.cal_segments`)
+        self.spikes_ = None
 
     def process(self, src):
         """
@@ -95,25 +100,9 @@ class Spike2(Base):
             data_mean = data.rolling(int(rolling_steps)).mean().fillna(method='bfill')
 
             data_diff = data - data_mean
-            df = pd.DataFrame()
-            df['diff'] = data_diff
-            df['level'] = [0 if i <= self.th_level else 1 for i in df['diff']]
-            df['change'] = df['level'].diff(1)
-            df['start'] = np.nan
-            df['stop'] = np.nan
-            df['start'][:-1] = [df.index[i] if (df.iloc[i + 1]['change'] == 1) else np.nan for i in
-                                range(len(df.index) - 1)]
-            df['stop'] = [df.index[i] if (df.iloc[i]['change'] == -1) else np.nan for i in range(len(df.index))]
-            df_spike = pd.DataFrame()
-            min_length = min([len(df['start'].dropna().values), len(df['stop'].dropna().values)])
-            if df['start'].dropna().values[0] <= df['stop'].dropna().values[0]:
-                df_spike['start'] = df['start'].dropna().values[:min_length]
-                df_spike['stop'] = df['stop'].dropna().values[:min_length]
-            else:
-                df_spike['start'] = df['start'].dropna().values[:len(df['stop'].dropna().values)-1]
-                df_spike['stop'] = df['stop'].dropna().values[1:]
+            is_above = ~(data_diff.values <= self.th_level)
+            df_spike = cal_segments(data, is_above, amplitude=data_diff)
 
-            df_spike['duration'] = df_spike['stop'] - df_spike['start']
             min_duration = pd.to_timedelta(self.th_duration[0])
             max_duration = pd.to_timedelta(self.th_duration[1])
             df_spike = df_spike[(df_spike['duration'] >= min_duration) & (df_spike['duration'] <= max_duration)]
@@ -121,26 +110,13 @@ class Spike2(Base):
                 assert all(df_spike['duration'] > pd.Timedelta('0.001s'))
             except AssertionError:
                 print('Miss match between start and stop')
-            df_spike['max'] = [max(data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']]) for i in
-                               range(len(df_spike.index))]
-            df_spike['min'] = [min(data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']]) for i in
-                               range(len(df_spike.index))]
-            df_spike['diff'] = df_spike['max'] - df_spike['min']
-            df_spike['mean'] = [np.mean(data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']]) for i in
-                                range(len(df_spike.index))]
 
             df_spike = df_spike[df_spike['max'] >= self.th_spike[0]]
             df_spike = df_spike[df_spike['min'] <= self.th_spike[1]]
             df_spike = df_spike[(self.th_mean[0] <= df_spike['mean']) & (df_spike['mean'] <= self.th_mean[1])]
             df_spike = df_spike[(self.th_diff[0] <= df_spike['diff']) & (df_spike['diff'] <= self.th_diff[1])]
-            df_spike['peak_ts'] = [data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']][
-                                       data == max(data[df_spike.iloc[i]['start']:df_spike.iloc[i]['stop']])].index[0]
-                                   for i in
-                                   range(len(df_spike.index))]
-            df_spike['gap'] = np.nan
-            if len(df_spike.index) > 1:
-                df_spike['gap'][:-1] = [df_spike.iloc[i + 1]['start'] - df_spike.iloc[i]['stop'] for i in
-                                        range(len(df_spike.index) - 1)]
+            df_spike = df_spike.assign(gap=df_spike['start'].shift(-1) - df_spike['stop'])
+            self.spikes_ = df_spike
 
             self.derived_parameter_ = data[df_spike['peak_ts']]
             print(data[df_spike['peak_ts']])
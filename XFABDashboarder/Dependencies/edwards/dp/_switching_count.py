@@ -161,6 +161,8 @@ class SwitchingCount(Base):
         if not (isinstance(min_slope, (list, tuple)) & (len(min_slope) == 2)):
             raise TypeError('min_slope')
 
+        super().__init__()
+
         self.upper_limit = upper_limit
         self.lower_limit = lower_limit
         self.min_slope = min_slope
@@ -178,8 +180,6 @@ class SwitchingCount(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """Process data.
 
@@ -205,14 +205,13 @@ class SwitchingCount(Base):
             self.derived_parameter_ = self.data.copy(deep=True)
 
             # (1) Replace outliers with NA.
-            if self.upper_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ <= self.upper_limit, inplace=True)
-            if self.lower_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ >= self.lower_limit, inplace=True)
             if ((self.upper_limit is not None)
                     | (self.lower_limit is not None)):
+                self.derived_parameter_ = self._stage(
+                    lambda: self._remove_outliers(self.derived_parameter_,
+                                                  self.upper_limit,
+                                                  self.lower_limit),
+                    'remove_outliers', [self.upper_limit, self.lower_limit])
                 self.results_['After removing outliers'] = \
                     self.derived_parameter_.copy(deep=True)
 
@@ -239,14 +238,12 @@ class SwitchingCount(Base):
                 x['switching event'].copy(deep=True)
 
             # (3)  Count, aggregate and fill NA with zero.
-            self.derived_parameter_ = self.derived_parameter_.resample(
-                rule=self.resample_rule,
-                closed='right',
-                label='right',
-                origin='start_day').agg(func=self.resample_func)
-            self.derived_parameter_.fillna(value=self.fillna_value,
-                                           method=self.fillna_method,
-                                           inplace=True)
+            self.derived_parameter_ = self._fillna(
+                self._resample(self.derived_parameter_,
+                               self.resample_rule,
+                               self.resample_func),
+                self.fillna_value,
+                self.fillna_method)
             self.derived_parameter_.name = 'count'
             self.results_['After aggregation and filling NA'] = \
                 self.derived_parameter_.copy(deep=True)
@@ -3,13 +3,11 @@
 # Authors: Danny Sun <duo.sun@edwardsvacuum.com>
 
 import datetime
-import numpy as np
 import pandas as pd
-from scipy import signal
 import matplotlib.pyplot as plt
 
 from . import Base
-from ..utils import cal_alert_periods, iir, centroid
+from ..utils import cal_alert_periods, iir, cal_stft_features
 
 
 class SwitchingSTFT(Base):
@@ -52,6 +50,12 @@ class SwitchingSTFT(Base):
         See 'scipy.signal.stft' for more info.
     stft_padded: str, default None
         See 'scipy.signal.stft' for more info.
+    stft_chunk_size: int, default 1024
+        Number of STFT segments transformed at once. Only the magnitude of
+        one chunk is held in memory at a time.
+    keep_stft: bool, default True
+        If True, the full magnitude spectrogram is kept in `stft_`.
+        Set to False to keep only the features for long histories.
     method: str {'fwa1', 'fwa2', 'fmax'}, default 'fwa1'
         Select feature as derived parameter. 'fwa1': weighted average
         frequency with frequency amplitudes as weights. 'fwa2': weighted
@@ -124,8 +128,9 @@ class SwitchingSTFT(Base):
         A pd.DataFrame used to store `results_` and also plot-related info
         such as alerts and thresholds for post-processing and further
         visualization. Assigned after call method `save_vis_as_df()`.
-    stft_ : ndarray
-        STFT of data.
+    stft_ : dict
+        STFT of data with keys 'f', 't', 'dt' and 'zxx' (magnitude, None
+        if `keep_stft` is False).
     graph_spectrogram_ : matplotlib.figure.Figure
         A matplotlib figure showing STFT spectrogram Assigned after call
         method `plot_features()`
@@ -181,6 +186,8 @@ class SwitchingSTFT(Base):
                  stft_nfft: int = None,
                  stft_boundary: str = None,
                  stft_padded: bool = True,
+                 stft_chunk_size: int = 1024,
+                 keep_stft: bool = True,
                  method: str = 'fwa1',
                  iir_alpha: float | int = None,
                  rolling_window: int = 48,
@@ -200,6 +207,8 @@ class SwitchingSTFT(Base):
         if not isinstance(resample_rule, (str, datetime.timedelta)):
             raise TypeError('resample_rule must be str or datetime.timedelta.')
 
+        super().__init__()
+
         self.upper_limit = upper_limit
         self.lower_limit = lower_limit
         self.resample_rule = resample_rule
@@ -212,6 +221,8 @@ class SwitchingSTFT(Base):
         self.stft_nfft = stft_nfft
         self.stft_boundary = stft_boundary
         self.stft_padded = stft_padded
+        self.stft_chunk_size = stft_chunk_size
+        self.keep_stft = keep_stft
         self.method = method
         self.iir_alpha = iir_alpha
         self.rolling_window = rolling_window
@@ -227,8 +238,6 @@ class SwitchingSTFT(Base):
         self.graph_spectrogram_ = None
         self.features_ = {}
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """Process data.
 
@@ -254,26 +263,27 @@ class SwitchingSTFT(Base):
             self.derived_parameter_ = self.data.copy()
 
             # (1) Replace outliers with NA.
-            if self.upper_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ <= self.upper_limit, inplace=True)
-            if self.lower_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ >= self.lower_limit, inplace=True)
             if ((self.upper_limit is not None)
                     | (self.lower_limit is not None)):
+                self.derived_parameter_ = self._stage(
+                    lambda: self._remove_outliers(self.derived_parameter_,
+                                                  self.upper_limit,
+                                                  self.lower_limit),
+                    'remove_outliers', [self.upper_limit, self.lower_limit])
                 self.results_['After removing outliers'] = \
                     self.derived_parameter_.copy()
 
             # (2) Aggregate and fill NA with most recent non-NA value
-            self.derived_parameter_ = self.derived_parameter_.resample(
-                rule=self.resample_rule,
-                closed='right',
-                label='right',
-                origin='start_day').agg(func=self.resample_func)
-            self.derived_parameter_.fillna(value=self.fillna_value,
-                                           method=self.fillna_method,
-                                           inplace=True)
+            self.derived_parameter_ = self._stage(
+                lambda: self._resample(self.derived_parameter_,
+                                       self.resample_rule,
+                                       self.resample_func),
+                'resample', [self.resample_rule, self.resample_func])
+            self.derived_parameter_ = self._stage(
+                lambda: self._fillna(self.derived_parameter_,
+                                     self.fillna_value,
+                                     self.fillna_method),
+                'fillna', [self.fillna_value, self.fillna_method])
             self.results_['After aggregation & ffill'] = \
                 self.derived_parameter_.copy()
 
@@ -284,37 +294,30 @@ class SwitchingSTFT(Base):
             else:
                 fs = datetime.timedelta(minutes=60) / self.resample_rule
 
-            f, t, zxx = signal.stft(self.derived_parameter_.values,
-                                    fs=fs,
-                                    window=self.stft_window,
-                                    nperseg=self.stft_nperseg,
-                                    noverlap=self.stft_noverlap,
-                                    nfft=self.stft_nfft,
-                                    detrend=False,
-                                    return_onesided=True,
-                                    boundary=self.stft_boundary,
-                                    padded=self.stft_padded,
-                                    axis=-1)
-            zxx = np.abs(zxx)
+            stft_params = dict(fs=fs,
+                               window=self.stft_window,
+                               nperseg=self.stft_nperseg,
+                               noverlap=self.stft_noverlap,
+                               nfft=self.stft_nfft,
+                               boundary=self.stft_boundary,
+                               padded=self.stft_padded,
+                               return_stft=self.keep_stft)
+            stft = self._stage(
+                lambda: cal_stft_features(self.derived_parameter_.values,
+                                          chunk_size=self.stft_chunk_size,
+                                          **stft_params),
+                'stft', stft_params)
             dt = pd.date_range(
                 self.derived_parameter_.index[0],
-                periods=len(t),
+                periods=len(stft['t']),
                 freq=self.resample_rule*(self.stft_nperseg-self.stft_noverlap))
 
-            self.stft_ = {'f': f, 't': t, 'zxx': zxx, 'dt': dt}
+            self.stft_ = {'f': stft['f'], 't': stft['t'], 'zxx': stft['zxx'],
+                          'dt': dt}
 
             # (3b) Extract derived parameters
-            self.features_['fmax'] = pd.Series(
-                    data=f[np.argmax(zxx, axis=0)],
-                    index=dt)
-            self.features_['fwa1'] = pd.Series(
-                    data=np.apply_along_axis(
-                        centroid, axis=0, arr=zxx, f=f, power=1),
-                    index=dt)
-            self.features_['fwa2'] = pd.Series(
-                    data=np.apply_along_axis(
-                        centroid, axis=0, arr=zxx, f=f, power=2),
-                    index=dt)
+            for k in ['fmax', 'fwa1', 'fwa2']:
+                self.features_[k] = pd.Series(data=stft[k], index=dt)
             self.derived_parameter_ = \
                 self.features_.get(self.method, None).copy()
             self.results_['After extracting feature ' + self.method] = \
@@ -345,6 +348,8 @@ class SwitchingSTFT(Base):
                                                 t_min_low=self.t_min_low)
 
     def plot_spectrogram(self):
+        if self.stft_.get('zxx') is None:
+            raise ValueError('Spectrogram is not kept, set keep_stft=True.')
         fig, ax = plt.subplots()
         ax.pcolormesh(self.stft_.get('dt').values,
                       self.stft_.get('f'),
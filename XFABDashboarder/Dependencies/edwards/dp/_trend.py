@@ -143,6 +143,8 @@ class Trend(Base):
                  t_min_high: dict = None,
                  t_min_low: dict = None):
 
+        super().__init__()
+
         self.upper_limit = upper_limit
         self.lower_limit = lower_limit
         self.resample_rule = resample_rule
@@ -158,8 +160,6 @@ class Trend(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """Process data.
 
@@ -185,35 +185,35 @@ class Trend(Base):
             self.derived_parameter_ = self.data.copy()
 
             # (1) Replace outliers with NA.
-            if self.upper_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ <= self.upper_limit, inplace=True)
-            if self.lower_limit is not None:
-                self.derived_parameter_.where(
-                    self.derived_parameter_ >= self.lower_limit, inplace=True)
             if ((self.upper_limit is not None)
                     | (self.lower_limit is not None)):
+                self.derived_parameter_ = self._stage(
+                    lambda: self._remove_outliers(self.derived_parameter_,
+                                                  self.upper_limit,
+                                                  self.lower_limit),
+                    'remove_outliers', [self.upper_limit, self.lower_limit])
                 self.results_['After removing outliers'] = \
                     self.derived_parameter_.copy()
 
             # (2) Resample / aggregate.
             if ((self.resample_rule is not None)
                     & (self.resample_func is not None)):
-                self.derived_parameter_ = self.derived_parameter_.resample(
-                    rule=self.resample_rule,
-                    closed='right',
-                    label='right',
-                    origin='start_day').agg(func=self.resample_func)
+                self.derived_parameter_ = self._stage(
+                    lambda: self._resample(self.derived_parameter_,
+                                           self.resample_rule,
+                                           self.resample_func),
+                    'resample', [self.resample_rule, self.resample_func])
                 self.results_['After aggregation'] = \
                     self.derived_parameter_.copy()
 
             # (3) Fill NA.
             if (self.fillna_value is not None) \
                     | (self.fillna_method is not None):
-                self.derived_parameter_.fillna(
-                    value=self.fillna_value,
-                    method=self.fillna_method,
-                    inplace=True)
+                self.derived_parameter_ = self._stage(
+                    lambda: self._fillna(self.derived_parameter_,
+                                         self.fillna_value,
+                                         self.fillna_method),
+                    'fillna', [self.fillna_value, self.fillna_method])
                 self.results_['After filling NA'] = \
                     self.derived_parameter_.copy()
 
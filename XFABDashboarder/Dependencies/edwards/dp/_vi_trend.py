@@ -29,6 +29,8 @@ class ViTrend(Base):
                  t_min_high=None,
                  t_min_low=None):
 
+        super().__init__()
+
         # Configurations
         self.resample_rule_1 = resample_rule_1
         self.resample_rule_2 = resample_rule_2
@@ -46,8 +48,6 @@ class ViTrend(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """
         Note
@@ -145,6 +145,8 @@ class InverterSpeed(Base):
                  t_min_high: dict = None,
                  t_min_low: dict = None):
 
+        super().__init__()
+
         self.normal_level = normal_level
         self.resample_rule = resample_rule
         self.resample_func = resample_func
@@ -161,8 +163,6 @@ class InverterSpeed(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """Process data.
 
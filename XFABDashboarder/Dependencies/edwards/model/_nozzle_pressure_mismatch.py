@@ -143,6 +143,8 @@ class NozzlePressureMismatch(Base):
                  t_min_high: dict = None,
                  t_min_low: dict = None):
 
+        super().__init__()
+
         self.resample_rule = resample_rule
         self.resample_func = resample_func
         self.upper_limit = upper_limit
@@ -158,8 +160,6 @@ class NozzlePressureMismatch(Base):
         self.t_min_high = t_min_high
         self.t_min_low = t_min_low
 
-        super(Base, self).__init__()
-
     def process(self, src):
         """Process data.
 
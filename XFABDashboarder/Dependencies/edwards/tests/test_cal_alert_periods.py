@@ -0,0 +1,156 @@
+import datetime
+
+import pandas as pd
+import numpy as np
+import pytest
+
+from edwards.dp import Base
+from edwards.utils import cal_alert_periods, cal_alert_table, cal_alert_sweep, \
+    cal_alert_frame
+from edwards.utils._cal_alert_periods import cal_triggered
+
+
+class TestCalAlertPeriods(object):
+
+    def test_cal_triggered(self):
+        index = pd.date_range('2021-06-01', periods=12, freq='1h')
+        is_positive = np.array([0, 1, 1, 1, 0, 1, 0, 0, 0, 1, 0, 0],
+                               dtype=bool)
+        actual = cal_triggered(index, is_positive,
+                               t_min_high=datetime.timedelta(hours=2),
+                               t_min_low=datetime.timedelta(hours=2))
+        # Triggered 2h after the first start, kept through the short
+        # positive period at 5, cleared 2h after it ends at 6; the last
+        # positive period is too short to trigger.
+        expected = np.array([0, 0, 0, 1, 1, 1, 1, 1, 0, 0, 0, 0], dtype=bool)
+        assert np.array_equal(actual, expected)
+
+    def test_cal_alert_periods(self):
+        index = pd.date_range('2021-06-01', periods=8, freq='1D')
+        data = pd.Series([0, 1, 2, 2, 1, 0, 0, 0], index=index, dtype=float)
+        t_min = {'warning': datetime.timedelta(0),
+                 'alarm': datetime.timedelta(0)}
+        alert = cal_alert_periods(data, threshold={'warning': 1, 'alarm': 2},
+                                  is_upper=True, t_min_high=t_min,
+                                  t_min_low=t_min)
+
+        assert alert['signal'].tolist() == [0, 1, 2, 2, 1, 0, 0, 0]
+        assert alert['periods_unmerged']['warning'].shape[0] == 1
+        assert alert['periods']['warning'].shape[0] == 2
+        assert alert['periods']['alarm'].loc[0, 'start'] == index[2]
+        assert alert['periods']['alarm'].loc[0, 'end'] == index[3]
+        assert alert['sampling_rate'] == pd.Timedelta('1D')
+
+    def test_cal_alert_table(self):
+        index = pd.date_range('2021-06-01', periods=8, freq='1D')
+        data = pd.DataFrame({'a': [0, 1, 2, 2, 1, 0, 0, 0],
+                             'b': [0, 0, 0, 0, 0, 0, 1, 1]},
+                            index=index, dtype=float)
+        t_min = {'warning': datetime.timedelta(0),
+                 'alarm': datetime.timedelta(0)}
+        table = cal_alert_table(data,
+                                threshold={'warning': 1,
+                                           'alarm': {'a': 2, 'b': 0.5}},
+                                is_upper=True, t_min_high=t_min,
+                                t_min_low=t_min)
+
+        for column in data.columns:
+            alert = cal_alert_periods(
+                data[column],
+                threshold={'warning': 1,
+                           'alarm': 2 if column == 'a' else 0.5},
+                is_upper=True, t_min_high=t_min, t_min_low=t_min)
+            for level in alert['levels']:
+                expected = alert['periods'][level]
+                actual = table.loc[(table['column'] == column)
+                                   & (table['level'] == level),
+                                   ['start', 'end']].reset_index(drop=True)
+                if expected is None:
+                    assert actual.empty
+                else:
+                    pd.testing.assert_frame_equal(actual, expected)
+
+    def test_cal_alert_frame(self):
+        index = pd.date_range('2021-06-01', periods=8, freq='1D')
+        data = pd.DataFrame({'a': [0, 1, 2, 2, 1, 0, 0, 0],
+                             'b': [0, 0, 0, 0, 0, 0, 1, 1]},
+                            index=index, dtype=float)
+        t_min = {'warning': datetime.timedelta(0),
+                 'alarm': datetime.timedelta(0)}
+        alert = cal_alert_frame(data,
+                                threshold={'warning': 1,
+                                           'alarm': {'a': 2, 'b': 0.5}},
+                                is_upper=True, t_min_high=t_min,
+                                t_min_low=t_min)
+
+        assert alert['signal']['a'].tolist() == [0, 1, 2, 2, 1, 0, 0, 0]
+        # As of cal_alert_periods, the last time point is never triggered
+        assert alert['signal']['b'].tolist() == [0, 0, 0, 0, 0, 0, 2, 0]
+        assert alert['periods']['warning']['column'].tolist() == ['a', 'a']
+        assert alert['periods_unmerged']['warning'].shape[0] == 2
+        assert alert['sampling_rate'] == pd.Timedelta('1D')
+
+    def test_base_frame_pipeline(self):
+        index = pd.date_range('2021-06-01', periods=8, freq='1D')
+        data = pd.DataFrame({'a': [0, 1, 2, 2, 9, 0, 0, 0],
+                             'b': [0, 0, 0, 0, 0, 0, 1, 1]},
+                            index=index, dtype=float)
+        t_min = {'warning': datetime.timedelta(0)}
+        model = Base()
+        model.process(data)
+        model._run_remove_outliers(upper_limit={'a': 5})
+        model._run_fillna(method='ffill')
+        model._run_iir(alpha=0.5)
+        model._run_threshold(threshold={'warning': {'a': 1.5, 'b': 0.5}},
+                             is_upper=True, t_min_high=t_min,
+                             t_min_low=t_min)
+
+        assert model.derived_parameter_['a'].tolist() == \
+            [0, 0.5, 1.25, 1.625, 1.8125, 0.90625, 0.453125, 0.2265625]
+        assert model.derived_parameter_['b'].tolist() == \
+            [0, 0, 0, 0, 0, 0, 0.5, 0.75]
+        assert model.alert_['signal']['a'].tolist() == \
+            [0, 0, 0, 1, 1, 0, 0, 0]
+        assert model.alert_['signal']['b'].tolist() == \
+            [0, 0, 0, 0, 0, 0, 1, 0]
+
+    def test_base_fillna(self):
+        index = pd.date_range('2021-06-01', periods=4, freq='1D')
+        data = pd.Series([np.nan, 1, np.nan, 2], index=index)
+        model = Base()
+        model.process(data)
+        model._run_fillna(value=0, method='ffill', limit=1)
+        assert model.derived_parameter_.tolist() == [0, 1, 1, 2]
+
+        with pytest.raises(ValueError):
+            model._run_fillna(method='nearest')
+
+    def test_cal_alert_sweep(self):
+        index = pd.date_range('2021-06-01', periods=8, freq='1D')
+        data = pd.Series([0, 1, 2, 2, 1, 0, 2, 0], index=index, dtype=float)
+        t_min = {'warning': datetime.timedelta(0)}
+        sweep = cal_alert_sweep(data, {'threshold': [{'warning': 1},
+                                                     {'warning': 2},
+                                                     {'warning': 3}],
+                                       'is_upper': [True],
+                                       't_min_high': [t_min],
+                                       't_min_low': [t_min]})
+
+        assert sweep['count'].tolist() == [2, 2, 0]
+        assert sweep['duration'].tolist() == [pd.Timedelta('3D'),
+                                              pd.Timedelta('1D'),
+                                              pd.Timedelta(0)]
+        assert sweep.loc[0, 'first_alert'] == index[1]
+        assert sweep.loc[1, 'first_alert'] == index[2]
+        assert pd.isna(sweep.loc[2, 'first_alert'])
+
+    def test_base_sweep_threshold(self):
+        index = pd.date_range('2021-06-01', periods=8, freq='1D')
+        data = pd.Series([0, 1, 2, 2, 1, 0, 2, 0], index=index, dtype=float)
+        # Base has no minimum times, which default to zero
+        model = Base().process(data)
+        sweep = model.sweep_threshold([{'threshold': {'warning': 1}},
+                                       {'threshold': {'warning': 2}}])
+
+        assert sweep['count'].tolist() == [2, 2]
+        assert sweep['t_min_high'].tolist() == [datetime.timedelta(0)] * 2
@@ -0,0 +1,46 @@
+import pandas as pd
+import numpy as np
+
+from edwards.utils import cal_segments
+
+
+class TestCalSegments(object):
+
+    def test_cal_segments(self):
+        index = pd.date_range('2021-06-01', periods=10, freq='10s')
+        data = pd.Series([2, 0, 5, 7, 0, 1, 0, 3, 3, 0], index=index,
+                         dtype='float64')
+        # First run touches the first point and is ignored.
+        actual = cal_segments(data, data.values > 0.5)
+
+        assert list(actual['start']) == list(index[[1, 4, 6]])
+        assert list(actual['stop']) == list(index[[4, 6, 9]])
+        assert list(actual['max']) == [7, 1, 3]
+        assert list(actual['min']) == [0, 0, 0]
+        assert np.allclose(actual['mean'], [3, 1 / 3, 1.5])
+        assert list(actual['peak_ts']) == list(index[[3, 5, 7]])
+        assert np.allclose(actual['area'], [120, 10, 60])
+        assert list(actual['gap'].iloc[:2]) == [pd.Timedelta('0s')] * 2
+        assert pd.isna(actual['gap'].iloc[2])
+
+    def test_cal_segments_empty(self):
+        index = pd.date_range('2021-06-01', periods=3, freq='10s')
+        data = pd.Series([0.0, 0.0, 0.0], index=index)
+        actual = cal_segments(data, data.values > 0.5)
+        assert actual.empty
+        assert 'peak_ts' in actual.columns
+
+    def test_cal_segments_nan_amplitude(self):
+        index = pd.date_range('2021-06-01', periods=8, freq='10s')
+        data = pd.Series([0, 0, 5, 0, 0, 4, 4, 0], index=index,
+                         dtype='float64')
+        # NaN before the first segment does not leak into any segment.
+        amplitude = np.array([np.nan, 1, 1, -1, 2, 2, -1, 3])
+        actual = cal_segments(data, data.values > 0.5, amplitude)
+        assert np.allclose(actual['area'], [10, 35])
+
+        # NaN within a segment only affects that segment.
+        amplitude[2] = np.nan
+        actual = cal_segments(data, data.values > 0.5, amplitude)
+        assert np.isnan(actual['area'].iloc[0])
+        assert np.isclose(actual['area'].iloc[1], 35)
@@ -0,0 +1,72 @@
+import pandas as pd
+import numpy as np
+
+from edwards.dp import DerivedParameterGraph, Trend, PdMTrend, SwitchingSTFT
+
+
+class TestDerivedParameterGraph(object):
+
+    def test_run(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2021-06-01', periods=20000, freq='37s')
+        data = pd.Series(rng.random(index.shape[0]) * 10, index=index,
+                         name='pressure')
+        data[::50] = np.nan
+
+        models = {
+            'trend': Trend(resample_rule='1h', resample_func='mean',
+                           upper_limit=9, fillna_method='ffill'),
+            'trend_iir': Trend(resample_rule='1h', resample_func='mean',
+                               upper_limit=9, fillna_method='ffill',
+                               iir_alpha=0.2),
+            'stft': SwitchingSTFT(resample_rule='1h', upper_limit=9,
+                                  stft_nperseg=24, stft_noverlap=12),
+            'pdm': PdMTrend(resample_rule='1h', upper_limit=9),
+            'pdm_iir': PdMTrend(resample_rule='1h', upper_limit=9,
+                                iir_alpha=0.2),
+        }
+        graph = DerivedParameterGraph(n_jobs=2)
+        for name, model in models.items():
+            graph.add(name, model, 'pressure')
+        actual = graph.run({'pressure': data}, system_name='A1')
+
+        for name, model in models.items():
+            expected = model.copy()
+            expected.process({'data': data, 'system_name': 'A1',
+                              'parameter_name': 'pressure'})
+            pd.testing.assert_series_equal(actual[name].derived_parameter_,
+                                           expected.derived_parameter_)
+            assert actual[name].system_name == 'A1'
+            assert getattr(actual[name], 'cache') is None
+
+        # Outlier removal, resampling and filling NA computed by trend and
+        # shared by trend_iir and stft, the 4 stages of pdm shared by pdm_iir
+        assert graph.cache_.misses == 3 + 1 + 4
+        assert graph.cache_.hits == 3 + 3 + 4
+
+    def test_run_dataframe(self):
+        # Columns of a DataFrame share stages as well as Series of a dict
+        rng = np.random.default_rng(1)
+        index = pd.date_range('2021-06-01', periods=5000, freq='37s')
+        df = pd.DataFrame({'pressure': rng.random(index.shape[0]) * 10,
+                           'current': rng.random(index.shape[0])},
+                          index=index)
+
+        graph = DerivedParameterGraph()
+        graph.add('trend', Trend(resample_rule='1h', resample_func='mean',
+                                 upper_limit=9, fillna_method='ffill'),
+                  'pressure')
+        graph.add('trend_iir', Trend(resample_rule='1h',
+                                     resample_func='mean', upper_limit=9,
+                                     fillna_method='ffill', iir_alpha=0.2),
+                  'pressure')
+        graph.add('current', Trend(resample_rule='1h'), 'current')
+
+        actual = graph.run(df)
+        counts = (graph.cache_.hits, graph.cache_.misses)
+        expected = graph.run({k: df[k] for k in df.columns})
+        assert counts == (graph.cache_.hits, graph.cache_.misses)
+        assert counts[0] == 3
+        for name in graph.nodes:
+            pd.testing.assert_series_equal(actual[name].derived_parameter_,
+                                           expected[name].derived_parameter_)
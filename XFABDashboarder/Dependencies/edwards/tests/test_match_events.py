@@ -0,0 +1,37 @@
+import pandas as pd
+import numpy as np
+
+from edwards.utils import match_events
+
+
+class TestMatchEvents(object):
+
+    def test_match_events(self):
+        t = pd.Timestamp('2021-06-01')
+        event_1 = pd.Series([5.0, 6.0, 7.0],
+                            index=t + pd.to_timedelta(['0s', '10min', '1h']))
+        event_2 = pd.Series([1.0, 2.0],
+                            index=t + pd.to_timedelta(['4min', '9min']))
+
+        actual = match_events(event_1, event_2, tolerance='5min')
+        assert actual['matched'].tolist() == [True, True, False]
+        assert actual['value_1'].tolist() == [5.0, 6.0, 7.0]
+        assert actual['value_2'].tolist()[:2] == [1.0, 2.0]
+        assert np.isnan(actual['value_2'].iloc[2])
+        assert actual.index.equals(event_1.index)
+
+        # Without tolerance every event is matched with the nearest one
+        actual = match_events(event_1, event_2)
+        assert actual['matched'].all()
+        assert actual['value_2'].tolist() == [1.0, 2.0, 2.0]
+
+    def test_match_events_resample_window(self):
+        t = pd.Timestamp('2021-06-01')
+        event_1 = pd.Series([1.0, 3.0, 2.0],
+                            index=t + pd.to_timedelta(['0s', '10s', '40s']))
+        event_2 = pd.Series(dtype='float64',
+                            index=pd.DatetimeIndex([]))
+
+        actual = match_events(event_1, event_2, '5min', resample_window='30s')
+        assert actual.index.equals(event_1.index[[1, 2]])
+        assert not actual['matched'].any()
@@ -0,0 +1,38 @@
+import pandas as pd
+import numpy as np
+
+from edwards.utils import cal_rolling_cor, cor
+
+
+class TestRollingCor(object):
+
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2021-06-01', periods=500, freq='30min')
+        self.data = pd.Series(np.round(rng.standard_normal(500), 1),
+                              index=index, name='data')
+        self.data.iloc[100:103] = np.nan
+        self.data.iloc[200:230] = 1.0
+        self.pattern = self.data.iloc[300:324].copy()
+
+    def test_spearman(self):
+        expected = self.data.rolling(len(self.pattern)).agg(func=cor,
+                                                            y=self.pattern)
+        actual = cal_rolling_cor(self.data, self.pattern)
+        pd.testing.assert_series_equal(actual, expected, check_freq=False)
+
+    def test_pearson(self):
+        y = self.pattern.values
+        expected = self.data.rolling(len(y)).apply(
+            lambda x: np.corrcoef(x, y)[0, 1], raw=True)
+        actual = cal_rolling_cor(self.data, y, method='pearson')
+        pd.testing.assert_series_equal(actual, expected, check_freq=False)
+
+    def test_multiple_patterns(self):
+        patterns = {'a': self.pattern, 'b': self.data.iloc[50:60]}
+        actual = cal_rolling_cor(self.data, patterns)
+        assert list(actual.columns) == ['a', 'b']
+        pd.testing.assert_series_equal(
+            actual['b'], cal_rolling_cor(self.data, patterns['b']),
+            check_names=False)
+        assert np.isclose(actual['a'].iloc[323], 1)
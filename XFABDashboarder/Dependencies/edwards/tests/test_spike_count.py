@@ -0,0 +1,72 @@
+import pandas as pd
+import numpy as np
+
+from edwards.utils import cal_spike_flag, cal_spike_count, cal_local_mean_std
+
+
+class TestSpikeCount(object):
+
+    def test_cal_spike_flag(self):
+        is_positive = np.array([1, 1, 0, 1, 0, 0, 1, 1, 1, 0], dtype=bool)
+        actual = cal_spike_flag(is_positive, lag=2)
+        expected = np.array([0, 1, 0, 1, 0, 0, 0, 0, 1, 0], dtype=bool)
+        assert np.array_equal(actual, expected)
+
+        actual = cal_spike_flag(is_positive, lag=3)
+        expected = np.array([0, 0, 0, 1, 0, 0, 0, 0, 1, 0], dtype=bool)
+        assert np.array_equal(actual, expected)
+
+        assert np.array_equal(cal_spike_flag(is_positive, lag=1), is_positive)
+
+        # Look-ahead stops at segment boundaries
+        segment = np.array([0, 0, 0, 0, 0, 0, 0, 1, 1, 1])
+        actual = cal_spike_flag(is_positive, lag=3, segment=segment)
+        expected = np.array([0, 0, 0, 1, 0, 0, 1, 0, 1, 0], dtype=bool)
+        assert np.array_equal(actual, expected)
+
+    def test_cal_spike_count(self):
+        index = pd.date_range('2021-06-01', periods=8, freq='10s')
+        data = pd.Series([0, 5, 0, -5, -5, 0, 3, 0], index=index)
+
+        actual = cal_spike_count(data, upper_limit=4, lower_limit=-4, lag=2)
+        expected = pd.Series([1.0, 2.0], index=index[[1, 4]])
+        pd.testing.assert_series_equal(actual, expected, check_freq=False)
+
+        actual = cal_spike_count(data, upper_limit=4, lower_limit=2, lag=2,
+                                 between=True)
+        expected = pd.Series([1.0], index=index[[6]])
+        pd.testing.assert_series_equal(actual, expected, check_freq=False)
+
+    def test_cal_spike_count_matches_loop(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2021-06-01', periods=2000, freq='10s')
+        data = pd.Series(rng.standard_normal(2000), index=index)
+        lag = 3
+
+        pre = [1 if (i > 1.5 or i < -1.5) else 0 for i in data]
+        spike = [1 if (pre[i] == 1 and sum(pre[i + 1:i + lag]) == 0) else 0
+                 for i in range(len(pre))]
+        count = [sum(spike[:i + 1]) if spike[i] == 1 else np.nan
+                 for i in range(len(spike))]
+        expected = pd.Series(count, index).dropna()
+
+        actual = cal_spike_count(data, upper_limit=1.5, lower_limit=-1.5,
+                                 lag=lag)
+        pd.testing.assert_series_equal(actual, expected, check_freq=False)
+
+    def test_cal_local_mean_std(self):
+        index = pd.date_range('2021-06-01', periods=5, freq='1h')
+        data = pd.Series([1.0, 3.0, 10.0, 20.0, 5.0], index=index)
+
+        avg, std, segment = cal_local_mean_std(data, window=2)
+        assert np.allclose(avg, [2, 2, 15, 15, 5])
+        assert np.allclose(std, [1, 1, 5, 5, 0])
+        assert np.array_equal(segment, [0, 0, 1, 1, 2])
+
+        avg, std, segment = cal_local_mean_std(data, window='2h')
+        assert np.allclose(avg, [2, 2, 15, 15, 5])
+        assert np.array_equal(segment, [0, 0, 1, 1, 2])
+
+        avg, std, segment = cal_local_mean_std(data, window=2, rolling=True)
+        assert np.allclose(avg, [1, 2, 6.5, 15, 12.5])
+        assert segment is None
@@ -0,0 +1,107 @@
+import functools
+import os
+
+import pandas as pd
+import numpy as np
+
+from edwards.utils import StageCache, hash_data
+
+
+class TestStageCache(object):
+
+    def test_get_or_compute(self, tmp_path):
+        cache = StageCache(str(tmp_path))
+        data = pd.Series(np.arange(10.0),
+                         index=pd.date_range('2021-06-01', periods=10,
+                                             freq='1min'))
+        calls = []
+
+        def func():
+            calls.append(1)
+            return data * 2
+
+        key = cache.key(data, 'double', {'factor': 2})
+        assert key not in cache
+        pd.testing.assert_series_equal(cache.get_or_compute(key, func),
+                                       data * 2)
+        assert key in cache
+        pd.testing.assert_series_equal(cache.get_or_compute(key, func),
+                                       data * 2)
+        assert len(calls) == 1
+
+        # Key depends on data and parameters
+        assert cache.key(data + 1, 'double', {'factor': 2}) != key
+        assert cache.key(data, 'double', {'factor': 3}) != key
+        assert cache.key(data, 'double', {'factor': 2}) == key
+
+    def test_evict(self, tmp_path):
+        cache = StageCache(str(tmp_path))
+        x = np.zeros(1000)
+        for i in range(3):
+            key = cache.key(i)
+            cache.put(key, x)
+            os.utime(cache._file(key), (i, i))
+        cache.get(cache.key(0))
+
+        # Least recently used is evicted first
+        cache.max_size = 2 * os.path.getsize(cache._file(cache.key(0)))
+        cache.evict()
+        assert cache.key(0) in cache
+        assert cache.key(1) not in cache
+        assert cache.key(2) in cache
+
+    def test_key_of_callable(self):
+        # Callables are keyed by name, not by memory address
+        def func(x):
+            return x
+
+        def other(x):
+            return x
+
+        key = StageCache.key('apply', {'func': func})
+        assert StageCache.key('apply', {'func': func}) == key
+        assert StageCache.key('apply', {'func': other}) != key
+        assert StageCache.key('apply', {'func': np.mean}) == \
+            StageCache.key('apply', {'func': np.mean})
+
+    def test_key_of_function_code(self):
+        # Functions of the same name are keyed by code and closure values
+        assert hash_data({'f': lambda x: x + 1}) != \
+            hash_data({'f': lambda x: x * 100})
+        assert hash_data({'f': lambda x: x + 1}) == \
+            hash_data({'f': lambda x: x + 1})
+
+        def make(n):
+            return lambda x: x + n
+
+        assert hash_data({'f': make(1)}) != hash_data({'f': make(2)})
+        assert hash_data({'f': make(1)}) == hash_data({'f': make(1)})
+        assert hash_data({'f': functools.partial(np.round, decimals=1)}) != \
+            hash_data({'f': functools.partial(np.round, decimals=2)})
+
+        def recursive(x):
+            return recursive(x - 1) if x > 0 else x
+
+        assert hash_data({'f': recursive}) == hash_data({'f': recursive})
+
+    def test_key_of_array_parameter(self):
+        # Arrays in parameters are keyed by all their values
+        a = np.zeros(5000)
+        b = a.copy()
+        b[2500] = 1
+        assert hash_data({'weights': a}) != hash_data({'weights': b})
+        assert hash_data({'weights': a}) == hash_data({'weights': a.copy()})
+        assert hash_data([pd.Series(a)]) != hash_data([pd.Series(b)])
+
+    def test_get_corrupt_file(self, tmp_path):
+        cache = StageCache(str(tmp_path))
+        key = cache.key('corrupt')
+        cache.put(key, np.zeros(10))
+        with open(cache._file(key), 'wb') as f:
+            f.write(b'not a pickle')
+
+        # Corrupt file is removed and the result recomputed
+        assert cache.get(key) is None
+        assert key not in cache
+        assert cache.get_or_compute(key, lambda: 1) == 1
+        assert cache.get(key) == 1
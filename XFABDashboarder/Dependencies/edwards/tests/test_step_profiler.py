@@ -0,0 +1,43 @@
+import json
+
+import pandas as pd
+import numpy as np
+
+from edwards.dp import Base
+from edwards.utils import profile_step
+
+
+class TestStepProfiler(object):
+
+    def test_profile_step(self):
+        result, stats = profile_step(lambda: np.ones(10 ** 6).sum())
+        assert result == 10 ** 6
+        assert stats['wall_time'] >= 0
+        assert stats['cpu_time'] >= 0
+        assert stats['peak_memory'] >= 8 * 10 ** 6
+
+        _, stats = profile_step(lambda: None, trace_memory=False)
+        assert stats['peak_memory'] is None
+
+    def test_base_report(self, tmp_path, capsys):
+        data = pd.Series([1.0, 5.0, np.nan, 2.0],
+                         index=pd.date_range('2021-06-01', periods=4),
+                         name='x')
+        model = Base()
+        model.process(data)
+        model._run_remove_outliers(upper_limit=4)
+        model._run_dropna()
+
+        file = tmp_path / 'report.jsonl'
+        model.set_instrumentation(sink=str(file))
+        model.process(data)
+
+        assert capsys.readouterr().out == ''
+        assert [r['func'] for r in model.report_] == ['_run_remove_outliers',
+                                                      '_run_dropna']
+        assert [r['rows_in'] for r in model.report_] == [4, 4]
+        assert [r['rows_out'] for r in model.report_] == [4, 2]
+        assert all(r['peak_memory'] is not None for r in model.report_)
+
+        lines = file.read_text().splitlines()
+        assert [json.loads(line)['step'] for line in lines] == [1, 2]
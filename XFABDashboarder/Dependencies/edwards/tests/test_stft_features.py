@@ -0,0 +1,33 @@
+import numpy as np
+from scipy import signal
+
+from edwards.utils import cal_stft_features, centroid
+
+
+class TestStftFeatures(object):
+
+    def test_cal_stft_features_matches_stft(self):
+        rng = np.random.default_rng(0)
+        x = rng.standard_normal(5000)
+        for boundary in [None, 'zeros', 'even']:
+            f, t, zxx = signal.stft(x, fs=60, nperseg=240, noverlap=200,
+                                    detrend=False, boundary=boundary,
+                                    padded=True)
+            zxx = np.abs(zxx)
+
+            actual = cal_stft_features(x, fs=60, nperseg=240, noverlap=200,
+                                       boundary=boundary, padded=True,
+                                       chunk_size=7, return_stft=True)
+            assert np.allclose(actual['f'], f)
+            assert np.allclose(actual['t'], t)
+            assert np.allclose(actual['zxx'], zxx)
+            assert np.array_equal(actual['fmax'], f[np.argmax(zxx, axis=0)])
+            assert np.allclose(actual['fwa1'], np.apply_along_axis(
+                centroid, axis=0, arr=zxx, f=f, power=1))
+            assert np.allclose(actual['fwa2'], np.apply_along_axis(
+                centroid, axis=0, arr=zxx, f=f, power=2))
+
+    def test_cal_stft_features_without_stft(self):
+        actual = cal_stft_features(np.ones(1000), nperseg=100, noverlap=50)
+        assert actual['zxx'] is None
+        assert actual['fwa1'].shape == actual['t'].shape
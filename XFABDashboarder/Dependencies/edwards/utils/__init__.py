@@ -3,6 +3,8 @@ The module includes various utilities.
 """
 
 from ._cal_alert_periods import cal_alert_periods
+from ._cal_alert_table import cal_alert_table, cal_alert_frame
+from ._cal_alert_sweep import cal_alert_sweep
 from ._convert_data_unit import convert_data_unit
 from ._listfile import listfile
 from ._latest_subdir import latest_subdir
@@ -13,9 +15,20 @@ from ._tribble import tribble
 from ._isiterable import isiterable
 from ._centroid import centroid
 from ._cor import cor
+from ._spike_count import cal_spike_flag, cal_spike_count, cal_local_mean_std
+from ._cal_segments import cal_segments
+from ._match_events import match_events
+from ._rolling_cor import cal_rolling_cor
+from ._stft_features import cal_stft_features
+from ._stage_cache import StageCache, MemoryStageCache, hash_data, \
+    library_version
+from ._step_profiler import profile_step, JsonLinesSink, LoggingSink
 
 __all__ = [
     'cal_alert_periods',
+    'cal_alert_table',
+    'cal_alert_frame',
+    'cal_alert_sweep',
     'convert_data_unit',
     'listfile',
     'latest_subdir',
@@ -26,4 +39,18 @@ __all__ = [
     'isiterable',
     'centroid',
     'cor',
+    'cal_spike_flag',
+    'cal_spike_count',
+    'cal_local_mean_std',
+    'cal_segments',
+    'match_events',
+    'cal_rolling_cor',
+    'cal_stft_features',
+    'StageCache',
+    'MemoryStageCache',
+    'hash_data',
+    'library_version',
+    'profile_step',
+    'JsonLinesSink',
+    'LoggingSink',
 ]
@@ -4,6 +4,47 @@ import pandas as pd
 import numpy as np
 
 
+def _is_positive(data: pd.DataFrame | pd.Series,
+                 threshold: float | int = None,
+                 is_upper: bool = True) -> np.ndarray:
+    """
+    Return the bool array of positive points of `data`, see
+    `cal_positive_periods`.
+    """
+    if isinstance(data, pd.DataFrame):
+        if threshold is not None:
+            column = list(data.columns[data.dtypes == 'float64'])
+            if not column:
+                raise TypeError('Invalid type. Expected float64.')
+            if is_upper:
+                is_positive = np.array(
+                    data.loc[:, column[0]].values >= threshold)
+            else:
+                is_positive = np.array(
+                    data.loc[:, column[0]].values <= threshold)
+        else:
+            column = list(data.columns[data.dtypes == 'bool'])
+            if not column:
+                raise TypeError('Invalid type. Expected bool.')
+            is_positive = np.array(data.loc[:, column[0]].values)
+    elif isinstance(data, pd.Series):
+        if threshold is not None:
+            if data.dtypes != 'float64':
+                raise TypeError('Invalid type. Expected float64.')
+            if is_upper:
+                is_positive = np.array(data.values >= threshold)
+            else:
+                is_positive = np.array(data.values <= threshold)
+        else:
+            if data.dtypes != 'bool':
+                raise TypeError('Invalid type. Expected bool.')
+            is_positive = np.array(data.values)
+    else:
+        raise TypeError('Invalid data type. Expected DataFrame or Series.')
+
+    return is_positive
+
+
 def cal_positive_periods(data: pd.DataFrame | pd.Series,
                          threshold: float | int = None,
                          is_upper: bool = True,
@@ -42,36 +83,7 @@ def cal_positive_periods(data: pd.DataFrame | pd.Series,
     if data is None:
         return None
 
-    if isinstance(data, pd.DataFrame):
-        if threshold is not None:
-            column = list(data.columns[data.dtypes == 'float64'])
-            if not column:
-                raise TypeError('Invalid type. Expected float64.')
-            if is_upper:
-                is_positive = np.array(
-                    data.loc[:, column[0]].values >= threshold)
-            else:
-                is_positive = np.array(
-                    data.loc[:, column[0]].values <= threshold)
-        else:
-            column = list(data.columns[data.dtypes == 'bool'])
-            if not column:
-                raise TypeError('Invalid type. Expected bool.')
-            is_positive = np.array(data.loc[:, column[0]].values)
-    elif isinstance(data, pd.Series):
-        if threshold is not None:
-            if data.dtypes != 'float64':
-                raise TypeError('Invalid type. Expected float64.')
-            if is_upper:
-                is_positive = np.array(data.values >= threshold)
-            else:
-                is_positive = np.array(data.values <= threshold)
-        else:
-            if data.dtypes != 'bool':
-                raise TypeError('Invalid type. Expected bool.')
-            is_positive = np.array(data.values)
-    else:
-        raise TypeError('Invalid data type. Expected DataFrame or Series.')
+    is_positive = _is_positive(data, threshold, is_upper)
 
     n = data.shape[0]
     is_start = [False] * n
@@ -97,6 +109,115 @@ def cal_positive_periods(data: pd.DataFrame | pd.Series,
     return periods
 
 
+def cal_runs(is_positive: np.ndarray) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Locate runs of positive points in each column of a bool matrix.
+
+    Parameters
+    ----------
+    is_positive : np.ndarray
+      Bool array, 1-D or 2-D with one column per series.
+
+    Returns
+    -------
+    col : np.ndarray, column of each run (0 for 1-D input)
+    first : np.ndarray, row of the first positive point of each run
+    last : np.ndarray, row of the last positive point of each run
+    Runs are sorted by column and then by row.
+    """
+    is_positive = np.asarray(is_positive, dtype=bool)
+    if is_positive.ndim == 1:
+        is_positive = is_positive.reshape(-1, 1)
+    n, m = is_positive.shape
+    padded = np.zeros((m, n + 2), dtype=np.int8)
+    padded[:, 1:-1] = is_positive.T
+    change = np.diff(padded, axis=1)
+    col, first = np.nonzero(change == 1)
+    _, last = np.nonzero(change == -1)
+    return col, first, last - 1
+
+
+def cal_triggered(index: pd.Index,
+                  is_positive: np.ndarray,
+                  t_min_high=datetime.timedelta(days=1),
+                  t_min_low=datetime.timedelta(days=1)) -> np.ndarray:
+    """
+    Apply the trigger/clear hysteresis of `add_column_triggered` in one pass.
+
+    A positive period runs from its first positive point to the first
+    negative point after it (or the last point). A period triggers an alert
+    from `t_min_high` after its start, if it lasts at least `t_min_high`,
+    or from its start, if it starts before the alert of the previous period
+    is cleared. An alert is cleared `t_min_low` after the end of the
+    period. The state of all periods of all columns is resolved with
+    cumulative maxima and the triggered points with a sweep over sorted
+    `index`, i.e., O(n + periods * log(n)).
+
+    Parameters
+    ----------
+    index : pd.Index
+      Sorted time index.
+    is_positive : np.ndarray
+      Bool array, 1-D with one value per point of `index`, or 2-D with one
+      row per point of `index` and one column per series.
+    t_min_high
+      Minimum high/positive to trigger an alert, scalar or one value per
+      column.
+    t_min_low
+      Minimum low/negative to clear an alert, scalar or one value per
+      column.
+
+    Returns
+    -------
+    np.ndarray of bool, of the same shape as `is_positive`, whether or not
+    alert is triggered at each point.
+    """
+    is_positive = np.asarray(is_positive, dtype=bool)
+    shape = is_positive.shape
+    if is_positive.ndim == 1:
+        is_positive = is_positive.reshape(-1, 1)
+    n, m = is_positive.shape
+
+    col, first, last = cal_runs(is_positive)
+    if first.shape[0] == 0:
+        return np.zeros(shape, dtype=bool)
+
+    if np.ndim(t_min_high) > 0:
+        t_min_high = np.asarray(t_min_high)[col]
+    if np.ndim(t_min_low) > 0:
+        t_min_low = np.asarray(t_min_low)[col]
+
+    # First negative point after each period, or the last point
+    start = index[first]
+    end = index[np.minimum(last + 1, n - 1)]
+    clear = end + t_min_low
+
+    is_long = (end - start) >= t_min_high
+    # Period starts before the alert of the previous period is cleared
+    is_close = np.zeros(first.shape[0], dtype=bool)
+    is_close[1:] = (col[1:] == col[:-1]) & (start[1:] < clear[:-1])
+
+    # A period triggers if it is long, or if it is close to a previous
+    # triggering period, i.e., a long period followed by close ones only.
+    k = np.arange(first.shape[0])
+    last_long = np.maximum.accumulate(np.where(is_long, k, -1))
+    chain_start = np.maximum.accumulate(np.where(is_close, 0, k))
+    is_triggering = last_long >= chain_start
+    is_at_start = np.zeros(first.shape[0], dtype=bool)
+    is_at_start[1:] = is_close[1:] & is_triggering[:-1]
+
+    trigger = np.where(is_at_start, start, start + t_min_high)
+
+    # Sweep over [trigger, clear) intervals, column after column
+    offset = col[is_triggering] * n
+    count = np.zeros(n * m + 1, dtype=np.int64)
+    np.add.at(count, offset + index.searchsorted(trigger[is_triggering]), 1)
+    np.add.at(count, offset + index.searchsorted(clear[is_triggering]), -1)
+    triggered = np.cumsum(count[:-1]).reshape(m, n).T > 0
+    return triggered.reshape(shape)
+
+
 def add_column_triggered(data: pd.DataFrame | pd.Series,
                          threshold: float | int = None,
                          is_upper: bool = True,
@@ -150,33 +271,11 @@ def add_column_triggered(data: pd.DataFrame | pd.Series,
     elif not isinstance(data, pd.DataFrame):
         raise TypeError('Invalid data type. Expected Series or DataFrame.')
 
-    data.loc[:, 'triggered'] = False
-
-    # 'include_last' must be set to True
-    periods = cal_positive_periods(data=data, threshold=threshold,
-                                   is_upper=is_upper, include_last=True)
-
-    if periods is not None:
-        for i in range(periods.shape[0]):
-            # If start point is already in triggered state, i.e.,
-            # due to the 'clear' delay introduced by last positive period,
-            # no need to wait for t_min_high to trigger an alert.
-            if data.loc[data.index.values == periods.loc[i, 'start'],
-                        'triggered'].values:
-                index = (data.index.values >=
-                         periods.loc[i, 'start']) \
-                        & (data.index.values < (periods.loc[i, 'end']
-                                                + t_min_low))
-                data.loc[index, 'triggered'] = True
-            # Else if start point is not in triggered state, needs to
-            # wait for t_min_high to trigger an alert.
-            elif (periods.loc[i, 'end'] - periods.loc[i, 'start']) \
-                    >= t_min_high:
-                index = (data.index.values >=
-                         (periods.loc[i, 'start'] + t_min_high)) \
-                        & (data.index.values < (periods.loc[i, 'end']
-                                                + t_min_low))
-                data.loc[index, 'triggered'] = True
+    data.loc[:, 'triggered'] = cal_triggered(
+        index=data.index,
+        is_positive=_is_positive(data, threshold, is_upper),
+        t_min_high=t_min_high,
+        t_min_low=t_min_low)
 
     return data
 
@@ -219,43 +318,39 @@ def cal_alert_periods(data: pd.DataFrame | pd.Series,
 
     alert_levels = list(threshold.keys())
 
-    data_triggered_unmerged = {}
-    alert_periods_unmerged = {}
-    for k, v in threshold.items():
-        data_triggered_unmerged[k] = add_column_triggered(
-            data=data,
-            threshold=threshold[k],
-            is_upper=is_upper,
+    # Triggered state of each level, one row per level
+    triggered_unmerged = np.zeros((len(alert_levels), data.shape[0]),
+                                  dtype=bool)
+    for i, k in enumerate(alert_levels):
+        triggered_unmerged[i] = cal_triggered(
+            index=data.index,
+            is_positive=_is_positive(data, threshold[k], is_upper),
             t_min_high=t_min_high[k],
             t_min_low=t_min_low[k])
-        # Set 'include_last' to False in order to extract first and last time
-        # points of each triggered periods
-        alert_periods_unmerged[k] = \
-            cal_positive_periods(data=data_triggered_unmerged[k],
-                                 include_last=False)
-
-    data_triggered = data_triggered_unmerged.copy()
-    if len(list(alert_levels)) > 1:
-        for i, low_level in enumerate(alert_levels[:-1]):
-            for j, high_level in enumerate(alert_levels[(i + 1):]):
-                x = data_triggered[low_level].loc[:, 'triggered'].values
-                y = data_triggered[high_level].loc[:, 'triggered'].values
-                x = x & (~y)
-                data_triggered[low_level].loc[:, 'triggered'] = x
 
+    # Each level is cleared where any higher level is triggered
+    higher = np.zeros_like(triggered_unmerged)
+    if len(alert_levels) > 1:
+        higher[:-1] = np.logical_or.accumulate(
+            triggered_unmerged[::-1], axis=0)[::-1][1:]
+    triggered = triggered_unmerged & ~higher
+
+    # Set 'include_last' to False in order to extract first and last time
+    # points of each triggered periods
+    alert_periods_unmerged = {}
     alert_periods = {}
-    for k, v in data_triggered.items():
-        # Set 'include_last' to False in order to extract first and last time
-        # points of each triggered periods
-        alert_periods[k] = cal_positive_periods(data=v, include_last=False)
-
-    z = None
-    for i, (k, v) in enumerate(data_triggered_unmerged.items(), start=1):
-        temp = v.loc[:, 'triggered'].astype(int)
-        temp = temp * i
-        temp = temp.to_frame().rename(columns={'triggered': k})
-        z = pd.concat([z, temp], axis=1, ignore_index=False)
-    alert_signal = z.max(axis=1)
+    for i, k in enumerate(alert_levels):
+        alert_periods_unmerged[k] = cal_positive_periods(
+            data=pd.Series(triggered_unmerged[i], index=data.index),
+            include_last=False)
+        alert_periods[k] = cal_positive_periods(
+            data=pd.Series(triggered[i], index=data.index),
+            include_last=False)
+
+    level_no = np.arange(1, len(alert_levels) + 1).reshape(-1, 1)
+    alert_signal = pd.Series(np.max(triggered_unmerged * level_no, axis=0,
+                                    initial=0),
+                             index=data.index)
 
     sampling_rate = \
         alert_signal.index.to_series().diff().value_counts().idxmax()
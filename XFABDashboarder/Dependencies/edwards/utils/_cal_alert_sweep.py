@@ -0,0 +1,129 @@
+import datetime
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ._cal_alert_periods import cal_runs, cal_triggered
+
+
+def cal_alert_sweep(data: pd.Series,
+                    configs: list | dict,
+                    merged: bool = False,
+                    chunk_size: int = 256,
+                    n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Evaluate many alert configurations against one derived parameter.
+
+    Each configuration is what `cal_alert_periods` takes. All
+    (configuration, level) pairs are evaluated as columns of one
+    time x evaluation matrix with `cal_triggered`, in chunks of
+    `chunk_size` columns.
+
+    Parameters
+    ----------
+    data : pd.Series
+      Derived parameter with sorted datetime index.
+    configs : list of dict or dict
+      If list, each item is a configuration with keys 'threshold',
+      'is_upper', 't_min_high' and 't_min_low', as the arguments of
+      `cal_alert_periods`. 't_min_high' and 't_min_low' can be None,
+      i.e., no minimum time.
+      If dict, the same keys with lists of candidate values, whose
+      Cartesian product is evaluated, e.g.,
+      {'threshold': [{'warning': 1}, {'warning': 2}], 'is_upper': [True],
+      't_min_high': [{'warning': datetime.timedelta(days=1)}],
+      't_min_low': [{'warning': datetime.timedelta(days=1)}]}
+    merged : bool, default False
+      If True, statistics of merged alert periods, i.e., 'periods' of
+      `cal_alert_periods`. Otherwise of unmerged alert periods.
+    chunk_size : int, default 256
+      Number of (configuration, level) pairs evaluated at once.
+    n_jobs : int, default 1
+      Number of threads evaluating chunks in parallel.
+
+    Returns
+    -------
+    pd.DataFrame with one row per configuration and level and columns
+      'config' : position of the configuration in `configs`
+      'level', 'threshold', 'is_upper', 't_min_high', 't_min_low' :
+          configuration of the level
+      'count' : number of alert periods
+      'duration' : total duration of alert periods
+      'first_alert' : start of the first alert period, NaT if none
+    """
+    if not isinstance(data, pd.Series):
+        raise TypeError('Invalid type. Expected Series.')
+
+    if isinstance(configs, dict):
+        keys = list(configs.keys())
+        configs = [dict(zip(keys, v))
+                   for v in itertools.product(*configs.values())]
+
+    rows = [{'config': i,
+             'level': k,
+             'threshold': c['threshold'][k],
+             'is_upper': c['is_upper'],
+             't_min_high': _t_min(c['t_min_high'], k),
+             't_min_low': _t_min(c['t_min_low'], k)}
+            for i, c in enumerate(configs) for k in c['threshold'].keys()]
+    table = pd.DataFrame(rows, columns=['config', 'level', 'threshold',
+                                        'is_upper', 't_min_high',
+                                        't_min_low'])
+
+    x = np.asarray(data.values, dtype=float).reshape(-1, 1)
+    th = table['threshold'].to_numpy(dtype=float)
+    upper = table['is_upper'].to_numpy(dtype=bool)
+    t_min_high = pd.to_timedelta(table['t_min_high']).to_numpy()
+    t_min_low = pd.to_timedelta(table['t_min_low']).to_numpy()
+
+    def evaluate(a):
+        b = min(a + chunk_size, table.shape[0])
+        with np.errstate(invalid='ignore'):
+            is_positive = np.where(upper[a:b], x >= th[a:b], x <= th[a:b])
+        return cal_triggered(
+            index=data.index,
+            is_positive=is_positive,
+            t_min_high=t_min_high[a:b],
+            t_min_low=t_min_low[a:b])
+
+    chunks = range(0, table.shape[0], chunk_size)
+    if n_jobs > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            triggered = list(executor.map(evaluate, chunks))
+    else:
+        triggered = [evaluate(a) for a in chunks]
+    triggered = np.concatenate(triggered, axis=1) if triggered \
+        else np.zeros((x.shape[0], 0), dtype=bool)
+
+    # Each level is cleared where any higher level of the same
+    # configuration is triggered
+    if merged:
+        config = table['config'].to_numpy()
+        for i in np.unique(config):
+            j = np.flatnonzero(config == i)
+            higher = np.logical_or.accumulate(
+                triggered[:, j[::-1]], axis=1)[:, ::-1]
+            triggered[:, j[:-1]] &= ~higher[:, 1:]
+
+    col, first, last = cal_runs(triggered)
+    start = data.index[first]
+    periods = pd.DataFrame({'col': col,
+                            'start': start,
+                            'duration': data.index[last] - start})
+    stats = periods.groupby('col').agg(count=('start', 'size'),
+                                       duration=('duration', 'sum'),
+                                       first_alert=('start', 'min'))
+    stats = stats.reindex(range(table.shape[0]))
+
+    table['count'] = stats['count'].fillna(0).astype(int).to_numpy()
+    table['duration'] = stats['duration'].fillna(
+        pd.Timedelta(0)).to_numpy()
+    table['first_alert'] = stats['first_alert'].to_numpy()
+    return table
+
+
+def _t_min(t_min: dict | None, level) -> datetime.timedelta:
+    """Minimum time of `level`, zero if `t_min` is None."""
+    return datetime.timedelta(0) if t_min is None else t_min[level]
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from ._cal_alert_periods import cal_runs, cal_triggered
+
+
+def _per_column(value, columns: pd.Index, fill=None):
+    """Scalar, or dict/pd.Series keyed by column, as one value per column."""
+    if isinstance(value, (dict, pd.Series)):
+        value = pd.Series(value).reindex(columns)
+        if fill is not None:
+            value = value.fillna(fill)
+        return value.to_numpy()
+    return value
+
+
+def cal_alert_table(data: pd.DataFrame,
+                    threshold: dict,
+                    is_upper: bool | dict | pd.Series,
+                    t_min_high: dict,
+                    t_min_low: dict,
+                    merged: bool = True) -> pd.DataFrame:
+    """
+    Calculate alert periods of all columns of a wide frame at once.
+
+    Equivalent to calling `cal_alert_periods` on each column, but all
+    columns and levels are evaluated with array operations in one pass.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+      Derived parameters with sorted datetime index and one column per
+      system, or a column multi-index such as (system, parameter).
+    threshold : dict
+      Keys are alert levels, while values are corresponding thresholds,
+      either scalar or dict/pd.Series keyed by column. Columns without
+      threshold never raise the level.
+    is_upper : bool, dict or pd.Series
+      If True, data that are greater than or equal to `threshold`
+      are regarded as positive.
+      If False, data that are less than or equal to `threshold`
+      are regarded as positive.
+      Scalar or dict/pd.Series keyed by column, default True.
+    t_min_high : dict
+      Keys are alert levels, while values are corresponding
+      minimum high/positive time to trigger multi-level alerts, either
+      scalar or dict/pd.Series keyed by column.
+    t_min_low : dict
+      Keys are alert levels, while values are
+      minimum low/negative time to clear multi-level alerts, either
+      scalar or dict/pd.Series keyed by column.
+    merged : bool, default True
+      If True, merged alert periods are returned, i.e., a level is cleared
+      where a higher level is triggered, see 'periods' of
+      `cal_alert_periods`. Otherwise unmerged alert periods.
+
+    Returns
+    -------
+    pd.DataFrame with one row per alert period and columns
+      column label(s) : 'column', or the names of the column multi-index
+      'level' : alert level
+      'start', 'end' : first and last time of the alert period
+      'duration' : 'end' - 'start'
+    Rows are sorted by column, level and start.
+    """
+    if not isinstance(data, pd.DataFrame):
+        raise TypeError('Invalid type. Expected DataFrame.')
+
+    alert_levels = list(threshold.keys())
+    triggered = _cal_triggered_levels(data, threshold, is_upper,
+                                      t_min_high, t_min_low)
+    if merged:
+        triggered = _merge_levels(triggered)
+    return _cal_level_table(data, triggered, alert_levels)
+
+
+def cal_alert_frame(data: pd.DataFrame,
+                    threshold: dict,
+                    is_upper: bool | dict | pd.Series,
+                    t_min_high: dict,
+                    t_min_low: dict) -> dict:
+    """
+    Calculate alert periods of all columns of a wide frame at once, in the
+    same structure as `cal_alert_periods` does for a pd.Series.
+
+    Parameters
+    ----------
+    data, threshold, is_upper, t_min_high, t_min_low :
+      See `cal_alert_table`, e.g., per-column thresholds.
+
+    Returns
+    -------
+    dict with keys
+      'levels' : list of alert levels
+      'periods' : {level: pd.DataFrame with column label(s), 'start' and
+          'end'}, merged alert periods
+      'periods_unmerged' : the same for unmerged alert periods
+      'signal' : pd.DataFrame, highest triggered level number of each
+          column at each time point
+      'sampling_rate' : pd.Timedelta
+    """
+    if not isinstance(data, pd.DataFrame):
+        raise TypeError('Invalid type. Expected DataFrame.')
+
+    alert_levels = list(threshold.keys())
+    triggered_unmerged = _cal_triggered_levels(data, threshold, is_upper,
+                                               t_min_high, t_min_low)
+    triggered = _merge_levels(triggered_unmerged)
+
+    def to_periods(table):
+        return {k: table.loc[table['level'] == k]
+                .drop(columns=['level', 'duration'])
+                .reset_index(drop=True)
+                for k in alert_levels}
+
+    level_no = np.arange(1, len(alert_levels) + 1).reshape(-1, 1, 1)
+    signal = pd.DataFrame(np.max(triggered_unmerged * level_no, axis=0,
+                                 initial=0),
+                          index=data.index,
+                          columns=data.columns)
+
+    sampling_rate = data.index.to_series().diff().value_counts().idxmax()
+
+    return {'levels': alert_levels,
+            'periods': to_periods(
+                _cal_level_table(data, triggered, alert_levels)),
+            'periods_unmerged': to_periods(
+                _cal_level_table(data, triggered_unmerged, alert_levels)),
+            'signal': signal,
+            'sampling_rate': sampling_rate}
+
+
+def _cal_triggered_levels(data, threshold, is_upper, t_min_high, t_min_low):
+    """Unmerged triggered state of each level, level x time x column."""
+    alert_levels = list(threshold.keys())
+    x = data.to_numpy(dtype=float)
+    upper = np.asarray(_per_column(is_upper, data.columns, fill=True),
+                       dtype=bool)
+
+    triggered = np.zeros((len(alert_levels),) + x.shape, dtype=bool)
+    with np.errstate(invalid='ignore'):
+        for i, k in enumerate(alert_levels):
+            th = np.asarray(_per_column(threshold[k], data.columns),
+                            dtype=float)
+            is_positive = np.where(upper, x >= th, x <= th)
+            triggered[i] = cal_triggered(
+                index=data.index,
+                is_positive=is_positive,
+                t_min_high=_per_column(t_min_high[k], data.columns),
+                t_min_low=_per_column(t_min_low[k], data.columns))
+    return triggered
+
+
+def _merge_levels(triggered):
+    """Clear each level where any higher level is triggered."""
+    triggered = triggered.copy()
+    if triggered.shape[0] > 1:
+        higher = np.logical_or.accumulate(triggered[::-1], axis=0)[::-1]
+        triggered[:-1] &= ~higher[1:]
+    return triggered
+
+
+def _cal_level_table(data, triggered, alert_levels):
+    """Table of alert periods of triggered state level x time x column."""
+    tables = []
+    for i, k in enumerate(alert_levels):
+        col, first, last = cal_runs(triggered[i])
+        tables.append(pd.DataFrame({'col': col,
+                                    'level_no': i,
+                                    'level': k,
+                                    'start': data.index[first],
+                                    'end': data.index[last]}))
+    table = pd.concat(tables, ignore_index=True)
+    table = table.sort_values(['col', 'level_no', 'start'], kind='stable')
+
+    columns = data.columns[table['col'].to_numpy()]
+    if isinstance(data.columns, pd.MultiIndex):
+        names = [name if name is not None else f'column_{j}'
+                 for j, name in enumerate(data.columns.names)]
+        labels = pd.DataFrame(columns.tolist(), columns=names)
+    else:
+        labels = pd.DataFrame({'column': columns})
+
+    table = pd.concat([labels, table[['level', 'start', 'end']]
+                      .reset_index(drop=True)], axis=1)
+    table['duration'] = table['end'] - table['start']
+    return table
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+_SEGMENT_DTYPES = {'start': 'datetime64[ns]',
+                   'stop': 'datetime64[ns]',
+                   'duration': 'timedelta64[ns]',
+                   'max': 'float64',
+                   'min': 'float64',
+                   'diff': 'float64',
+                   'mean': 'float64',
+                   'peak_ts': 'datetime64[ns]',
+                   'area': 'float64',
+                   'gap': 'timedelta64[ns]'}
+
+
+def cal_segments(data: pd.Series,
+                 is_positive: np.ndarray,
+                 amplitude: pd.Series | np.ndarray = None) -> pd.DataFrame:
+    """
+    Run-length encode a level mask and compute statistics of each segment.
+
+    A segment is a run of positive points that has a negative point on both
+    sides. It spans from the last negative point before the run ('start') to
+    the first negative point after the run ('stop'), both inclusive, i.e.,
+    the same points as ``data[start:stop]``. Runs touching the first or the
+    last point of `data` are incomplete and therefore ignored.
+
+    All statistics are computed for all segments at once with
+    ``np.ufunc.reduceat``, in O(n).
+
+    Parameters
+    ----------
+    data : pd.Series
+        Data with datetime index, sorted.
+    is_positive : array-like of bool
+        Level mask, one value per point of `data`.
+    amplitude : pd.Series or np.ndarray, default None
+        Values integrated over time to get 'area', e.g., data minus
+        baseline. If None, `data` is used.
+
+    Returns
+    -------
+    pd.DataFrame with one row per segment and columns
+        'start', 'stop' : first and last time of the segment
+        'duration' : 'stop' - 'start'
+        'max', 'min', 'diff', 'mean' : max, min, max - min and mean of data
+        'peak_ts' : time of the first maximum
+        'area' : trapezoidal integral of `amplitude` over the segment,
+            in value * seconds
+        'gap' : time from 'stop' to 'start' of the next segment
+    """
+    x = np.asarray(data.values, dtype=float)
+    is_positive = np.asarray(is_positive, dtype=bool)
+
+    change = np.diff(is_positive.astype(np.int8))
+    first = np.flatnonzero(change == 1) + 1
+    last = np.flatnonzero(change == -1)
+    if (len(first) > 0) & (len(last) > 0):
+        if last[0] < first[0]:
+            last = last[1:]
+    m = min(len(first), len(last))
+
+    if m == 0:
+        return pd.DataFrame({k: pd.Series(dtype=v)
+                             for k, v in _SEGMENT_DTYPES.items()})
+
+    # Inclusive bounds of each segment
+    i0 = first[:m] - 1
+    i1 = last[:m] + 1
+    lengths = i1 - i0 + 1
+
+    # Gather all segment points into one flat array; segments may share
+    # their boundary point, so they cannot be reduced in place.
+    offsets = np.zeros(m, dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    idx = np.arange(lengths.sum()) - np.repeat(offsets - i0, lengths)
+    xs = x[idx]
+
+    seg_max = np.maximum.reduceat(xs, offsets)
+    seg_min = np.minimum.reduceat(xs, offsets)
+    seg_mean = np.add.reduceat(xs, offsets) / lengths
+    is_max = xs == np.repeat(seg_max, lengths)
+    peak = np.minimum.reduceat(np.where(is_max, idx, len(x)), offsets)
+    peak = np.minimum(peak, i1)
+
+    if amplitude is None:
+        y = x
+    else:
+        y = np.asarray(amplitude, dtype=float)
+    t = data.index.values.astype('datetime64[ns]').astype(np.int64) / 1e9
+    # Sum the trapezoids of each segment on its own, so that a NaN only
+    # affects the segments it belongs to. The trailing zero keeps the stop
+    # of a segment ending at the last point a valid reduceat index.
+    trapezoid = np.zeros(len(x))
+    trapezoid[:-1] = (y[1:] + y[:-1]) / 2 * np.diff(t)
+    area = np.add.reduceat(trapezoid, np.column_stack([i0, i1]).ravel())[::2]
+
+    index = data.index
+    segments = pd.DataFrame({'start': index[i0].values,
+                             'stop': index[i1].values})
+    segments['duration'] = segments['stop'] - segments['start']
+    segments['max'] = seg_max
+    segments['min'] = seg_min
+    segments['diff'] = seg_max - seg_min
+    segments['mean'] = seg_mean
+    segments['peak_ts'] = index[peak].values
+    segments['area'] = area
+    segments['gap'] = segments['start'].shift(-1) - segments['stop']
+
+    return segments
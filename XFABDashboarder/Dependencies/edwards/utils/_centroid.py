@@ -2,7 +2,8 @@ import numpy as np
 
 
 def centroid(x, f,
-             power: int = 1):
+             power: int = 1,
+             axis: int = -1):
     """
     Calculate weighted average frequency.
 
@@ -13,5 +14,10 @@ def centroid(x, f,
     power : 1 or 2
       1: weighted average frequency with frequency amplitudes as weight
       2: weighted average frequency with power amplitudes as weight
+    axis : int, default -1
+      Axis of `x` along frequency, e.g., 0 for a spectrogram with one
+      column per time segment, in which case one value per column is
+      returned.
     """
-    return np.sum(np.power(x, power) * f) / np.sum(np.power(x, power))
+    w = np.power(np.moveaxis(np.asarray(x), axis, -1), power)
+    return (w @ np.asarray(f)) / np.sum(w, axis=-1)
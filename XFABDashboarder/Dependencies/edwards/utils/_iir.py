@@ -1,8 +1,17 @@
 import copy
 
+import numpy as np
+from scipy import signal
+
 
 def iir(x, alpha):
-    """IIR filter."""
+    """IIR filter, column-wise along the first axis if `x` is 2-D."""
+
+    if isinstance(x, np.ndarray) and (x.dtype.kind == 'f') and (len(x) > 1):
+        # y[i] = (1 - alpha) * y[i - 1] + alpha * x[i] with y[0] = x[0]
+        y, _ = signal.lfilter([alpha], [1, alpha - 1], x, axis=0,
+                              zi=(1 - alpha) * x[:1])
+        return y
 
     y = copy.deepcopy(x)
     if len(x) > 1:
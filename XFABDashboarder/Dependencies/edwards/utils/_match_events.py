@@ -0,0 +1,64 @@
+import datetime
+
+import pandas as pd
+
+
+def match_events(event_1: pd.Series,
+                 event_2: pd.Series,
+                 tolerance: str | datetime.timedelta = None,
+                 resample_window: str | datetime.timedelta = None) \
+        -> pd.DataFrame:
+    """
+    Match each event of `event_1` with the nearest event of `event_2`.
+
+    Events are matched on their sorted timestamps with an as-of join, i.e.,
+    O((n + m) log(n + m)) instead of checking every pair of events. Events
+    with NA value are ignored.
+
+    Parameters
+    ----------
+    event_1 : pd.Series
+        Events to be matched, e.g., spike amplitudes, with datetime index.
+    event_2 : pd.Series
+        Candidate events with datetime index.
+    tolerance : str or datetime.timedelta, default None
+        Maximum time difference (inclusive) between two matched events,
+        i.e., half of the width of the coincidence window. If None, every
+        event is matched with the nearest event of `event_2`.
+    resample_window : str or datetime.timedelta, default None
+        If given, only the largest event of `event_1` within each window
+        is kept, e.g., one spike per '30s'.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per event of `event_1`, indexed by its time, with columns
+        'value_1' : value of the event of `event_1`
+        'time_2' : time of the nearest event of `event_2`, NaT if unmatched
+        'value_2' : value of the nearest event of `event_2`, NaN if unmatched
+        'matched' : whether an event of `event_2` is found within
+            `tolerance`
+    """
+    # merge_asof needs the same datetime resolution on both sides
+    left = pd.DataFrame({'time_1': event_1.index.astype('datetime64[ns]'),
+                         'value_1': event_1.values})
+    left = left.dropna().sort_values('time_1')
+    right = pd.DataFrame({'time_2': event_2.index.astype('datetime64[ns]'),
+                          'value_2': event_2.values})
+    right = right.dropna().sort_values('time_2')
+
+    if resample_window is not None:
+        batch = left['time_1'].dt.floor(pd.to_timedelta(resample_window))
+        largest = left['value_1'].groupby(batch).transform('max')
+        left = left[left['value_1'] == largest]
+        left = left[~batch[left.index].duplicated()]
+
+    matched = pd.merge_asof(left, right,
+                            left_on='time_1',
+                            right_on='time_2',
+                            direction='nearest',
+                            tolerance=None if tolerance is None
+                            else pd.to_timedelta(tolerance))
+    matched['matched'] = matched['time_2'].notna()
+
+    return matched.set_index('time_1').rename_axis(event_1.index.name)
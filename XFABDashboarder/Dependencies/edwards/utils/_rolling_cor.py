@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import scipy.signal
+import scipy.stats
+
+
+def cal_rolling_cor(data: pd.Series,
+                    pattern: pd.Series | np.ndarray | list | dict,
+                    method: str = 'spearman',
+                    chunk_size: int = 2 ** 20) -> pd.Series | pd.DataFrame:
+    """
+    Compute rolling correlation between data and one or several patterns.
+
+    Equivalent to ``data.rolling(len(pattern)).agg(func=cor, y=pattern)``
+    but vectorized over all windows.
+
+    'pearson' computes the sliding dot product with the centred pattern by
+    FFT (MASS-style) and the sliding sums of the data by cumulative sums,
+    i.e., O(n log n) per pattern.
+
+    'spearman' ranks all windows at once, in chunks of `chunk_size` values
+    to bound memory, and correlates the centred ranks with the centred
+    pattern ranks by a single matrix product. Windows are ranked only once
+    for all patterns of the same length.
+
+    Parameters
+    ----------
+    data : pd.Series
+        Data to be searched, regular time series.
+    pattern : array-like or dict of array-like
+        Pattern to be searched within data. If dict, all patterns are
+        searched at once and keys are used as column names of the result.
+    method : {'spearman', 'pearson'}, default 'spearman'
+        Correlation coefficient.
+    chunk_size : int, default 2 ** 20
+        Maximum number of values ranked at once by 'spearman'.
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Correlation labelled at the last point of each window, NA if the
+        window has fewer than ``len(pattern)`` points, contains NA or is
+        constant. pd.DataFrame with one column per pattern if `pattern` is
+        a dict.
+    """
+    if method not in ('spearman', 'pearson'):
+        raise ValueError("method must be 'spearman' or 'pearson'")
+
+    if isinstance(pattern, dict):
+        patterns = {k: np.asarray(v, dtype=float) for k, v in pattern.items()}
+    else:
+        patterns = {data.name: np.asarray(pattern, dtype=float)}
+
+    x = np.asarray(data.values, dtype=float)
+    n = x.shape[0]
+    is_na = np.isnan(x)
+    na_count = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(is_na, out=na_count[1:])
+
+    result = {k: np.full(n, np.nan) for k in patterns.keys()}
+
+    for w in sorted({len(y) for y in patterns.values()}):
+        if (w < 2) | (w > n):
+            continue
+        group = {k: y for k, y in patterns.items() if len(y) == w}
+        # Windows ending at w - 1, ..., n - 1 without NA
+        is_valid = (na_count[w:] - na_count[:-w]) == 0
+
+        if method == 'pearson':
+            cor = _rolling_pearson(np.where(is_na, 0, x), w, group)
+        else:
+            cor = _rolling_spearman(x, w, group, chunk_size)
+
+        for k, c in cor.items():
+            result[k][w - 1:] = np.where(is_valid, c, np.nan)
+
+    if isinstance(pattern, dict):
+        return pd.DataFrame(result, index=data.index)
+    return pd.Series(result[data.name], index=data.index, name=data.name)
+
+
+def _rolling_pearson(x, w, patterns):
+    """Pearson correlation of each window of `x` with each pattern."""
+    x = x - x.mean()
+    s1 = np.zeros(x.shape[0] + 1)
+    s2 = np.zeros(x.shape[0] + 1)
+    np.cumsum(x, out=s1[1:])
+    np.cumsum(x ** 2, out=s2[1:])
+    s1 = s1[w:] - s1[:-w]
+    s2 = s2[w:] - s2[:-w]
+    # Sum of squared deviations of each window; cancellation leaves noise
+    # instead of 0 for constant windows.
+    ssx = s2 - s1 ** 2 / w
+    is_constant = ssx <= 1e-12 * s2
+
+    cor = {}
+    for k, y in patterns.items():
+        yc = y - y.mean()
+        dot = scipy.signal.correlate(x, yc, mode='valid')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            c = dot / np.sqrt(ssx * np.sum(yc ** 2))
+        c[is_constant] = np.nan
+        cor[k] = np.clip(c, -1, 1)
+    return cor
+
+
+def _rolling_spearman(x, w, patterns, chunk_size):
+    """Spearman correlation of each window of `x` with each pattern."""
+    keys = list(patterns.keys())
+    q = np.column_stack([scipy.stats.rankdata(patterns[k]) for k in keys])
+    q = q - (w + 1) / 2
+    q_norm = np.sqrt(np.sum(q ** 2, axis=0))
+
+    windows = np.lib.stride_tricks.sliding_window_view(x, w)
+    m = windows.shape[0]
+    step = max(chunk_size // w, 1)
+    cor = np.full((m, len(keys)), np.nan)
+    for a in range(0, m, step):
+        # Average ranks always have mean (w + 1) / 2
+        r = scipy.stats.rankdata(windows[a:a + step], axis=1) - (w + 1) / 2
+        r_norm = np.sqrt(np.sum(r ** 2, axis=1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cor[a:a + step] = (r @ q) / np.outer(r_norm, q_norm)
+
+    return {k: np.clip(cor[:, i], -1, 1) for i, k in enumerate(keys)}
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+
+def cal_spike_flag(is_positive: np.ndarray,
+                   lag: float | int = 1,
+                   segment: np.ndarray = None) -> np.ndarray:
+    """
+    Reduce each burst of positive points to a single spike.
+
+    A positive point is flagged as a spike only if none of the following
+    `int(lag) - 1` points is positive, i.e., the last positive point of
+    each burst is kept. Equivalent to
+    ``is_positive[i] and sum(is_positive[i + 1:i + int(lag)]) == 0``
+    but computed with a cumulative sum in O(n).
+
+    Parameters
+    ----------
+    is_positive : array-like of bool
+    lag : float or int, default 1
+        Within `lag` points only one spike is counted.
+    segment : array-like of int, default None
+        Non-decreasing segment label of each point. If given, the look-ahead
+        does not cross segment boundaries, i.e., each segment is processed
+        as if it were a separate series.
+
+    Returns
+    -------
+    np.ndarray of bool
+    """
+    is_positive = np.asarray(is_positive, dtype=bool)
+    n = is_positive.shape[0]
+    k = int(lag) - 1
+    if (n == 0) | (k <= 0):
+        return is_positive.copy()
+
+    csum = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(is_positive, out=csum[1:])
+    i = np.arange(n)
+    stop = np.minimum(i + 1 + k, n)
+    if segment is not None:
+        # End (exclusive) of the segment each point belongs to
+        is_new = np.diff(np.asarray(segment)) != 0
+        seg_end = np.append(np.flatnonzero(is_new) + 1, n)
+        seg_no = np.concatenate(([0], np.cumsum(is_new)))
+        stop = np.minimum(stop, seg_end[seg_no])
+    # Number of positive points within (i, i + k]
+    ahead = csum[stop] - csum[i + 1]
+    return is_positive & (ahead == 0)
+
+
+def cal_local_mean_std(data: pd.Series,
+                       window: int | str = 50000,
+                       rolling: bool = False,
+                       min_periods: int = 1,
+                       center: bool = False) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """
+    Compute local mean and (population) standard deviation of each point.
+
+    Parameters
+    ----------
+    data : pd.Series
+        Data with datetime index, NA dropped and sorted.
+    window : int or str, default 50000
+        Window size, either a number of points or a time offset such
+        as '7D'.
+    rolling : bool, default False
+        If False, `data` is split into consecutive non-overlapping blocks
+        of `window` and each point gets the statistics of its block.
+        If True, a rolling window is used.
+    min_periods : int, default 1
+        Only used if `rolling` is True. Minimum number of observations in
+        window required to have a value.
+    center : bool, default False
+        Only used if `rolling` is True. Whether to set the labels at the
+        center of the window.
+
+    Returns
+    -------
+    avg : np.ndarray
+    std : np.ndarray
+    segment : np.ndarray or None
+        Block label of each point, None if `rolling` is True.
+    """
+    x = np.asarray(data.values, dtype=float)
+    n = x.shape[0]
+
+    if rolling:
+        r = data.astype(float).rolling(window=window,
+                                       min_periods=min_periods,
+                                       center=center)
+        return r.mean().values, r.std(ddof=0).values, None
+
+    if n == 0:
+        return x.copy(), x.copy(), np.zeros(0, dtype=np.int64)
+
+    if isinstance(window, str):
+        elapsed = (data.index - data.index[0]).values
+        segment = elapsed // pd.to_timedelta(window).to_timedelta64()
+        segment = segment.astype(np.int64)
+    else:
+        segment = np.arange(n) // int(window)
+
+    # Two passes over the data keep the block std as accurate as np.std
+    size = np.bincount(segment)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg = np.bincount(segment, weights=x) / size
+        std = np.sqrt(np.bincount(segment, weights=(x - avg[segment]) ** 2)
+                      / size)
+
+    return avg[segment], std[segment], segment
+
+
+def cal_spike_count(data: pd.Series,
+                    upper_limit: float | int | np.ndarray = None,
+                    lower_limit: float | int | np.ndarray = None,
+                    lag: float | int = 1,
+                    between: bool = False,
+                    segment: np.ndarray = None) -> pd.Series:
+    """
+    Detect spikes by value limits and compute their running count.
+
+    Parameters
+    ----------
+    data : pd.Series
+        Data with datetime index, NA dropped and sorted.
+    upper_limit : float, int or np.ndarray, default None
+        Upper limit, scalar or one value per data point. None means no
+        upper limit.
+    lower_limit : float, int or np.ndarray, default None
+        Lower limit, scalar or one value per data point. None means no
+        lower limit.
+    lag : float or int, default 1
+        Within `lag` points only one spike is counted.
+    between : bool, default False
+        If False, data that are greater than `upper_limit` or less than
+        `lower_limit` are regarded as positive.
+        If True, data that are greater than `lower_limit` and less than
+        `upper_limit` are regarded as positive.
+    segment : array-like of int, default None
+        Non-decreasing segment label of each point, see `cal_spike_flag`.
+
+    Returns
+    -------
+    pd.Series
+        Running count (float64) of spikes, indexed by the time of each
+        spike.
+    """
+    x = np.asarray(data.values, dtype=float)
+
+    if between:
+        is_positive = np.ones(x.shape[0], dtype=bool)
+        if upper_limit is not None:
+            is_positive &= x < upper_limit
+        if lower_limit is not None:
+            is_positive &= x > lower_limit
+    else:
+        is_positive = np.zeros(x.shape[0], dtype=bool)
+        if upper_limit is not None:
+            is_positive |= x > upper_limit
+        if lower_limit is not None:
+            is_positive |= x < lower_limit
+
+    is_spike = cal_spike_flag(is_positive, lag=lag, segment=segment)
+    count = np.cumsum(is_spike)[is_spike].astype('float64')
+
+    return pd.Series(count, index=data.index[is_spike])
@@ -0,0 +1,276 @@
+import copy
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+import types
+import uuid
+
+import numpy as np
+import pandas as pd
+
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=None)
+def library_version() -> str:
+    """
+    Hash of the source code of `edwards.dp` and `edwards.utils`, so that
+    cached results are invalidated whenever the processing code changes.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    h = hashlib.sha1()
+    for module in ['dp', 'utils']:
+        for file in sorted(glob.glob(os.path.join(root, module, '*.py'))):
+            with open(file, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def _array_bytes(x) -> bytes:
+    """Bytes identifying the values of an array-like or pd.Index."""
+    a = np.asarray(x)
+    if a.dtype.kind in 'biufcmM':
+        return str((getattr(x, 'dtype', a.dtype), a.shape)).encode() \
+            + np.ascontiguousarray(a).tobytes()
+    return pd.util.hash_pandas_object(pd.Series(a), index=False) \
+        .values.tobytes()
+
+
+def _code(code: types.CodeType) -> list:
+    """Bytecode, constants and names of `code`, of nested code as well."""
+    return [code.co_code.hex(),
+            [_code(c) if isinstance(c, types.CodeType) else c
+             for c in code.co_consts],
+            code.co_names]
+
+
+def _json_default(x):
+    """
+    JSON representation of objects that are not JSON-serializable.
+    Arrays are represented by the hash of their values rather than by
+    `str`, which abbreviates large arrays. Functions are represented by
+    their name, code, defaults and closure values, other callables by
+    their name rather than by `str`, which includes their memory address.
+    """
+    if isinstance(x, (np.ndarray, pd.Index)):
+        return {'array': hashlib.sha1(_array_bytes(x)).hexdigest()}
+    if isinstance(x, (pd.Series, pd.DataFrame)):
+        return {'data': hash_data(x)}
+    if isinstance(x, functools.partial):
+        return {'partial': [x.func, x.args, x.keywords]}
+    if isinstance(x, types.FunctionType):
+        closure = []
+        for cell in x.__closure__ or ():
+            try:
+                value = cell.cell_contents
+            except ValueError:
+                value = None
+            # A recursive function refers to itself
+            closure.append(None if value is x else value)
+        return {'function': [f'{x.__module__}.{x.__qualname__}',
+                             _code(x.__code__), x.__defaults__,
+                             x.__kwdefaults__, closure]}
+    if callable(x):
+        name = getattr(x, '__qualname__', type(x).__qualname__)
+        return f'{getattr(x, "__module__", None)}.{name}'
+    return str(x)
+
+
+def hash_data(x) -> str:
+    """
+    Hash pd.Series/pd.DataFrame (values and index), np.ndarray or any
+    JSON-serializable object. Arrays and functions in objects are hashed
+    by value and by code respectively.
+    """
+    h = hashlib.sha1()
+    if isinstance(x, pd.Series):
+        h.update(_array_bytes(x.index))
+        h.update(_array_bytes(x.values))
+        h.update(str(x.name).encode())
+    elif isinstance(x, pd.DataFrame):
+        h.update(_array_bytes(x.index))
+        h.update(str(list(x.columns)).encode())
+        for i in range(x.shape[1]):
+            h.update(_array_bytes(x.iloc[:, i].values))
+    elif isinstance(x, np.ndarray):
+        h.update(_array_bytes(x))
+    else:
+        h.update(json.dumps(x, sort_keys=True, default=_json_default).encode())
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed on-disk cache of processing stage results.
+
+    Results are pickled to `path`, one file per key. The least recently
+    used files are evicted once the cache exceeds `max_size` bytes.
+
+    Parameters
+    ----------
+    path : str
+        Cache directory, created if it does not exist.
+    max_size : int, default 2 ** 30
+        Maximum total size of cached files in bytes.
+
+    Examples
+    --------
+    >>> cache = StageCache('.edwards_cache')
+    >>> key = cache.key(data, 'resample', {'rule': '1min'})
+    >>> x = cache.get_or_compute(key, lambda: data.resample('1min').mean())
+    """
+
+    def __init__(self, path: str, max_size: int = 2 ** 30):
+        self.path = path
+        self.max_size = max_size
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Key of a stage, from e.g. its input data, name and parameters,
+        as well as the library version.
+        """
+        return hash_data([library_version()] + [hash_data(x) for x in parts])
+
+    @staticmethod
+    def data_key(x) -> str:
+        """Key of input data `x`."""
+        return StageCache.key(x)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f'{key}.pkl')
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._file(key))
+
+    def get(self, key: str, default=None):
+        """
+        Return cached result of `key`, or `default` if not cached. Files
+        that cannot be unpickled, e.g., truncated or written by another
+        version of a dependency, are removed and `default` is returned.
+        """
+        file = self._file(key)
+        try:
+            x = pd.read_pickle(file)
+        except FileNotFoundError:
+            return default
+        except (EOFError, pickle.UnpicklingError, AttributeError,
+                ImportError, ValueError):
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+            return default
+        # Mark as recently used
+        os.utime(file)
+        return x
+
+    def put(self, key: str, x) -> None:
+        """Cache `x` as the result of `key` and evict if needed."""
+        file = self._file(key)
+        pd.to_pickle(x, file + '.tmp')
+        os.replace(file + '.tmp', file)
+        self.evict()
+
+    def get_or_compute(self, key: str, func):
+        """Return cached result of `key`, or compute it by `func()`."""
+        x = self.get(key, _MISSING)
+        if x is _MISSING:
+            x = func()
+            self.put(key, x)
+        return x
+
+    def evict(self) -> None:
+        """Remove least recently used files until within `max_size`."""
+        files = glob.glob(os.path.join(self.path, '*.pkl'))
+        stats = [(os.path.getmtime(f), os.path.getsize(f), f) for f in files]
+        size = sum(s[1] for s in stats)
+        for _, s, f in sorted(stats):
+            if size <= self.max_size:
+                break
+            os.remove(f)
+            size -= s
+
+    def clear(self) -> None:
+        """Remove all cached files."""
+        for f in glob.glob(os.path.join(self.path, '*.pkl')):
+            os.remove(f)
+
+
+class MemoryStageCache:
+    """
+    In-memory cache of processing stage results, shared between threads.
+
+    Same interface as `StageCache`. Results are copied in and out, so that
+    consumers processing a result in place do not affect each other.
+    Concurrent requests of the same key compute it only once.
+
+    Attributes
+    ----------
+    hits : int
+        Number of results returned from cache by `get_or_compute()`.
+    misses : int
+        Number of results computed by `get_or_compute()`.
+    """
+
+    key = staticmethod(StageCache.key)
+
+    def __init__(self):
+        self._results = {}
+        self._locks = {}
+        self._data_keys = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def data_key(self, x) -> str:
+        """
+        Key of input data `x` by identity rather than by content, which
+        saves hashing as results are only shared within this cache.
+        """
+        with self._lock:
+            # Keep a reference to `x`, so that its id is not reused
+            item = self._data_keys.get(id(x))
+            if (item is None) or (item[0] is not x):
+                item = (x, uuid.uuid4().hex)
+                self._data_keys[id(x)] = item
+        return item[1]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._results
+
+    def get(self, key: str, default=None):
+        """Return cached result of `key`, or `default` if not cached."""
+        x = self._results.get(key, _MISSING)
+        return default if x is _MISSING else copy.deepcopy(x)
+
+    def put(self, key: str, x) -> None:
+        """Cache `x` as the result of `key`."""
+        self._results[key] = copy.deepcopy(x)
+
+    def get_or_compute(self, key: str, func):
+        """Return cached result of `key`, or compute it by `func()`."""
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            x = self._results.get(key, _MISSING)
+            is_hit = x is not _MISSING
+            if not is_hit:
+                x = func()
+                self.put(key, x)
+        with self._lock:
+            if is_hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return copy.deepcopy(x) if is_hit else x
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        self._results.clear()
+        self._data_keys.clear()
@@ -0,0 +1,104 @@
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+
+def profile_step(func, trace_memory: bool = True):
+    """
+    Run `func()` and measure its resource usage.
+
+    Parameters
+    ----------
+    func : callable
+        Function without arguments.
+    trace_memory : bool, default True
+        If True, peak memory is traced by `tracemalloc`, which slows down
+        allocation-heavy steps. Otherwise 'peak_memory' is None.
+
+    Returns
+    -------
+    result
+        Return value of `func()`.
+    stats : dict
+        'start' : datetime, start time
+        'wall_time' : float, elapsed wall-clock time in seconds
+        'cpu_time' : float, CPU time of the process in seconds
+        'peak_memory' : int or None, peak traced memory in bytes above
+            the traced memory at start
+        'allocated_blocks' : int, net change in the number of memory blocks
+            allocated by the interpreter
+    """
+    started_tracing = False
+    if trace_memory:
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            started_tracing = True
+        memory_start = tracemalloc.get_traced_memory()[0]
+
+    start = datetime.now()
+    blocks = sys.getallocatedblocks()
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        blocks = sys.getallocatedblocks() - blocks
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - memory_start
+            if started_tracing:
+                tracemalloc.stop()
+
+    return result, {'start': start,
+                    'wall_time': wall,
+                    'cpu_time': cpu,
+                    'peak_memory': peak,
+                    'allocated_blocks': blocks}
+
+
+class JsonLinesSink:
+    """
+    Append records, e.g., of `profile_step`, to a JSON lines file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __call__(self, record: dict) -> None:
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+
+class LoggingSink:
+    """
+    Emit records, e.g., of `profile_step`, to a logger.
+
+    Parameters
+    ----------
+    logger : logging.Logger or str, default 'edwards'
+        Logger, or its name.
+    level : int, default logging.INFO
+        Logging level of the records.
+    """
+
+    def __init__(self, logger: logging.Logger | str = 'edwards',
+                 level: int = logging.INFO):
+        if isinstance(logger, str):
+            logger = logging.getLogger(logger)
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, record: dict) -> None:
+        self.logger.log(self.level, json.dumps(record, default=str))
@@ -0,0 +1,100 @@
+import numpy as np
+from scipy import signal
+
+from ._centroid import centroid
+
+_BOUNDARY_PAD = {'zeros': {'mode': 'constant'},
+                 'constant': {'mode': 'edge'},
+                 'even': {'mode': 'reflect'},
+                 'odd': {'mode': 'reflect', 'reflect_type': 'odd'}}
+
+
+def cal_stft_features(x: np.ndarray,
+                      fs: float = 1.0,
+                      window: str = 'hann',
+                      nperseg: int = 256,
+                      noverlap: int = None,
+                      nfft: int = None,
+                      boundary: str = None,
+                      padded: bool = True,
+                      chunk_size: int = 1024,
+                      return_stft: bool = False) -> dict:
+    """
+    Compute STFT magnitude features chunk by chunk.
+
+    The signal is split into overlapping chunks of `chunk_size` segments,
+    so that only the magnitude of one chunk is held in memory at a time.
+    Segments are the same as those of ``scipy.signal.stft`` with
+    ``detrend=False``, hence so are the features. Features are extracted
+    for all segments of a chunk at once.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        1-D signal.
+    fs, window, nperseg, noverlap, nfft, boundary, padded :
+        See 'scipy.signal.stft' for more info.
+    chunk_size : int, default 1024
+        Number of segments transformed at once.
+    return_stft : bool, default False
+        If True, the full magnitude spectrogram is also returned.
+
+    Returns
+    -------
+    dict with keys
+        'f' : np.ndarray, sample frequencies
+        't' : np.ndarray, segment times
+        'fmax' : np.ndarray, frequency with maximum amplitude
+        'fwa1' : np.ndarray, weighted average frequency with frequency
+            amplitudes as weights
+        'fwa2' : np.ndarray, weighted average frequency with power
+            amplitudes as weights
+        'zxx' : np.ndarray or None, magnitude spectrogram, frequency by
+            segment, None if `return_stft` is False
+    """
+    x = np.asarray(x, dtype=float)
+    nperseg = int(nperseg)
+    noverlap = nperseg // 2 if noverlap is None else int(noverlap)
+    nfft = nperseg if nfft is None else int(nfft)
+    step = nperseg - noverlap
+
+    # Extend and pad the whole signal the way scipy.signal.stft does, so
+    # that each chunk can be transformed without boundary or padding.
+    if boundary is not None:
+        x = np.pad(x, nperseg // 2, **_BOUNDARY_PAD[boundary])
+    if padded:
+        n_add = (-(x.shape[0] - nperseg) % step) % nperseg
+        x = np.concatenate([x, np.zeros(n_add)])
+    n_seg = max((x.shape[0] - nperseg) // step + 1, 0)
+
+    f = np.fft.rfftfreq(nfft, d=1 / fs)
+    t = np.arange(n_seg) * step / fs
+    if boundary is None:
+        t = t + nperseg / 2 / fs
+
+    features = {'fmax': np.empty(n_seg),
+                'fwa1': np.empty(n_seg),
+                'fwa2': np.empty(n_seg)}
+    zxx_all = np.empty((f.shape[0], n_seg)) if return_stft else None
+
+    for a in range(0, n_seg, chunk_size):
+        b = min(a + chunk_size, n_seg)
+        _, _, zxx = signal.stft(x[a * step:(b - 1) * step + nperseg],
+                                fs=fs,
+                                window=window,
+                                nperseg=nperseg,
+                                noverlap=noverlap,
+                                nfft=nfft,
+                                detrend=False,
+                                return_onesided=True,
+                                boundary=None,
+                                padded=False,
+                                axis=-1)
+        zxx = np.abs(zxx)
+        features['fmax'][a:b] = f[np.argmax(zxx, axis=0)]
+        features['fwa1'][a:b] = centroid(zxx, f, power=1, axis=0)
+        features['fwa2'][a:b] = centroid(zxx, f, power=2, axis=0)
+        if return_stft:
+            zxx_all[:, a:b] = zxx
+
+    return {'f': f, 't': t, **features, 'zxx': zxx_all}
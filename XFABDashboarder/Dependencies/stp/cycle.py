@@ -5,55 +5,107 @@ import matplotlib.pyplot as plt
 
 
 def fft_cycle(T, days=30, rolling=None, title=None, plot=True):
-    # Period cycle
-    T = T.resample('1S').pad().dropna()
+    """
+    Period of the dominant cycle of a signal in each bin of days
+
+    The signal is resampled every second and split into bins of `days` from the first timestamp. Bins of the same
+    length, i.e., all but the last one, are stacked into a 2-D array and transformed by one real FFT. The dominant period
+    of a bin is of the peak of the power spectrum between the frequencies 1e-5 and 0.5 Hz, i.e., periods between
+    2 seconds and about 28 hours.
+
+    :param T: panda array with datetime index
+    :param days: number of days in a bin
+    :param rolling: int, if given, number of seconds of rolling mean of the signal before FFT
+    :param title: str, title of the plot
+    :param plot: bool, if true, plot the power spectrum of each bin
+    :return: panda array of period in seconds, with the end of bin as index, NaN if there is no peak in the range
+    """
+    T = T.resample('1s').ffill().dropna()
     if rolling is not None:
         T = T.rolling(rolling).mean().dropna()
     start_ts = T.index[0]
     end_ts = T.index[-1]
-    length_ts = end_ts - start_ts
     size_bin = timedelta(days=days)
-    n_bin = length_ts // size_bin
-    reminder_bin = length_ts % size_bin
+    n_bin = (end_ts - start_ts) // size_bin
+    # The last bin ends at the last timestamp, which is not in any bin
+    starts = [start_ts + b * size_bin for b in range(n_bin + 1)]
+    ends = starts[1:n_bin + 1] + [end_ts]
+    first = T.index.searchsorted(starts, 'left')
+    stop = T.index.searchsorted(ends, 'left')
+
+    length = stop - first
+
+    x = T.to_numpy(dtype=float)
+    period = np.full(n_bin + 1, np.nan)
+    spectra = {}
+    for n in np.unique(length[length > 0]):
+        bins = np.flatnonzero(length == n)
+        X = np.stack([x[first[b]:stop[b]] for b in bins])
+        freq, PSD = power_spectrum(X)
+        period[bins] = dominant_period(freq, PSD)
+        if plot:
+            spectra.update((b, (freq, p)) for b, p in zip(bins, PSD))
     if plot:
         plt.figure()
-    T_period = {}
-    # spilt the data
-    for b in range(n_bin + 1):
-        if b != n_bin:
-            start_index = start_ts + b * size_bin
-            end_index = start_index + size_bin
-        else:
-            start_index = start_ts + n_bin * size_bin
-            end_index = start_index + reminder_bin
-
-        T_bin = T[(pd.to_datetime(T.index) >= start_index) & (pd.to_datetime(T.index) < end_index)]
-        n = len(T_bin)
-        # fft of T_bin
-        fhat = np.fft.fft(T_bin, n)
-        PSD = fhat * np.conj(fhat) / n
-        # freqence range
-        freq = (1 / n) * np.arange(n)
-        # index number
-        L = np.arange(1, np.floor(n / 2), dtype='int')
-        # peak index exclude freq<1e-5 or >0.5 which period>28hours or <2seconds
-        idx_start = (np.abs(freq - 1e-5)).argmin()
-        idx_end = (np.abs(freq - 0.5)).argmin()
-        max_L = np.where(PSD.real == max(PSD.real[idx_start:idx_end]))
-        max_L = [i for i in max_L[0] if idx_start < i < idx_end]
-        # period in seconds where the top frequence
-        period = 1 / freq[max_L]
-        T_period[end_index] = period[0]
-        if plot:
-            plt.plot(freq[L], PSD[L].real, label='{}'.format(start_index)[:10] + ' to ' + '{}'.format(end_index)[:10],
-                     alpha=0.7)
-            plt.xlabel('Frequency')
-            plt.ylabel('Amplitude')
-            if title is not None:
-                plt.title(title + ' FFT')
-            plt.grid()
-            plt.legend()
-    return T_period
+        for b in sorted(spectra):
+            plot_spectrum(*spectra[b], '{}'.format(starts[b])[:10] + ' to ' + '{}'.format(ends[b])[:10], title)
+    # The last bin is empty if the data span a whole number of bins
+    return pd.Series(period, index=pd.DatetimeIndex(ends))[length > 0]
+
+
+def power_spectrum(X):
+    """
+    Power spectrum of each row of X by one real FFT
+
+    :param X: 2-D array, one signal sampled every second per row
+    :return: frequencies in Hz, and 2-D array of power spectral density of each row at the frequencies
+    """
+    n = X.shape[1]
+    fhat = np.fft.rfft(X, n, axis=1)
+    PSD = (fhat.real ** 2 + fhat.imag ** 2) / n
+    freq = (1 / n) * np.arange(PSD.shape[1])
+    return freq, PSD
+
+
+def dominant_period(freq, PSD, low=1e-5):
+    """
+    Period of the peak of each power spectrum between frequency `low` and the highest frequency, both excluded
+
+    :param freq: frequencies of power_spectrum
+    :param PSD: 2-D array of power_spectrum
+    :param low: lowest frequency in Hz
+    :return: array of period in seconds of each spectrum, NaN if the power at `low` is higher than at the peak or the
+    range is empty
+    """
+    # Frequencies closest to `low` and 0.5 Hz, the highest frequency of signals sampled every second
+    idx_start = np.abs(freq - low).argmin()
+    idx_end = len(freq) - 1
+    period = np.full(len(PSD), np.nan)
+    if idx_end - idx_start < 2:
+        return period
+    i = idx_start + 1 + PSD[:, idx_start + 1:idx_end].argmax(axis=1)
+    is_peak = PSD[np.arange(len(PSD)), i] >= PSD[:, idx_start]
+    period[is_peak] = 1 / freq[i[is_peak]]
+    return period
+
+
+def plot_spectrum(freq, PSD, label=None, title=None):
+    """
+    Plot a power spectrum of power_spectrum, without the zero and highest frequencies
+
+    :param freq: frequencies of power_spectrum
+    :param PSD: power spectral density of one signal
+    :param label: str, label of the line
+    :param title: str, title of the plot
+    """
+    L = np.arange(1, len(freq) - 1)
+    plt.plot(freq[L], PSD[L], label=label, alpha=0.7)
+    plt.xlabel('Frequency')
+    plt.ylabel('Amplitude')
+    if title is not None:
+        plt.title(title + ' FFT')
+    plt.grid()
+    plt.legend()
 
 
 def acc_interval(acc_motor_speed, high, low=500, plot=True):
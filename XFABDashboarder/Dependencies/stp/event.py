@@ -5,8 +5,11 @@ Created on Mon Jun 14 09:58:34 2021
 @author: Dennis Hou
 """
 
+import numpy as np
 import pandas as pd
 
+EVENT_COLUMNS = ['event', 'start', 'end', 'magnitude']
+
 
 class STPEvent(object):
 
@@ -18,29 +21,15 @@ class STPEvent(object):
         Parameters
         ----------
         motor_speed is panda array, with timestamp index
+        speed, if given, an event lasts from the first 0 rpm to the first speed >= `speed` afterwards
         Returns
         -------
         start_event
         each event is in form of tuple, 1st element is the timestamp at 0 rpm, 2nd is the timestamp of start
         return None if there is no event
         """
-        start_event = []
-        begin = None
-        for i in range(len(motor_speed.index)):
-            if speed:
-                if not begin and motor_speed[motor_speed.index[i]] == 0:
-                    begin = motor_speed.index[i]
-                if begin and motor_speed[motor_speed.index[i]] >= speed:
-                    end = motor_speed.index[i]
-                    start_event.append((begin, end))
-                    begin = None
-            else:
-                if motor_speed[motor_speed.index[i]] == 0 and motor_speed[motor_speed.index[i+1]] != 0:
-                    start_event.append((motor_speed.index[i], motor_speed.index[i + 1]))
-        if len(start_event) == 0:
-            start_event = None
-
-        return start_event
+        name = 'motor start' if not speed else 'motor start to speed'
+        return _to_tuples(STPEvent.event_table(motor_speed=motor_speed, speed=speed, events=[name]))
 
     @staticmethod
     def motor_stop_event(motor_speed, speed=None):
@@ -50,29 +39,15 @@ class STPEvent(object):
         Parameters
         ----------
         motor_speed is panda array, with timestamp index
+        speed, if given, an event lasts from the first speed >= `speed` to the first 0 rpm afterwards
         Returns
         -------
         stop_event
         each event is in form of tuple, 1st element is the timestamp of stop, 2nd is the timestamp of start
         return None if there is no event
         """
-        stop_event = []
-        begin = None
-        for i in range(len(motor_speed.index)-1):
-            if speed:
-                if not begin and motor_speed[motor_speed.index[i]] >= speed:
-                    begin = motor_speed.index[i]
-                if begin and motor_speed[motor_speed.index[i]] == 0:
-                    end = motor_speed.index[i]
-                    stop_event.append((begin, end))
-                    begin = None
-            else:
-                if motor_speed[motor_speed.index[i]] != 0 and motor_speed[motor_speed.index[i+1]] == 0:
-                    stop_event.append((motor_speed.index[i], motor_speed.index[i + 1]))
-        if len(stop_event) == 0:
-            stop_event = None
-
-        return stop_event
+        name = 'motor stop' if not speed else 'motor stop from speed'
+        return _to_tuples(STPEvent.event_table(motor_speed=motor_speed, speed=speed, events=[name]))
 
     @staticmethod
     def pump_swap_event(pump_hour):
@@ -87,11 +62,89 @@ class STPEvent(object):
         each event is in form of tuple, 1st element is the timestamp before swap, 2nd is the timestamp after swap
         return None if there is no event
         """
-        swap_event = []
-        for i in range(len(pump_hour.index)-1):
-            if pump_hour[pump_hour.index[i+1]] < pump_hour[pump_hour.index[i]]:
-                swap_event.append((pump_hour.index[i], pump_hour.index[i + 1]))
-        if len(swap_event) == 0:
-            swap_event = None
-
-        return swap_event
+        return _to_tuples(STPEvent.event_table(pump_hour=pump_hour))
+
+    @staticmethod
+    def event_table(motor_speed=None, pump_hour=None, speed=None, events=None, status=None):
+        """
+        Capture pump swap, motor start, motor stop events and status segments at once
+
+        Events are found by comparing each sample to the next one, without looping over samples.
+
+        Parameters
+        ----------
+        motor_speed is panda array, with timestamp index, for 'motor start' (0 rpm followed by non-zero) and
+        'motor stop' (non-zero followed by 0 rpm) events
+        pump_hour is panda array, with timestamp index, for 'pump swap' events (decrease of pump hours)
+        speed, if given, also capture 'motor start to speed' (first 0 rpm to the first speed >= `speed` afterwards)
+        and 'motor stop from speed' (first speed >= `speed` to the first 0 rpm afterwards) events
+        events is list of event names to capture, default all available
+        status is panda array of Equipment Status, with timestamp index, for 'status' segments, each from the first
+        sample of a status to the first sample of the next status (NaT for the last segment)
+        Returns
+        -------
+        DataFrame of events sorted by start, with columns 'event', 'start', 'end' and 'magnitude', which is the change
+        of the signal from start to end, or the status of 'status' segments
+        """
+        tables = []
+        if motor_speed is not None:
+            x = motor_speed.to_numpy(dtype=float)
+            is_zero = x == 0
+            candidates = {'motor start': lambda: _pairs(is_zero[:-1] & ~is_zero[1:]),
+                          'motor stop': lambda: _pairs(~is_zero[:-1] & is_zero[1:])}
+            if speed:
+                is_high = x >= speed
+                candidates['motor start to speed'] = lambda: _alternate(is_zero, is_high)
+                candidates['motor stop from speed'] = lambda: _alternate(is_high, is_zero)
+            for name, find in candidates.items():
+                if events is None or name in events:
+                    tables.append(_table(name, motor_speed.index, x, *find()))
+        if pump_hour is not None and (events is None or 'pump swap' in events):
+            x = pump_hour.to_numpy(dtype=float)
+            tables.append(_table('pump swap', pump_hour.index, x, *_pairs(x[1:] < x[:-1])))
+        if status is not None and (events is None or 'status' in events):
+            status = status.dropna()
+            x = status.to_numpy(dtype=float)
+            begin = np.flatnonzero(np.r_[True, x[1:] != x[:-1]])[:len(x)]
+            start = pd.Series(status.index[begin])
+            tables.append(pd.DataFrame({'event': 'status', 'start': start, 'end': start.shift(-1),
+                                        'magnitude': x[begin]}, columns=EVENT_COLUMNS))
+
+        if not tables:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        table = pd.concat(tables, ignore_index=True)
+        return table.sort_values('start', kind='stable', ignore_index=True)
+
+
+def _pairs(is_event):
+    """Positions of events between sample i and i + 1, where is_event[i] is True"""
+    begin = np.flatnonzero(is_event)
+    return begin, begin + 1
+
+
+def _alternate(is_begin, is_end):
+    """
+    Positions of events starting at the first sample of is_begin, and ending at the first sample of is_end afterwards.
+    The next event starts at the first sample of is_begin after the end.
+    """
+    # Only samples which can start or end an event matter, and an event starts when a sample of is_begin follows a
+    # sample of is_end (or none), and ends when a sample of is_end follows a sample of is_begin
+    marker = np.flatnonzero(is_begin | is_end)
+    kind = is_begin[marker]
+    previous = np.r_[False, kind[:-1]]
+    begin = marker[kind & np.r_[True, ~kind[:-1]]]
+    end = marker[~kind & previous]
+    return begin[:len(end)], end
+
+
+def _table(name, index, x, begin, end):
+    return pd.DataFrame({'event': name,
+                         'start': index[begin],
+                         'end': index[end],
+                         'magnitude': x[end] - x[begin]}, columns=EVENT_COLUMNS)
+
+
+def _to_tuples(table):
+    if len(table) == 0:
+        return None
+    return list(zip(table['start'], table['end']))
@@ -0,0 +1,193 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from stp.event import STPEvent, EVENT_COLUMNS
+
+
+class EventIndex(object):
+    """
+
+    Persisted index of pump swap, motor start/stop events and status segments of one STP
+
+    The index is stored alongside the system data in `folder`, as <system_name>.events.parquet, together with the
+    state of the last processed samples in <system_name>.events.json. Each update only scans samples after the last
+    processed one, so it can be called with the full data after every sync. Queries are by binary search on event
+    start, so consumers get segment boundaries without rescanning the history.
+
+    """
+    # Columns of the data from which events are captured
+    MOTOR_SPEED = 'Motor Speed'
+    PUMP_HOUR = 'Pump Hour Counter'
+    STATUS = 'Equipment Status'
+
+    def __init__(self, folder, system_name, speed=None):
+        """
+        Load the index of a system if it exists, otherwise start an empty index
+
+        :param folder: path of folder where the index is stored, e.g., the folder of the system data
+        :param system_name: str, pump name
+        :param speed: if given, also index 'motor start to speed' and 'motor stop from speed' events. If it differs
+        from the speed of the stored index, the index is emptied and rebuilt by the next update.
+        """
+        self.path = os.path.join(folder, system_name + '.events')
+        self.speed = speed
+        self.events = pd.DataFrame(columns=EVENT_COLUMNS)
+        self.state = {'speed': speed, 'last': {}, 'pending': {}}
+        self._sorted = {}
+
+        if os.path.exists(self.path + '.parquet') and os.path.exists(self.path + '.json'):
+            with open(self.path + '.json') as f:
+                state = json.load(f)
+            if state['speed'] == speed:
+                self.events = pd.read_parquet(self.path + '.parquet')
+                self.state = state
+
+    def save(self):
+        """
+        Write the index and its state to the folder
+
+        :return: self
+        """
+        self.events.to_parquet(self.path + '.parquet', compression=None)
+        with open(self.path + '.json', 'w') as f:
+            json.dump(self.state, f)
+        return self
+
+    def update(self, data):
+        """
+        Add events from samples after the last processed sample of each signal
+
+        Events ending with a new sample but starting before, e.g., a motor start from a stored 0 rpm sample, or the end
+        of the last status segment, are completed from the stored state.
+
+        :param data: dataframe of STP measurements with datetime index, with any of columns 'Motor Speed',
+        'Pump Hour Counter' and 'Equipment Status'
+        :return: self
+        """
+        tables = []
+        if self.MOTOR_SPEED in data.columns:
+            motor_speed = self._new_samples(data[self.MOTOR_SPEED], self.MOTOR_SPEED)
+            tables.append(STPEvent.event_table(motor_speed=self._prepend(motor_speed, self.MOTOR_SPEED),
+                                               events=['motor start', 'motor stop']))
+            if self.speed:
+                for name, is_begin, is_end in [('motor start to speed', lambda x: x == 0, lambda x: x >= self.speed),
+                                               ('motor stop from speed', lambda x: x >= self.speed, lambda x: x == 0)]:
+                    x = self._prepend(motor_speed, name, 'pending')
+                    tables.append(STPEvent.event_table(motor_speed=x, speed=self.speed, events=[name]))
+                    self._set_pending(name, x, is_begin, is_end)
+            self._set_last(self.MOTOR_SPEED, motor_speed)
+
+        if self.PUMP_HOUR in data.columns:
+            pump_hour = self._new_samples(data[self.PUMP_HOUR], self.PUMP_HOUR)
+            tables.append(STPEvent.event_table(pump_hour=self._prepend(pump_hour, self.PUMP_HOUR)))
+            self._set_last(self.PUMP_HOUR, pump_hour)
+
+        if self.STATUS in data.columns:
+            status = self._new_samples(data[self.STATUS], self.STATUS)
+            table = STPEvent.event_table(status=self._prepend(status, self.STATUS))
+            if self.STATUS in self.state['last'] and len(table) > 0:
+                # The first segment continues the last stored segment, which ends where the next segment starts
+                is_last = (self.events['event'] == 'status') & self.events['end'].isna()
+                self.events.loc[is_last, 'end'] = table['end'].iloc[0]
+                table = table.iloc[1:]
+            tables.append(table)
+            self._set_last(self.STATUS, status)
+
+        tables = [t for t in tables if len(t) > 0]
+        if tables:
+            events = pd.concat([self.events] + tables, ignore_index=True) if len(self.events) > 0 \
+                else pd.concat(tables, ignore_index=True)
+            self.events = events.sort_values('start', kind='stable', ignore_index=True)
+        self._sorted = {}
+        return self
+
+    def query(self, start=None, end=None, events=None):
+        """
+        Events starting between start and end
+
+        :param start: start datetime, None for no lower limit
+        :param end: end datetime, None for no upper limit
+        :param events: list of event names, default all
+        :return: DataFrame of events sorted by start, with columns 'event', 'start', 'end' and 'magnitude'
+        """
+        if events is None:
+            events = list(self.events['event'].unique())
+        tables = []
+        for name in events:
+            table = self._by_event(name)
+            starts = table['start'].values
+            i = 0 if start is None else starts.searchsorted(_datetime64(start), 'left')
+            j = len(starts) if end is None else starts.searchsorted(_datetime64(end), 'right')
+            tables.append(table.iloc[i:j])
+        if not tables:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        return pd.concat(tables).sort_values('start', kind='stable', ignore_index=True)
+
+    def segments(self, status, start=None, end=None):
+        """
+        Segments of one status overlapping the period between start and end
+
+        :param status: Equipment Status value, e.g., 3 for Acceleration
+        :param start: start datetime, None for no lower limit
+        :param end: end datetime, None for no upper limit
+        :return: DataFrame of segments sorted by start, with columns 'start' and 'end', where end is the first sample
+        of the next status (NaT if the segment is not ended yet)
+        """
+        key = ('status', status)
+        if key not in self._sorted:
+            table = self._by_event('status')
+            self._sorted[key] = table[table['magnitude'] == status][['start', 'end']].reset_index(drop=True)
+        table = self._sorted[key]
+        i, j = 0, len(table)
+        if start is not None:
+            # Segments do not overlap, so their ends are sorted as well, with NaT of the last segment sorted last
+            i = table['end'].values.searchsorted(_datetime64(start), 'right')
+        if end is not None:
+            j = table['start'].values.searchsorted(_datetime64(end), 'right')
+        return table.iloc[i:j]
+
+    def _by_event(self, name):
+        """Events of one kind sorted by start"""
+        if name not in self._sorted:
+            self._sorted[name] = self.events[self.events['event'] == name].reset_index(drop=True)
+        return self._sorted[name]
+
+    def _new_samples(self, x, name):
+        """Samples of x after the last processed sample of signal `name`"""
+        if not x.index.is_monotonic_increasing:
+            x = x.sort_index()
+        if name in self.state['last']:
+            x = x.iloc[x.index.searchsorted(pd.Timestamp(self.state['last'][name][0]), 'right'):]
+        return x.dropna()
+
+    def _prepend(self, x, name, kind='last'):
+        """Prepend the stored (time, value) sample of `name` to x"""
+        if name not in self.state[kind]:
+            return x
+        t, value = self.state[kind][name]
+        return pd.concat([pd.Series([value], index=pd.DatetimeIndex([pd.Timestamp(t)], tz=x.index.tz)), x])
+
+    def _set_last(self, name, x):
+        if len(x) > 0:
+            self.state['last'][name] = [x.index[-1].isoformat(), float(x.iloc[-1])]
+
+    def _set_pending(self, name, x, is_begin, is_end):
+        """Store the start of the event `name` which has started in x but not ended yet"""
+        values = x.to_numpy(dtype=float)
+        marker = np.flatnonzero(is_begin(values) | is_end(values))
+        if len(marker) == 0:
+            return
+        kind = is_begin(values[marker])
+        if kind[-1]:
+            # First sample of the last run of samples which can start the event
+            i = marker[np.flatnonzero(~kind)[-1] + 1] if (~kind).any() else marker[0]
+            self.state['pending'][name] = [x.index[i].isoformat(), float(values[i])]
+        else:
+            self.state['pending'].pop(name, None)
+
+
+def _datetime64(t):
+    return pd.Timestamp(t).to_datetime64()
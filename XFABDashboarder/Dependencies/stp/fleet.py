@@ -0,0 +1,94 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from stp.stp_indicator_dash import StpDash
+
+SUMMARY_COLUMNS = ['tool_name', 'status', 'rows', 'seconds', 'error']
+
+
+def load_config(config_file):
+    """
+    Thresholds of each pump from the indicator config, e.g., xfab_stp_indicator_config.csv
+
+    :param config_file: path of csv file with columns 'tool_name', 'current_peak' and 'vibB_peak'
+    :return: dictionary with tool name as key, and dictionary of StpDash keyword arguments as value
+    """
+    config = pd.read_csv(config_file)
+    return {row.tool_name: dict(current_pk_t=float(row.current_peak), vb_pk_t=float(row.vibB_peak))
+            for row in config.itertuples(index=False)}
+
+
+def generate_dash(file_path, dash_folder, config=None, plot=True, cache=None, **kwargs):
+    """
+    Generate the indicators and the dash of one pump from its parquet file
+
+    Failures are reported in the summary rather than raised, so that one pump does not stop the others.
+
+    :param file_path: path of parquet file of the pump data, named by the tool name
+    :param dash_folder: path of folder to save the indicators and the dash
+    :param config: dictionary of thresholds of each pump from load_config, pumps not in it use the default thresholds
+    :param plot: bool, if false, only save the indicators
+    :param cache: path of folder of edwards.utils.StageCache, to reuse indicators computed before
+    :param kwargs: other keyword arguments of StpDash, e.g., normal_only
+    :return: dictionary of the run summary of the pump
+    """
+    tool_name = os.path.basename(file_path).replace('.parquet', '')
+    summary = dict(tool_name=tool_name, status='ok', rows=0, seconds=0.0, error='')
+    start = time.perf_counter()
+    try:
+        data = pd.read_parquet(file_path).sort_index()
+        summary['rows'] = len(data)
+        params = dict(kwargs, **(config or {}).get(tool_name, {}))
+        StpDash(data, tool_name, des_path=dash_folder, **params).save_plot(plot=plot, cache=cache)
+    except Exception as e:
+        summary['status'] = 'failed'
+        summary['error'] = '{}: {}'.format(type(e).__name__, e)
+    finally:
+        plt.close('all')
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def generate_dashes(file_paths, dash_folder, config=None, n_jobs=None, plot=True, cache=None, **kwargs):
+    """
+    Generate the indicators and the dashes of a fleet of pumps in parallel
+
+    Each pump is processed in a worker process, which reads its own parquet file. The largest files are started first
+    to balance the load among the workers. The run summary is also saved as run_summary.csv in the dash folder.
+
+    :param file_paths: list of paths of parquet files, one per pump
+    :param dash_folder: path of folder to save the indicators and the dashes
+    :param config: dictionary of thresholds of each pump from load_config
+    :param n_jobs: number of worker processes, default the number of cores, 1 to run in this process
+    :param plot: bool, if false, only save the indicators
+    :param cache: path of folder of edwards.utils.StageCache, to reuse indicators computed before
+    :param kwargs: other keyword arguments of StpDash, e.g., normal_only
+    :return: DataFrame of the run summary with one row per pump, with columns 'tool_name', 'status', 'rows',
+    'seconds' and 'error'
+    """
+    n_jobs = n_jobs or os.cpu_count()
+    order = sorted(range(len(file_paths)), key=lambda i: -os.path.getsize(file_paths[i]))
+    results = [None] * len(file_paths)
+    if n_jobs == 1:
+        for i in order:
+            results[i] = generate_dash(file_paths[i], dash_folder, config, plot, cache, **kwargs)
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, max(len(file_paths), 1))) as executor:
+            futures = {i: executor.submit(generate_dash, file_paths[i], dash_folder, config, plot, cache, **kwargs)
+                       for i in order}
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    # The worker process died, e.g., out of memory
+                    tool_name = os.path.basename(file_paths[i]).replace('.parquet', '')
+                    results[i] = dict(tool_name=tool_name, status='failed', rows=0, seconds=float('nan'),
+                                      error='{}: {}'.format(type(e).__name__, e))
+
+    summary = pd.DataFrame(results, columns=SUMMARY_COLUMNS)
+    summary.to_csv(os.path.join(dash_folder, 'run_summary.csv'), index=False)
+    return summary
@@ -4,10 +4,11 @@ Created on Wed Jun  9 15:29:58 2021
 
 @author: Dennis Hou
 """
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+from edwards.utils import cal_spike_count, cal_local_mean_std
+
 
 class PeakDetect(object):
     def __init__(self, data, system_name, parameter_name):
@@ -46,23 +47,11 @@ class PeakDetect(object):
         avg = np.mean(data)
         spike_upper_limit = avg + spike_t * std
         spike_lower_limit = avg - spike_t * std
-        pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-        spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[i+1:i+lag]) == 0) else 0 for i in range(len(pre_spike))]
-        spike_count = [sum(spike[:i+1]) if spike[i]==1 else np.nan for i in range(len(spike))]
-        spike = pd.Series(spike, data.index)
-        spike_count = pd.Series(spike_count, data.index)
-        spike_count.dropna(inplace=True)
+        spike_count = cal_spike_count(data, upper_limit=spike_upper_limit, lower_limit=spike_lower_limit, lag=lag)
 
         peak_upper_limit = avg + peak_t * std
         peak_lower_limit = avg - peak_t * std
-        pre_peak = [1 if (i > peak_upper_limit) else 0 for i in data]
-        peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[i+1:i+lag]) == 0) else 0 for i in range(len(pre_peak))]
-        peak_count = [sum(peak[:i+1]) if peak[i]==1 else np.nan for i in range(len(peak))]
-        peak = pd.Series(peak, data.index)
-        peak_count = pd.Series(peak_count, data.index)
-        peak_count.dropna(inplace=True)
-
-
+        peak_count = cal_spike_count(data, upper_limit=peak_upper_limit, lag=lag)
 
         if plot == True:
             plt.figure(figsize=(10,6))
@@ -98,7 +87,8 @@ class PeakDetect(object):
         return spike_count, peak_count
 
     @staticmethod
-    def spike_detect_local(data_all, spike_t, peak_t, lag, parameter_name, window_size=50000, plot=True):
+    def spike_detect_local(data_all, spike_t, peak_t, lag, parameter_name, window_size=50000, plot=True,
+                           rolling=False):
         """
         To detect spike and count the number within a local window
 
@@ -107,76 +97,21 @@ class PeakDetect(object):
         :param peak_t: std threshold for peak
         :param lag: within lag it count 1 spike
         :param parameter_name: for plot label
-        :param window_size: size of window
+        :param window_size: size of window, number of data points (int) or time offset (str, e.g. '7D')
+        :param rolling: if True use rolling mean/std, else mean/std of consecutive blocks of window_size
         :return spike_count: number of spike
         """
         data_all = data_all.dropna().sort_index()
-        
-        length = len(data_all)
-        if length > window_size:
-            N = length // window_size
-            R = length % window_size
-            
-            spike_all = pd.Series([0], [data_all.index[0]])
-            peak_all = pd.Series([0], [data_all.index[0]])
-            
-            for i in range(N+1):
-                if i != N:
-                    data = data_all[window_size*i : window_size*(i+1)]
-                else:
-                    data = data_all[window_size*i : window_size*(i+1)+R]
-                std = np.std(data)
-                avg = np.mean(data)
-                spike_upper_limit = avg + spike_t * std
-                spike_lower_limit = avg - spike_t * std
-                pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-                spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[i+1:i+lag]) == 0) else 0 for i in range(len(pre_spike))]
-                spike = pd.Series(spike, data.index)
-                spike_all = spike_all.append(spike)
-                
-                peak_upper_limit = avg + peak_t * std
-                peak_lower_limit = avg - peak_t * std
-                pre_peak = [1 if (i > peak_upper_limit) else 0 for i in data]
-                peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[i+1:i+lag]) == 0) else 0 for i in range(len(pre_peak))]
-                peak = pd.Series(peak, data.index)
-                peak_all = peak_all.append(peak)
-                
-            
-                
-            spike_count = [sum(spike_all[:i+1]) if spike_all[i]==1 else np.nan for i in range(1,len(spike_all))]
-            
-            spike_count = pd.Series(spike_count, data_all.index)
-            spike_count.dropna(inplace=True)
-            
-            peak_count = [sum(peak_all[:i+1]) if peak_all[i]==1 else np.nan for i in range(1, len(peak_all))]
-            
-            peak_count = pd.Series(peak_count, data_all.index)
-            peak_count.dropna(inplace=True)
 
-        else:
-            data = data_all
-        
-            std = np.std(data)
-            avg = np.mean(data)
-            spike_upper_limit = avg + spike_t * std
-            spike_lower_limit = avg - spike_t * std
-            pre_spike = [1 if (i > spike_upper_limit or i < spike_lower_limit) else 0 for i in data]
-            spike = [1 if (pre_spike[i] == 1 and sum(pre_spike[i+1:i+lag]) == 0) else 0 for i in range(len(pre_spike))]
-            spike_count = [sum(spike[:i+1]) if spike[i]==1 else np.nan for i in range(len(spike))]
-            spike = pd.Series(spike, data.index)
-            spike_count = pd.Series(spike_count, data.index)
-            spike_count.dropna(inplace=True)
-    
-            peak_upper_limit = avg + peak_t * std
-            peak_lower_limit = avg - peak_t * std
-            pre_peak = [1 if (i > peak_upper_limit) else 0 for i in data]
-            peak = [1 if (pre_peak[i] == 1 and sum(pre_peak[i+1:i+lag]) == 0) else 0 for i in range(len(pre_peak))]
-            peak_count = [sum(peak[:i+1]) if peak[i]==1 else np.nan for i in range(len(peak))]
-            peak = pd.Series(peak, data.index)
-            peak_count = pd.Series(peak_count, data.index)
-            peak_count.dropna(inplace=True)
-        
-        
+        avg, std, segment = cal_local_mean_std(data_all, window=window_size, rolling=rolling)
+        spike_upper_limit = avg + spike_t * std
+        spike_lower_limit = avg - spike_t * std
+        spike_count = cal_spike_count(data_all, upper_limit=spike_upper_limit, lower_limit=spike_lower_limit,
+                                      lag=lag, segment=segment)
+
+        peak_upper_limit = avg + peak_t * std
+        peak_count = cal_spike_count(data_all, upper_limit=peak_upper_limit, lag=lag, segment=segment)
+
         if plot == True:
             plt.figure(figsize=(10,6))
             ax1 = plt.subplot(211)
@@ -190,11 +125,11 @@ class PeakDetect(object):
                 try:
                     plt.plot(spike_count.index, [data_all[i] for i in spike_count.index], 'x', label='Spike')
                 except ValueError:
-                    plt.plot(spike_count.index, np.zeros(len(spike_count))+spike_upper_limit, 'x', label='Spike')
+                    plt.plot(spike_count.index, np.zeros(len(spike_count))+spike_upper_limit[-1], 'x', label='Spike')
             try:
                 plt.plot(peak_count.index, [data_all[i] for i in peak_count.index], 'x', label='Peak')
             except ValueError:
-                plt.plot(peak_count.index, np.zeros(len(peak_count))+peak_upper_limit, 'x', label='Peak')
+                plt.plot(peak_count.index, np.zeros(len(peak_count))+peak_upper_limit[-1], 'x', label='Peak')
             plt.xticks(rotation=30)
             plt.legend()
     
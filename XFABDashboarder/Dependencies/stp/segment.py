@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+SEGMENT_COLUMNS = ['state', 'start', 'end', 'first', 'stop']
+
+
+class StateSegments(object):
+    """
+
+    Operating states of time sorted data as a table of intervals
+
+    Each row of the table is one segment of a state, from timestamp 'start' to 'end' (inclusive), which are the rows
+    data.iloc['first':'stop'] of the data. Rows of one state are selected by these positional slices instead of
+    boolean masks over the full data.
+
+    """
+    def __init__(self, index, table):
+        """
+        :param index: sorted datetime index of the data
+        :param table: DataFrame of segments sorted by start, with columns 'state', 'start', 'end', 'first' and 'stop'
+        """
+        self.index = index
+        self.table = table
+
+    @classmethod
+    def from_status(cls, status):
+        """
+        Segments of runs of the same status, where missing status is forward filled
+
+        :param status: panda array of Equipment Status with sorted datetime index, rows before the first status are
+        not in any segment
+        :return: StateSegments
+        """
+        x = status.ffill().to_numpy(dtype=float)
+        is_same = (x[1:] == x[:-1]) | (np.isnan(x[1:]) & np.isnan(x[:-1]))
+        first = np.flatnonzero(np.r_[True, ~is_same])[:len(x)]
+        stop = np.r_[first[1:], len(x)].astype(int)
+        is_valid = ~np.isnan(x[first])
+        return cls._from_positions(status.index, x[first][is_valid], first[is_valid], stop[is_valid])
+
+    @classmethod
+    def from_intervals(cls, index, segments, start=None):
+        """
+        Segments from time intervals of known state, e.g., status segments of stp.event_index.EventIndex
+
+        :param index: sorted datetime index of the data
+        :param segments: DataFrame with columns 'state', 'start' and 'end', where end is the first timestamp after the
+        segment (NaT for open end)
+        :param start: rows before start are not in any segment, e.g., the first status sample in the data, default the
+        start of the data
+        :return: StateSegments
+        """
+        if len(index) == 0:
+            segments = segments.iloc[:0]
+        elif start is None:
+            start = index[0]
+        first = np.maximum(index.searchsorted(segments['start'], 'left'), index.searchsorted(start, 'left'))
+        end = segments['end'].to_numpy()
+        stop = np.where(pd.isna(end), len(index), index.searchsorted(end, 'left'))
+        is_valid = stop > first
+        return cls._from_positions(index, segments['state'].to_numpy()[is_valid], first[is_valid], stop[is_valid])
+
+    @classmethod
+    def excluding(cls, index, intervals, state):
+        """
+        One state for all rows except those in any of the time intervals
+
+        :param index: sorted datetime index of the data
+        :param intervals: list of (start, end) tuples, both inclusive, which may overlap
+        :param state: state of the remaining rows
+        :return: StateSegments
+        """
+        depth = np.zeros(len(index) + 1, dtype=int)
+        if intervals:
+            start, end = zip(*intervals)
+            np.add.at(depth, index.searchsorted(pd.DatetimeIndex(start), 'left'), 1)
+            np.add.at(depth, index.searchsorted(pd.DatetimeIndex(end), 'right'), -1)
+        is_kept = np.cumsum(depth)[:-1] == 0
+        change = np.flatnonzero(np.diff(np.r_[False, is_kept, False].astype(int)))
+        first, stop = change[::2], change[1::2]
+        return cls._from_positions(index, np.full(len(first), state), first, stop)
+
+    @classmethod
+    def _from_positions(cls, index, state, first, stop):
+        table = pd.DataFrame({'state': state,
+                              'start': index[first],
+                              'end': index[stop - 1],
+                              'first': first,
+                              'stop': stop}, columns=SEGMENT_COLUMNS)
+        return cls(index, table)
+
+    def slices(self, state):
+        """
+        :param state: state of the segments
+        :return: list of positional slices of rows of the state
+        """
+        table = self.table[self.table['state'] == state]
+        return [slice(i, j) for i, j in zip(table['first'], table['stop'])]
+
+    def positions(self, state):
+        """
+        :param state: state of the segments
+        :return: array of positions of rows of the state
+        """
+        table = self.table[self.table['state'] == state]
+        first, stop = table['first'].to_numpy(), table['stop'].to_numpy()
+        length = stop - first
+        return np.repeat(first - np.r_[0, np.cumsum(length)[:-1]], length) + np.arange(length.sum())
+
+    def select(self, data, state):
+        """
+        Rows of data of one state, a slice without copy if they are one segment
+
+        :param data: dataframe with the same index as the segments
+        :param state: state of the segments
+        :return: dataframe
+        """
+        slices = self.slices(state)
+        if len(slices) == 1:
+            return data.iloc[slices[0]]
+        return data.iloc[self.positions(state)]
@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
-from stp import event, trend, peak, cycle, vib_score
+from stp import event, trend, peak, cycle, vib_score, segment
 import math
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 pd.set_option('mode.chained_assignment', None)
 
 
@@ -13,7 +14,7 @@ class StpIndicators(object):
     to infer contamination status of STP pumps
 
     """
-    def __init__(self, data, after_swap=True):
+    def __init__(self, data, after_swap=True, event_index=None):
         """
         Load the dataframe which extracted using odbc.py and transformed to column as feature format using
         STP_Data_Extract.py
@@ -22,10 +23,16 @@ class StpIndicators(object):
         feature.
         :param after_swap: if after_swap is Ture, will slice the data to the newly swapped pump. Otherwise will include
         all data.
+        :param event_index: stp.event_index.EventIndex of the pump, if given, pump swap events and status segments are
+        taken from it instead of being captured from the data.
         """
         self.data = data
         self.column_names = data.columns
         self.data = self.data.sort_index()
+        # Operating states as intervals of rows, data of each state is only selected when used
+        self.segments = None
+        self._state_data = {}
+        self._peak_count = {}
 
         # Event detect
         equip_status_indata = 'Equipment Status' in self.column_names and self.data['Equipment Status'] is not None
@@ -34,35 +41,72 @@ class StpIndicators(object):
 
         if pump_hour_indata:
             self.pump_swap_events = None
-            pump_hour = self.data['Pump Hour Counter'].dropna()
-            self.pump_swap_events = event.STPEvent.pump_swap_event(pump_hour)
+            if event_index is not None:
+                # The index may cover a longer history than data, of which only the swaps within data are used
+                swaps = event_index.query(self.data.index[0], self.data.index[-1], ['pump swap'])
+                self.pump_swap_events = _event_tuples(swaps[swaps['end'] <= self.data.index[-1]], 'pump swap')
+            else:
+                pump_hour = self.data['Pump Hour Counter'].dropna()
+                self.pump_swap_events = event.STPEvent.pump_swap_event(pump_hour)
 
             # if after_swap=True, will slice the data to the new swapped pump
             # else data will include all historical record.
             if self.pump_swap_events and after_swap:
-                self.data = self.data[self.data.index >= self.pump_swap_events[-1][1]]
-        # if there is equipment status, use it to extract data for "Normal", "Acceleration", and "Deceleration" status
+                self.data = self.data.iloc[self.data.index.searchsorted(self.pump_swap_events[-1][1], 'left'):]
+        # if there is equipment status, use it to segment data into "Normal", "Acceleration", and "Deceleration" status
         if equip_status_indata:
             self.data['Equipment Status_NF'] = self.data['Equipment Status']
-            self.data['Equipment Status'].fillna(method='ffill', inplace=True)
-            self.data_acc = self.data[self.data['Equipment Status'] == 3]
-            self.data_ops = self.data[self.data['Equipment Status'] == 4]
-            self.data_dec = self.data[self.data['Equipment Status'] == 5]
+            self.data['Equipment Status'] = self.data['Equipment Status'].ffill()
+            if event_index is not None:
+                # Segments overlapping data, including the one in progress at the start of data
+                status = event_index.query(end=self.data.index[-1], events=['status'])
+                status = status[status['end'].isna() | (status['end'] > self.data.index[0])]
+                status = status.rename(columns={'magnitude': 'state'})
+                self.segments = segment.StateSegments.from_intervals(
+                    self.data.index, status, self.data['Equipment Status'].first_valid_index())
+            else:
+                self.segments = segment.StateSegments.from_status(self.data['Equipment Status'])
         # if there is not equipment status but motor speed, use it to extract data for "Normal" status
         elif motor_speed_indata:
             motor_speed = self.data['Motor Speed'].dropna()
             vc = self.data['Motor Speed'].value_counts()
             speed = math.floor(vc.index[0] / 100) * 100
-            self.motor_start_events = event.STPEvent.motor_start_event(motor_speed)
-            self.motor_start_events_ops_speed = event.STPEvent.motor_start_event(motor_speed, speed)
-            self.motor_stop_events = event.STPEvent.motor_stop_event(motor_speed)
-            self.motor_stop_events_ops_speed = event.STPEvent.motor_stop_event(motor_speed, speed)
+            self.motor_events = event.STPEvent.event_table(motor_speed=motor_speed, speed=speed)
+            self.motor_start_events = _event_tuples(self.motor_events, 'motor start')
+            self.motor_start_events_ops_speed = _event_tuples(self.motor_events, 'motor start to speed')
+            self.motor_stop_events = _event_tuples(self.motor_events, 'motor stop')
+            self.motor_stop_events_ops_speed = _event_tuples(self.motor_events, 'motor stop from speed')
+
+            # "Normal" status is all data except from reaching the speed to stopping
+            self.segments = segment.StateSegments.excluding(self.data.index, self.motor_stop_events_ops_speed or [], 4)
+
+    @property
+    def data_acc(self):
+        """
+        Data during Acceleration
+        """
+        return self._select_state(3)
 
-            for i in range(len(self.motor_stop_events_ops_speed)):
-                self.data_ops = self.data.drop(index=self.data.index[(self.data.index >=
-                                                                      self.motor_stop_events_ops_speed[i][0]) &
-                                                                     (self.data.index <=
-                                                                      self.motor_stop_events_ops_speed[i][1])])
+    @property
+    def data_ops(self):
+        """
+        Data during Normal status
+        """
+        return self._select_state(4)
+
+    @property
+    def data_dec(self):
+        """
+        Data during Deceleration
+        """
+        return self._select_state(5)
+
+    def _select_state(self, state):
+        if self.segments is None:
+            raise AttributeError('No Equipment Status or Motor Speed to segment the data')
+        if state not in self._state_data:
+            self._state_data[state] = self.segments.select(self.data, state)
+        return self._state_data[state]
 
     def acc_period(self, speed_upper_t=0.96, speed_lower_t=0.37):
         """
@@ -126,14 +170,14 @@ class StpIndicators(object):
             spike_count, peak_count = None, None
         return spike_count, peak_count
 
-    def motor_current_trend(self, method='ma', bin_size=100, lambda_value=50, batch_size=100):
+    def motor_current_trend(self, method='ma', bin_size=100, lambda_value=50, batch_size=None):
         """
         To filter the motor current data and get a smoothed trend
 
         :param method: str, for 'ma':moving average, 'l1':L1 filter, 'l2':L2 Hodrick-Prescott (H-P) filter
         :param bin_size: int, for bin size of moving average
         :param lambda_value: int, for regulation coefficient of L1 and L2 filter
-        :param batch_size: int, for batch process using L1 or L2
+        :param batch_size: int, for batch process using L1 or L2, None to filter the full series at once
         :return: motor current tend Series with datetime index
         """
         try:
@@ -163,16 +207,39 @@ class StpIndicators(object):
         Calculate the period of TMS temperature control cycle in seconds
 
         :param days: int, number of days in a bin for FFT and then cycle period
-        :return: TMS temperature cycle period in seconds with datetime index
+        :return: dictionary with the end of bin as key, TMS temperature cycle period in seconds as value, bins without
+        a cycle in range are left out, None if there is none
         """
         try:
             assert self.data_ops['TMS Temperature'] is not None
             tms = pd.Series(self.data_ops['TMS Temperature']).dropna()
-            tms_period = cycle.fft_cycle(tms, days=days, plot=False)
+            tms_period = cycle.fft_cycle(tms, days=days, plot=False).dropna().to_dict() or None
         except KeyError:
             tms_period = None
         return tms_period
 
+    def peak_count(self, parameter_name, peak_t, lag, normal=False, local=True):
+        """
+        Count the peaks of a parameter. Each set of arguments is computed once and shared, e.g., by rotor_contact and
+        StpDash.plot_indicators
+
+        :param parameter_name: 'Motor Current', 'Vibration B' or 'Vibration H', vibration data above 0.1 are left out
+        :param peak_t: std threshold for peak
+        :param lag: only detect 1 peak in lag data points
+        :param normal: if normal = True, then only use data in Normal status, otherwise use all data
+        :param local: if local = True, use mean and std of local windows, otherwise of all data
+        :return: running count of peaks with datetime index
+        """
+        key = (parameter_name, peak_t, lag, normal, local)
+        if key not in self._peak_count:
+            data = self.data_ops if normal else self.data
+            x = data[parameter_name]
+            if parameter_name.startswith('Vibration'):
+                x = x[x < 0.1]
+            detect = peak.PeakDetect.spike_detect_local if local else peak.PeakDetect.spike_detect
+            _, self._peak_count[key] = detect(x.dropna(), 99, peak_t, lag, parameter_name, plot=False)
+        return self._peak_count[key]
+
     def rotor_contact(self, normal=True, current_pk_t=4, vb_pk_t=2, current_lag=10, v_lag=3):
         """
         Count the number of possible rotor blade contacts
@@ -191,90 +258,124 @@ class StpIndicators(object):
             assert 'Motor Current' in self.column_names
             assert 'Vibration B' in self.column_names
             assert 'Vibration H' in self.column_names
-            if normal:
-                motor_current = pd.Series(self.data_ops['Motor Current']).dropna()
-                vib_b = pd.Series(self.data_ops[self.data_ops['Vibration B'] < 0.1]['Vibration B']).dropna()
-                vib_h = pd.Series(self.data_ops[self.data_ops['Vibration H'] < 0.1]['Vibration H']).dropna()
-            else:
-                motor_current = pd.Series(self.data['Motor Current']).dropna()
-                vib_b = pd.Series(self.data[self.data['Vibration B'] < 0.1]['Vibration B']).dropna()
-                vib_h = pd.Series(self.data[self.data['Vibration H'] < 0.1]['Vibration H']).dropna()
+            data = self.data_ops if normal else self.data
+            is_vib_b = (data['Vibration B'] < 0.1).to_numpy()
+            assert is_vib_b.any()
 
             # Motor Current Peak and Spike counter
-            _, current_pk_count = peak.PeakDetect.spike_detect_local(motor_current, 99, current_pk_t, current_lag, 'Motor Current', plot=False)
-            _, vb_pk_count = peak.PeakDetect.spike_detect_local(vib_b, 99, vb_pk_t, v_lag, 'Vibration B', plot=False)
-
-            large_contact = {}
-            small_contact = {}
-            l_n, s_n = 0, 0
-            small_contact[vib_b.index[0]] = s_n
-            large_contact[vib_b.index[0]] = l_n
-            if len(vb_pk_count) != 0:
-                for i in range(len(vb_pk_count)):
-                    idx = vb_pk_count.index[i]
-                    value = vb_pk_count.values[i]
-                    if value > 0 and len(current_pk_count) != 0:
-                        large = any(abs(current_pk_count.index - vb_pk_count.index[i]) < timedelta(minutes=1))
-                        if large:
-                            l_n += 1
-                            large_contact[vb_pk_count.index[i]] = l_n
-                        else:
-                            s_n += 1
-                            small_contact[vb_pk_count.index[i]] = s_n
-                    elif value > 0 and len(current_pk_count) == 0:
-                        small_contact[vb_pk_count.index[i]] = s_n + 1
+            current_pk_count = self.peak_count('Motor Current', current_pk_t, current_lag, normal)
+            vb_pk_count = self.peak_count('Vibration B', vb_pk_t, v_lag, normal)
+
+            # Nearest current peak of each vibration peak
+            vb_pk_time = vb_pk_count.index
+            if len(current_pk_count) != 0 and len(vb_pk_time) != 0:
+                nearest = pd.merge_asof(pd.DataFrame({'time': vb_pk_time}),
+                                        pd.DataFrame({'time': current_pk_count.index,
+                                                      'current_time': current_pk_count.index}),
+                                        on='time', direction='nearest')
+                is_large = (abs(nearest['current_time'] - nearest['time']) < timedelta(minutes=1)).to_numpy()
+            else:
+                is_large = np.zeros(len(vb_pk_time), dtype=bool)
+
+            start = data.index[is_vib_b.argmax()]
+            large_contact = {start: 0}
+            small_contact = {start: 0}
+            large_contact.update(zip(vb_pk_time[is_large], range(1, is_large.sum() + 1)))
+            small_contact.update(zip(vb_pk_time[~is_large], range(1, (~is_large).sum() + 1)))
         except AssertionError:
             large_contact, small_contact = None, None
         return large_contact, small_contact
 
-    def vib_anomaly_score(self):
+    def vib_anomaly_score(self, bin_size=timedelta(days=15), previous=None):
         """
         Calculate the anomaly score of Vibration B and Vibration H during Normal status
 
+        :param bin_size: timedelta, length of time bin of one score
+        :param previous: dictionary of scores computed before from the same start of data, to only compute new bins
         :return: dictionary with key as datetime, value as score
         """
         try:
             assert self.data_ops[['Vibration H', 'Vibration B']] is not None
-            vib_s = vib_score.score(self.data_ops, plot=False)
+            vib_s = vib_score.score(self.data_ops, plot=False, bin_size=bin_size, previous=previous)
         except KeyError:
             vib_s = None
         return vib_s
 
-    def start_anomaly_score(self, start_period=400):
+    def start_anomaly_score(self, start_period=400, n_jobs=1):
         """
         Calculate the anomaly score between Motor Speed, Motor Current and Vibration H during Acceleration
 
+        Windows of all Acceleration events are sampled at 1 second at once into an (events x time x channel) array.
+        Events of the same window length are trend filtered in one batch and scored together, and batches of different
+        lengths are processed in parallel if n_jobs > 1.
+
         :param start_period: the period in seconds which parts of the Acceleration events
+        :param n_jobs: number of threads scoring batches of events in parallel
         :return: dictionary of anomaly scores with datetime as key and score as value
         """
+        channels = ['Motor Speed', 'Motor Current', 'Vibration H']
         try:
-            assert self.data[['Motor Speed', 'Motor Current', 'Vibration H']] is not None
-            data = self.data.fillna(method='ffill')
-            start_score = {}
-            start_period = start_period
-            for i in range(len(self.data_acc.index)):
-                if i != 0 and self.data_acc.index[i] < self.data_acc.index[i - 1] + timedelta(seconds=start_period):
-                    continue
-                else:
-                    data_bin = data[(self.data_acc.index[i] <= data.index) &
-                                    (data.index <= (self.data_acc.index[i] + timedelta(seconds=start_period)))][
-                        ['Motor Speed', 'Motor Current', 'Vibration H']]
-                    data_bin = data_bin.resample('1S').pad().fillna(method='bfill')
-
-                    data_bin['Motor Speed Trend'] = trend.trend_filter(data_bin['Motor Speed'], batch_size=None)
-                    data_bin['Motor Current Trend'] = trend.trend_filter(data_bin['Motor Current'], batch_size=None)
-                    data_bin['Vibration H Trend'] = trend.trend_filter(data_bin['Vibration H'], batch_size=None)
-
-                    data_trend = data_bin[['Motor Speed Trend', 'Motor Current Trend', 'Vibration H Trend']]
-                    R = data_trend.corr()
-                    r = min(R.values.reshape(1, 9)[R.values.reshape(1, 9) != 1.0])
-                    anomaly_score = (1 - r) / 2
-                    anomaly_score = 0
-                    acc_index = self.data_acc.index[i]
-                    start_score[acc_index] = anomaly_score
-        except KeyError:
-            start_score = None
-        return start_score
+            data = self.data[channels].ffill()
+            acc_time = self.data_acc.index
+        except (KeyError, AttributeError):
+            return None
+        if len(acc_time) == 0:
+            return {}
+
+        # An event starts at the first Acceleration sample, or one more than start_period after the previous sample
+        period = np.timedelta64(start_period, 's')
+        acc_value = acc_time.values
+        starts = acc_time[np.r_[True, np.diff(acc_value) >= period]]
+
+        # Window of each event is data[first:last + 1], sampled at 1 second from floor(first) to floor(last)
+        index = data.index.values
+        values = data.to_numpy(dtype=float)
+        first = index.searchsorted(starts.values, 'left')
+        last = index.searchsorted(starts.values + period, 'right') - 1
+        t_first = index[first].astype('datetime64[s]')
+        length = (index[last].astype('datetime64[s]') - t_first).astype(int) + 1
+
+        def score(n):
+            # Events of window length n, as an (events x time x channel) array
+            k = np.flatnonzero(length == n)
+            labels = (t_first[k, None] + np.arange(n).astype('timedelta64[s]')).astype(index.dtype)
+            pos = index.searchsorted(labels, 'right') - 1
+            x = values[np.maximum(pos, 0)]
+            x[pos < first[k, None]] = np.nan
+            x = _bfill(x)
+
+            x = trend.trend_filter_batch(x.transpose(0, 2, 1).reshape(-1, n), 50).reshape(len(k), len(channels), n)
+            scale = np.sqrt(np.sum(x ** 2, axis=2))
+            x = x - x.mean(axis=2, keepdims=True)
+            xy = x @ x.transpose(0, 2, 1)
+            d = np.sqrt(np.diagonal(xy, axis1=1, axis2=2))
+            # Trends constant up to rounding errors have no correlation, as with DataFrame.corr
+            d[d <= 1e-10 * scale] = np.nan
+            with np.errstate(divide='ignore', invalid='ignore'):
+                R = xy / d[:, :, None] / d[:, None, :]
+            # Correlation of a trend with itself is exactly 1, as with DataFrame.corr
+            i = np.arange(len(channels))
+            R[:, i, i] = np.where(np.isnan(d), np.nan, 1.0)
+            R = R.reshape(len(k), -1)
+
+            # Smallest correlation other than 1, which is nan if the first of them is nan
+            is_kept = R != 1.0
+            r = np.where(is_kept & ~np.isnan(R), R, np.inf).min(axis=1)
+            r[np.isinf(r)] = 1.0
+            r[np.isnan(R[np.arange(len(k)), is_kept.argmax(axis=1)]) & is_kept.any(axis=1)] = np.nan
+            return k, (1 - r) / 2
+
+        lengths = np.unique(length)
+        if n_jobs > 1:
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                results = list(executor.map(score, lengths))
+        else:
+            results = [score(n) for n in lengths]
+
+        anomaly_score = np.empty(len(starts))
+        for k, s in results:
+            anomaly_score[k] = s
+        return dict(zip(starts, anomaly_score))
 
     def rotor_shaft_displacement(self):
         try:
@@ -294,3 +395,24 @@ class StpIndicators(object):
             data = None
             return data
 
+
+def _bfill(x):
+    """
+    Backward fill nan along axis 1 of 3-D array x
+
+    :param x: array of (events x time x channel)
+    :return: filled array
+    """
+    n = x.shape[1]
+    pos = np.where(np.isnan(x), n, np.arange(n)[None, :, None])
+    pos = np.minimum.accumulate(pos[:, ::-1], axis=1)[:, ::-1]
+    x = np.concatenate([x, np.full((x.shape[0], 1, x.shape[2]), np.nan)], axis=1)
+    return np.take_along_axis(x, pos, axis=1)
+
+
+def _event_tuples(events, name):
+    """
+    Events of one kind from event.STPEvent.event_table, in form of list of (start, end) tuples, None if there is none
+    """
+    events = events[events['event'] == name]
+    return list(zip(events['start'], events['end'])) or None
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stp import cycle
+
+
+def fft_cycle_loop(T, days=30):
+    # Reference: the former implementation, one full FFT per bin
+    T = T.resample('1s').ffill().dropna()
+    start_ts = T.index[0]
+    end_ts = T.index[-1]
+    size_bin = timedelta(days=days)
+    n_bin = (end_ts - start_ts) // size_bin
+    T_period = {}
+    for b in range(n_bin + 1):
+        start_index = start_ts + b * size_bin
+        end_index = start_index + size_bin if b != n_bin else end_ts
+        T_bin = T[(T.index >= start_index) & (T.index < end_index)]
+        n = len(T_bin)
+        fhat = np.fft.fft(T_bin.values, n)
+        PSD = (fhat * np.conj(fhat) / n).real
+        freq = (1 / n) * np.arange(n)
+        idx_start = (np.abs(freq - 1e-5)).argmin()
+        idx_end = (np.abs(freq - 0.5)).argmin()
+        max_L = np.where(PSD == max(PSD[idx_start:idx_end]))
+        max_L = [i for i in max_L[0] if idx_start < i < idx_end]
+        T_period[end_index] = (1 / freq[max_L])[0]
+    return T_period
+
+
+def make_signal(periods, days, seed=0, start='2021-01-01 00:00:00.300'):
+    # Irregularly sampled sine waves, of one period per `days`, the last one for 3/4 of `days`
+    rng = np.random.default_rng(seed)
+    total = (len(periods) - 0.25) * days * 86400
+    t = np.sort(rng.uniform(0, total, int(total / 7)))
+    period = np.asarray(periods, dtype=float)[(t // (days * 86400)).astype(int)]
+    return pd.Series(20 + np.sin(2 * np.pi * t / period) + 0.3 * rng.normal(size=len(t)),
+                     index=pd.Timestamp(start) + pd.to_timedelta(t, unit='s'))
+
+
+@pytest.mark.parametrize('periods, days', [([1500, 900, 3000], 1), ([1200, 1200, 600, 2400, 800], 1.5),
+                                           ([700, 1300, 400], 1.3)])
+def test_fft_cycle(periods, days):
+    # One period per bin, the same as one FFT per bin
+    T = make_signal(periods, days)
+    actual = cycle.fft_cycle(T, days=days, plot=False)
+    expected = fft_cycle_loop(T, days=days)
+    assert list(actual.index) == list(expected)
+    np.testing.assert_allclose(actual.values, list(expected.values()))
+    # Each bin finds its own period
+    np.testing.assert_allclose(actual.values, periods, rtol=0.05)
+
+
+def test_fft_cycle_exact_multiple():
+    # Data spanning a whole number of bins: the former implementation failed on the empty last bin, which is now
+    # left out
+    T = make_signal([1500, 900, 900], 1)
+    T = T.resample('1s').ffill().dropna()
+    T = T[T.index <= T.index[0] + timedelta(days=2)]
+    with pytest.raises(ValueError):
+        fft_cycle_loop(T, days=1)
+    actual = cycle.fft_cycle(T, days=1, plot=False)
+    assert list(actual.index) == [T.index[0] + timedelta(days=1), T.index[0] + timedelta(days=2)]
+    np.testing.assert_allclose(actual.values, [1500, 900], rtol=0.05)
+
+
+def test_fft_cycle_low_frequency_peak():
+    # A trend puts the peak at the lowest frequency, out of the range, where the former implementation raised
+    # IndexError. The period is now NaN.
+    index = pd.date_range('2021-01-01', periods=3 * 86400, freq='1s')
+    T = pd.Series(np.arange(len(index), dtype=float), index=index)
+    with pytest.raises(IndexError):
+        fft_cycle_loop(T, days=1)
+    actual = cycle.fft_cycle(T, days=1, plot=False)
+    assert len(actual) == 3
+    assert actual.isna().all()
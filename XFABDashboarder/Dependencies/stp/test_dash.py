@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stp import stp_indicator_dash
+from stp.event_index import EventIndex
+from stp.stp_indicator_dash import StpDash
+
+
+def make_data(seed, n=3000):
+    rng = np.random.default_rng(seed)
+    status = np.where(rng.random(n) < 0.02, rng.choice([3., 4, 5], size=n), np.nan)
+    status[0] = 4
+    pump_hour = np.arange(n) / 100
+    pump_hour[n // 2:] -= 10
+    return pd.DataFrame({'Equipment Status': status,
+                         'Pump Hour Counter': pump_hour,
+                         'Motor Speed': np.where(pd.Series(status).ffill() == 4, 27000, rng.uniform(0, 27000, n)),
+                         'Motor Current': rng.random(n) + (rng.random(n) < 0.01) * 10,
+                         'Motor Temperature': rng.random(n) + 40,
+                         'Vibration B': rng.random(n) * 0.05,
+                         'Vibration H': rng.random(n)},
+                        index=pd.date_range('2021-06-01', periods=n, freq='37s'))
+
+
+class NoPlot(object):
+    def __getattr__(self, name):
+        raise AssertionError('matplotlib is used')
+
+
+def test_compute_indicators_cache(tmp_path, monkeypatch):
+    data = make_data(0)
+    cache = str(tmp_path / 'cache')
+    expected = StpDash(data, 'A').compute_indicators()
+    pd.testing.assert_frame_equal(StpDash(data, 'A').compute_indicators(cache), expected)
+
+    # Cache hit: the same table, without computing again
+    compute = StpDash._compute_indicators
+    monkeypatch.setattr(StpDash, '_compute_indicators', lambda self: pytest.fail('computed again'))
+    pd.testing.assert_frame_equal(StpDash(data, 'A').compute_indicators(cache), expected)
+
+    # Other parameters, data or event index are computed
+    counts = []
+    monkeypatch.setattr(StpDash, '_compute_indicators', lambda self: counts.append(1) or compute(self))
+    StpDash(data, 'A', vb_pk_t=3).compute_indicators(cache)
+    StpDash(data.iloc[1:], 'A').compute_indicators(cache)
+    for event_index in [EventIndex(str(tmp_path), 'A').update(data), EventIndex(str(tmp_path), 'A').update(data),
+                        EventIndex(str(tmp_path), 'A').update(data.iloc[:len(data) // 2])]:
+        StpDash(data, 'A', event_index=event_index).compute_indicators(cache)
+    assert len(counts) == 4
+
+
+def test_save_plot_without_plot(tmp_path, monkeypatch):
+    # Indicators and plot configurations are saved without matplotlib
+    data = make_data(1)
+    expected = StpDash(data, 'A').compute_indicators()
+    monkeypatch.setattr(stp_indicator_dash, 'plt', NoPlot())
+    dash = StpDash(data, 'A', des_path=str(tmp_path))
+    dash.save_plot(plot=False, plot_configs=True)
+    assert (tmp_path / 'A_configs.pkl').exists()
+    assert not (tmp_path / 'A.png').exists()
+    assert (tmp_path / 'A.csv').exists()
+    pd.testing.assert_frame_equal(dash.indicators, expected)
+    fig, indicators = dash.plot_indicators(plot=False)
+    assert fig is None
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stp.event import STPEvent
+from stp.stp_indicator import StpIndicators
+from stp.event_index import EventIndex
+
+
+def make_data(seed, n=2000):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({'Motor Speed': rng.choice([0, 0, 500, 1000, np.nan], size=n),
+                         'Pump Hour Counter': rng.choice([1., 1, 1, -40], size=n).cumsum() % 100,
+                         'Equipment Status': np.where(rng.random(n) < 0.9, np.nan, rng.choice([3., 4, 5], size=n))},
+                        index=pd.date_range('2021-06-01', periods=n, freq='1min'))
+    data.iloc[rng.random(n) < 0.1, 1] = np.nan
+    return data
+
+
+def full_build(data, speed=None):
+    # One scan over all data, of the signals in data
+    signals = {'motor_speed': 'Motor Speed', 'pump_hour': 'Pump Hour Counter', 'status': 'Equipment Status'}
+    return STPEvent.event_table(speed=speed, **{k: data[v].dropna() for k, v in signals.items() if v in data.columns})
+
+
+def assert_events_equal(actual, expected):
+    actual = actual.sort_values(['start', 'event'], ignore_index=True)
+    expected = expected.sort_values(['start', 'event'], ignore_index=True)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def build_in_syncs(folder, data, cuts, speed=None):
+    # Each sync passes all the data so far, of which only the new samples are scanned
+    for cut in cuts:
+        EventIndex(folder, 'STP', speed=speed).update(data.iloc[:cut]).save()
+    return EventIndex(folder, 'STP', speed=speed)
+
+
+@pytest.mark.parametrize('seed', range(6))
+@pytest.mark.parametrize('speed', [None, 800])
+def test_update_in_syncs(tmp_path, seed, speed):
+    # Five partial updates give the same index as one build over all data
+    data = make_data(seed)
+    cuts = sorted(np.random.default_rng(seed).choice(np.arange(1, len(data)), size=4, replace=False)) + [len(data)]
+    index = build_in_syncs(str(tmp_path), data, cuts, speed)
+    assert_events_equal(index.events, full_build(data, speed))
+
+
+@pytest.mark.parametrize('cut', range(1, 9))
+def test_pending_event(tmp_path, cut):
+    # 'motor start to speed' begins at the first 0 rpm and ends at the first speed >= 800 rpm afterwards, so it is
+    # pending while the pump is stopped or ramping up at a sync
+    data = pd.DataFrame({'Motor Speed': [1000., 1000, 0, 0, 0, 500, 900, 1000, 0]},
+                        index=pd.date_range('2021-06-01', periods=9, freq='1min'))
+    folder = str(tmp_path)
+    index = EventIndex(folder, 'STP', speed=800).update(data.iloc[:cut]).save()
+    assert ('motor start to speed' in index.state['pending']) == (3 <= cut <= 6)
+
+    index = build_in_syncs(folder, data, [len(data)], speed=800)
+    assert_events_equal(index.events, full_build(data, speed=800))
+    start = index.query(events=['motor start to speed'])
+    assert list(start['start']) == [data.index[2]]
+    assert list(start['end']) == [data.index[6]]
+
+
+def test_status_segment_reopened(tmp_path):
+    status = pd.Series([3., 3, 4, 4, 4, 5, 5, 4], index=pd.date_range('2021-06-01', periods=8, freq='1h'))
+    data = status.to_frame('Equipment Status')
+    folder = str(tmp_path)
+
+    # The last segment is open until a sample of another status is synced
+    index = EventIndex(folder, 'STP').update(data.iloc[:4]).save()
+    assert index.segments(4)['end'].isna().all()
+    index = EventIndex(folder, 'STP').update(data.iloc[:5]).save()
+    assert len(index.segments(4)) == 1
+    index = EventIndex(folder, 'STP').update(data).save()
+
+    assert list(index.segments(4)['start']) == list(status.index[[2, 7]])
+    assert index.segments(4)['end'].iloc[0] == status.index[5]
+    assert pd.isna(index.segments(4)['end'].iloc[1])
+    assert_events_equal(index.events, full_build(data))
+
+
+def test_rebuild_on_speed_change(tmp_path):
+    data = make_data(0)
+    folder = str(tmp_path)
+    build_in_syncs(folder, data, [len(data)], speed=800)
+
+    # An index of another speed is discarded and rebuilt from all the data
+    index = EventIndex(folder, 'STP', speed=500)
+    assert len(index.events) == 0
+    index.update(data).save()
+    assert_events_equal(EventIndex(folder, 'STP', speed=500).events, full_build(data, speed=500))
+
+
+def test_query(tmp_path):
+    data = make_data(1)
+    index = build_in_syncs(str(tmp_path), data, [700, len(data)], speed=800)
+    events = full_build(data, speed=800)
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        start, end = sorted(rng.choice(data.index, size=2))
+        names = ['pump swap', 'motor start to speed']
+        expected = events[events['event'].isin(names) & (events['start'] >= start) & (events['start'] <= end)]
+        assert_events_equal(index.query(start, end, names), expected)
+    assert_events_equal(index.query(), events)
+    assert_events_equal(index.query(end=data.index[500]), events[events['start'] <= data.index[500]])
+
+
+def test_segments(tmp_path):
+    data = make_data(2)
+    index = build_in_syncs(str(tmp_path), data, [1000, len(data)])
+    events = full_build(data)
+    rng = np.random.default_rng(0)
+    for status in [3, 4, 5]:
+        table = events[(events['event'] == 'status') & (events['magnitude'] == status)]
+        for _ in range(20):
+            start, end = sorted(rng.choice(data.index, size=2))
+            # Segments overlapping [start, end], the open last segment overlapping any later period
+            expected = table[(table['start'] <= end) & (table['end'].isna() | (table['end'] > start))]
+            assert list(index.segments(status, start, end)['start']) == list(expected['start'])
+
+    # The open last segment
+    last = events[events['event'] == 'status'].iloc[-1]
+    assert pd.isna(last['end'])
+    segments = index.segments(last['magnitude'], start=data.index[-1])
+    assert list(segments['start']) == [last['start']]
+    assert pd.isna(segments['end'].iloc[0])
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('after_swap', [True, False])
+def test_indicators_of_slice(tmp_path, seed, after_swap):
+    # An index of all data gives the same swaps and data as the slice alone, with no swap after the slice
+    data = make_data(seed).drop(columns=['Equipment Status', 'Motor Speed'])
+    index = build_in_syncs(str(tmp_path), data, [len(data)])
+    rng = np.random.default_rng(seed)
+    for _ in range(10):
+        a, b = sorted(rng.choice(np.arange(1, len(data)), size=2, replace=False))
+        expected = StpIndicators(data.iloc[a:b], after_swap)
+        actual = StpIndicators(data.iloc[a:b], after_swap, index)
+        assert actual.pump_swap_events == expected.pump_swap_events
+        pd.testing.assert_frame_equal(actual.data, expected.data)
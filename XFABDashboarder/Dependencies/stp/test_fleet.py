@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+import pytest
+
+from stp import fleet
+from stp.test_dash import make_data
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    file = str(tmp_path / 'config.csv')
+    pd.DataFrame({'tool_name': ['A', 'B'], 'current_peak': [5, 3.5], 'vibB_peak': [2, 2.5]}).to_csv(file, index=False)
+    return file
+
+
+def test_load_config(config_file):
+    config = fleet.load_config(config_file)
+    assert config == {'A': dict(current_pk_t=5.0, vb_pk_t=2.0), 'B': dict(current_pk_t=3.5, vb_pk_t=2.5)}
+    assert isinstance(config['A']['current_pk_t'], float)
+
+
+def test_generate_dash_config(tmp_path, config_file, monkeypatch):
+    # Thresholds of the pump in the config, defaults of others, along with other keyword arguments
+    params = {}
+
+    class Dash(object):
+        def __init__(self, data, tool_name, des_path, **kwargs):
+            params[tool_name] = kwargs
+
+        def save_plot(self, plot, cache):
+            pass
+
+    monkeypatch.setattr(fleet, 'StpDash', Dash)
+    config = fleet.load_config(config_file)
+    for name in ['A', 'C']:
+        make_data(0, n=100).to_parquet(str(tmp_path / '{}.parquet'.format(name)))
+        summary = fleet.generate_dash(str(tmp_path / '{}.parquet'.format(name)), str(tmp_path), config,
+                                      normal_only=False)
+        assert summary['status'] == 'ok'
+        assert summary['rows'] == 100
+    assert params == {'A': dict(normal_only=False, current_pk_t=5.0, vb_pk_t=2.0), 'C': dict(normal_only=False)}
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_generate_dashes(tmp_path, config_file, n_jobs):
+    # The summary follows the order of the files, not the order they are processed in, largest first
+    data_folder, dash_folder = tmp_path / 'data', tmp_path / 'dash'
+    data_folder.mkdir()
+    dash_folder.mkdir()
+    file_paths = []
+    for name, n in [('A', 500), ('B', 3000), ('C', 1500)]:
+        file_paths.append(str(data_folder / '{}.parquet'.format(name)))
+        make_data(0, n).to_parquet(file_paths[-1])
+    # A file that is not parquet fails without stopping the others
+    file_paths.insert(1, str(data_folder / 'D.parquet'))
+    with open(file_paths[1], 'w') as f:
+        f.write('not parquet')
+
+    summary = fleet.generate_dashes(file_paths, str(dash_folder), fleet.load_config(config_file), n_jobs=n_jobs,
+                                    plot=False)
+    assert list(summary.columns) == fleet.SUMMARY_COLUMNS
+    assert list(summary['tool_name']) == ['A', 'D', 'B', 'C']
+    assert list(summary['status']) == ['ok', 'failed', 'ok', 'ok']
+    assert list(summary['rows']) == [500, 0, 3000, 1500]
+    assert summary['error'].iloc[1] != ''
+    pd.testing.assert_frame_equal(pd.read_csv(str(dash_folder / 'run_summary.csv'), keep_default_na=False),
+                                  summary, check_dtype=False)
+    for name in ['A', 'B', 'C']:
+        assert os.path.exists(str(dash_folder / '{}.csv'.format(name)))
+    assert not os.path.exists(str(dash_folder / 'A.png'))
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stp import stp_indicator, trend, peak
+
+CHANNELS = ['Motor Speed', 'Motor Current', 'Vibration H']
+
+
+def start_anomaly_score_loop(data, data_acc, start_period=400):
+    # Reference: the former implementation, one event at a time
+    data = data.ffill()
+    start_score = {}
+    for i in range(len(data_acc.index)):
+        if i != 0 and data_acc.index[i] < data_acc.index[i - 1] + timedelta(seconds=start_period):
+            continue
+        data_bin = data[(data_acc.index[i] <= data.index) &
+                        (data.index <= (data_acc.index[i] + timedelta(seconds=start_period)))][CHANNELS]
+        data_bin = data_bin.resample('1s').ffill().bfill()
+        data_trend = pd.DataFrame({c: trend.trend_filter(data_bin[c], batch_size=None) for c in CHANNELS})
+        R = data_trend.corr()
+        r = min(R.values.reshape(1, 9)[R.values.reshape(1, 9) != 1.0])
+        start_score[data_acc.index[i]] = (1 - r) / 2
+    return start_score
+
+
+def make_start_data(seed, n=3000):
+    # Irregular samples of ramps up to speed, the Acceleration samples of a ramp are sometimes more than 400 s apart
+    rng = np.random.default_rng(seed)
+    t = np.cumsum(rng.choice([1.5, 7, 20, 45, 130, 450], size=n, p=[0.2, 0.4, 0.2, 0.1, 0.07, 0.03]))
+    status = np.where(rng.random(n) < 0.02, rng.choice([3., 4, 5], size=n), np.nan)
+    status[0] = 3
+    state = pd.Series(status).ffill().values
+    speed = np.where(state == 3, rng.uniform(0, 27000, size=n), np.where(state == 5, 0, 27000.))
+    data = pd.DataFrame({'Equipment Status': status,
+                         'Motor Speed': speed,
+                         'Motor Current': speed / 27000 + rng.normal(size=n) * 0.1,
+                         'Vibration H': rng.random(n)},
+                        index=pd.Timestamp('2021-06-01 00:00:00.250') + pd.to_timedelta(t, unit='s'))
+    for column in CHANNELS:
+        data.loc[rng.random(n) < 0.1, column] = np.nan
+    data.iloc[:3, 2] = np.nan
+    return data
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('n_jobs', [1, 3])
+def test_start_anomaly_score(seed, n_jobs):
+    data = make_start_data(seed)
+    stp = stp_indicator.StpIndicators(data, after_swap=False)
+    actual = stp.start_anomaly_score(n_jobs=n_jobs)
+    expected = start_anomaly_score_loop(stp.data, stp.data_acc)
+    assert list(actual) == list(expected)
+    np.testing.assert_allclose(list(actual.values()), list(expected.values()), rtol=0, atol=1e-6)
+
+
+def test_start_anomaly_score_missing():
+    # No Acceleration, or no Vibration H data
+    data = make_start_data(0)
+    assert stp_indicator.StpIndicators(data.assign(**{'Equipment Status': 4.0}),
+                                       after_swap=False).start_anomaly_score() == {}
+    assert stp_indicator.StpIndicators(data.drop(columns='Equipment Status'),
+                                       after_swap=False).start_anomaly_score() == {}
+    assert stp_indicator.StpIndicators(data.drop(columns='Vibration H'),
+                                       after_swap=False).start_anomaly_score() is None
+
+
+def rotor_contact_loop(stp, normal=True, current_pk_t=4, vb_pk_t=2, current_lag=10, v_lag=3):
+    # Reference: the former implementation, comparing each Vibration B peak to all Motor Current peaks
+    data = stp.data_ops if normal else stp.data
+    motor_current = pd.Series(data['Motor Current']).dropna()
+    vib_b = pd.Series(data[data['Vibration B'] < 0.1]['Vibration B']).dropna()
+    _, current_pk_count = peak.PeakDetect.spike_detect_local(motor_current, 99, current_pk_t, current_lag,
+                                                            'Motor Current', plot=False)
+    _, vb_pk_count = peak.PeakDetect.spike_detect_local(vib_b, 99, vb_pk_t, v_lag, 'Vibration B', plot=False)
+    l_n, s_n = 0, 0
+    large_contact = {vib_b.index[0]: l_n}
+    small_contact = {vib_b.index[0]: s_n}
+    for i in range(len(vb_pk_count)):
+        if vb_pk_count.values[i] > 0 and len(current_pk_count) != 0:
+            if any(abs(current_pk_count.index - vb_pk_count.index[i]) < timedelta(minutes=1)):
+                l_n += 1
+                large_contact[vb_pk_count.index[i]] = l_n
+            else:
+                s_n += 1
+                small_contact[vb_pk_count.index[i]] = s_n
+    return large_contact, small_contact
+
+
+def make_contact_data(seed, n=5000):
+    # Motor Current peaks, some of them with Vibration B peaks a few samples apart, and Vibration B above 0.1
+    rng = np.random.default_rng(seed)
+    status = np.where(rng.random(n) < 0.01, rng.choice([3., 4, 4, 4, 5], size=n), np.nan)
+    current = rng.normal(size=n)
+    vib_b = np.abs(rng.normal(0.02, 0.01, size=n))
+    is_peak = rng.random(n) < 0.005
+    current[is_peak] += 8
+    vib_b[np.roll(is_peak, int(rng.integers(0, 10)))] += 0.05
+    vib_b[rng.random(n) < 0.01] = 0.5
+    vib_b[rng.random(n) < 0.003] += 0.05
+    return pd.DataFrame({'Equipment Status': status, 'Motor Current': current, 'Vibration B': vib_b,
+                         'Vibration H': vib_b}, index=pd.date_range('2021-06-01', periods=n, freq='10s'))
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('normal', [True, False])
+@pytest.mark.parametrize('params', [{}, dict(current_pk_t=3, vb_pk_t=1.5, current_lag=5, v_lag=2)])
+def test_rotor_contact(seed, normal, params):
+    stp = stp_indicator.StpIndicators(make_contact_data(seed), after_swap=False)
+    large_contact, small_contact = stp.rotor_contact(normal, **params)
+    expected_large, expected_small = rotor_contact_loop(stp, normal, **params)
+    assert len(expected_large) > 1 and len(expected_small) > 1
+    assert large_contact == expected_large
+    assert small_contact == expected_small
@@ -0,0 +1,126 @@
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stp import stp_indicator
+from stp.event_index import EventIndex
+from stp.segment import StateSegments
+
+
+@pytest.fixture
+def index():
+    return pd.date_range('2021-06-01', periods=10, freq='1min')
+
+
+def test_from_status(index):
+    # Missing status is forward filled, rows before the first status are not in any segment
+    status = pd.Series([np.nan, 3, np.nan, 4, 4, np.nan, 3, 3, 5, np.nan], index=index)
+    table = StateSegments.from_status(status).table
+    assert table['state'].tolist() == [3, 4, 3, 5]
+    assert table['first'].tolist() == [1, 3, 6, 8]
+    assert table['stop'].tolist() == [3, 6, 8, 10]
+    assert table['start'].tolist() == list(index[[1, 3, 6, 8]])
+    assert table['end'].tolist() == list(index[[2, 5, 7, 9]])
+
+
+def test_from_intervals(index):
+    # Ends are the first timestamp after the segment, NaT for open end
+    segments = pd.DataFrame({'state': [4, 3, 4, 5],
+                             'start': [index[0] - pd.Timedelta('5min'), index[2], index[4], index[7]],
+                             'end': [index[2], index[4], index[7], pd.NaT]})
+    table = StateSegments.from_intervals(index, segments, start=index[1]).table
+    assert table['state'].tolist() == [4, 3, 4, 5]
+    assert table['first'].tolist() == [1, 2, 4, 7]
+    assert table['stop'].tolist() == [2, 4, 7, 10]
+
+    # Segments between samples are left out
+    segments = pd.DataFrame({'state': [4], 'start': [index[2] + pd.Timedelta('10s')],
+                             'end': [index[2] + pd.Timedelta('20s')]})
+    assert len(StateSegments.from_intervals(index, segments).table) == 0
+
+
+def test_excluding(index):
+    # Intervals are inclusive and may overlap
+    intervals = [(index[1], index[2]), (index[2], index[4]), (index[6], index[6]),
+                 (index[8], index[9] + pd.Timedelta('1h'))]
+    table = StateSegments.excluding(index, intervals, 4).table
+    assert table['state'].tolist() == [4, 4, 4]
+    assert table['first'].tolist() == [0, 5, 7]
+    assert table['stop'].tolist() == [1, 6, 8]
+
+    assert StateSegments.excluding(index, [], 4).table[['first', 'stop']].values.tolist() == [[0, 10]]
+
+
+def test_positions_and_select(index):
+    status = pd.Series([3, 3, 4, 4, 4, 3, 5, 4, 4, 3], index=index, dtype=float)
+    data = pd.DataFrame({'value': np.arange(10.0)}, index=index)
+    segments = StateSegments.from_status(status)
+    for state in [3, 4, 5, 1]:
+        positions = segments.positions(state)
+        np.testing.assert_array_equal(positions, np.flatnonzero(status == state))
+        pd.testing.assert_frame_equal(segments.select(data, state), data[status == state])
+
+    # One segment is selected by a slice
+    assert segments.slices(5) == [slice(6, 7)]
+
+
+def make_data(seed, n=2000, tz=None):
+    rng = np.random.default_rng(seed)
+    pump_hour = np.arange(n, dtype=float)
+    pump_hour[n // 2:] -= n // 2
+    return pd.DataFrame({'Equipment Status': np.where(rng.random(n) < 0.05, rng.choice([3., 4, 5, 1], size=n), np.nan),
+                         'Pump Hour Counter': pump_hour,
+                         'Motor Current': rng.random(n)},
+                        index=pd.date_range('2021-06-01', periods=n, freq='1min', tz=tz))
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('after_swap', [True, False])
+@pytest.mark.parametrize('with_index', [True, False])
+def test_state_data(seed, after_swap, with_index):
+    # Same rows as selection by mask of forward filled status
+    data = make_data(seed, tz='Europe/Paris' if seed % 2 else None)
+    expected = data.sort_index()
+    if after_swap:
+        expected = expected[expected.index >= data.index[len(data) // 2]]
+    expected = expected.assign(**{'Equipment Status': expected['Equipment Status'].ffill(),
+                                  'Equipment Status_NF': expected['Equipment Status']})
+
+    event_index = EventIndex(tempfile.mkdtemp(), 'STP').update(data) if with_index else None
+    stp = stp_indicator.StpIndicators(data, after_swap, event_index)
+    for state, actual in [(3, stp.data_acc), (4, stp.data_ops), (5, stp.data_dec)]:
+        pd.testing.assert_frame_equal(actual, expected[expected['Equipment Status'] == state])
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('after_swap', [True, False])
+def test_state_data_of_slice(seed, after_swap):
+    # An index of all data gives the same rows as the slice alone
+    data = make_data(seed)
+    event_index = EventIndex(tempfile.mkdtemp(), 'STP').update(data)
+    rng = np.random.default_rng(seed)
+    for _ in range(10):
+        a, b = sorted(rng.choice(np.arange(1, len(data)), size=2, replace=False))
+        expected = stp_indicator.StpIndicators(data.iloc[a:b], after_swap)
+        actual = stp_indicator.StpIndicators(data.iloc[a:b], after_swap, event_index)
+        pd.testing.assert_frame_equal(actual.data, expected.data)
+        assert actual.segments.table[['state', 'first', 'stop']].values.tolist() == \
+            expected.segments.table[['state', 'first', 'stop']].values.tolist()
+        for name in ['data_acc', 'data_ops', 'data_dec']:
+            pd.testing.assert_frame_equal(getattr(actual, name), getattr(expected, name))
+
+
+def test_motor_speed_fallback():
+    # Without Equipment Status, Normal status is all data except from leaving the speed to stopping, for every stop
+    speed = np.r_[np.full(50, 27000.), np.linspace(27000, 0, 5), np.zeros(10), np.linspace(0, 27000, 5),
+                  np.full(50, 27000.), np.linspace(27000, 0, 5), np.zeros(10), np.full(50, 27000.)]
+    data = pd.DataFrame({'Motor Speed': speed}, index=pd.date_range('2021-06-01', periods=len(speed), freq='1min'))
+    stp = stp_indicator.StpIndicators(data)
+    assert len(stp.motor_stop_events_ops_speed) == 2
+
+    is_stop = np.zeros(len(data), dtype=bool)
+    for start, end in stp.motor_stop_events_ops_speed:
+        is_stop |= (data.index >= start) & (data.index <= end)
+    pd.testing.assert_frame_equal(stp.data_ops, data[~is_stop])
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.optimize
+
+from stp.trend import trend_filter, trend_filter_batch, _l1_trend, _l2_trend, _diff
+
+
+def objective(x, y, lambda_value, reg_norm):
+    return 0.5 * np.sum((y - x) ** 2) + lambda_value * np.linalg.norm(_diff(x), ord=reg_norm)
+
+
+def reference_trend(y, lambda_value, reg_norm):
+    # General purpose solver of the same problem in epigraph form, with s >= ||D x||
+    n = y.size
+    d = np.diff(np.eye(n), n=2, axis=0)
+    if reg_norm == 2:
+        z0 = np.r_[y, np.linalg.norm(d @ y)]
+        constraints = [{'type': 'ineq', 'fun': lambda z: z[-1] ** 2 - np.sum((d @ z[:-1]) ** 2),
+                        'jac': lambda z: np.r_[-2 * d.T @ (d @ z[:-1]), 2 * z[-1]]},
+                       {'type': 'ineq', 'fun': lambda z: z[-1:], 'jac': lambda z: np.eye(n + 1)[-1:]}]
+    else:
+        z0 = np.r_[y, np.abs(d @ y)]
+        constraints = [{'type': 'ineq', 'fun': lambda z: z[n:] - d @ z[:n], 'jac': lambda z: np.c_[-d, np.eye(n - 2)]},
+                       {'type': 'ineq', 'fun': lambda z: z[n:] + d @ z[:n], 'jac': lambda z: np.c_[d, np.eye(n - 2)]}]
+    m = z0.size - n
+    result = scipy.optimize.minimize(lambda z: 0.5 * np.sum((y - z[:n]) ** 2) + lambda_value * np.sum(z[n:]), z0,
+                                     jac=lambda z: np.r_[z[:n] - y, np.full(m, lambda_value)],
+                                     constraints=constraints, method='SLSQP', options=dict(ftol=1e-14, maxiter=2000))
+    return result.x[:n]
+
+
+@pytest.mark.parametrize('n', [3, 4, 30])
+@pytest.mark.parametrize('lambda_value', [0.1, 1, 10])
+@pytest.mark.parametrize('reg_norm, solve', [(1, _l1_trend), (2, _l2_trend)])
+def test_trend_objective(n, lambda_value, reg_norm, solve):
+    # The solution is at least as good as the one of scipy.optimize, up to the tolerance of the solvers
+    y = np.cumsum(np.random.default_rng(n).normal(size=n))
+    x = solve(y, lambda_value)
+    x_ref = reference_trend(y, lambda_value, reg_norm)
+    f, f_ref = objective(x, y, lambda_value, reg_norm), objective(x_ref, y, lambda_value, reg_norm)
+    assert f <= f_ref + 1e-7 * max(1, f_ref)
+
+
+@pytest.mark.parametrize('reg_norm', [1, 2])
+@pytest.mark.parametrize('batch_size', [None, 0, 40, 1000])
+def test_trend_filter_batch_size(reg_norm, batch_size):
+    data = pd.Series(np.cumsum(np.random.default_rng(0).normal(size=100)),
+                     pd.date_range('2021-06-01', periods=100, freq='1h'))
+    actual = trend_filter(data, reg_norm=reg_norm, lambda_value=5, batch_size=batch_size)
+    assert actual.index.equals(data.index)
+    assert np.isfinite(actual).all()
+    if not batch_size or batch_size >= len(data):
+        np.testing.assert_allclose(actual.values, (_l1_trend if reg_norm == 1 else _l2_trend)(data.values, 5))
+
+
+@pytest.mark.parametrize('n, rows', [(2, 3), (3, 5), (10, 4), (60, 3), (60, 20), (401, 5), (401, 30)])
+def test_trend_filter_batch(n, rows):
+    # Same as the single series solver, whether the batch is solved at once or series by series
+    rng = np.random.default_rng(n)
+    y = np.cumsum(rng.normal(size=(rows, n)), axis=1) * rng.choice([0.01, 1, 100], size=(rows, 1))
+    y[0] = np.linspace(0, 1, n)
+    actual = trend_filter_batch(y, 50)
+    assert actual.shape == y.shape
+    expected = np.array([_l2_trend(x, 50) if n >= 3 else x for x in y])
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-9 * np.abs(y).max())
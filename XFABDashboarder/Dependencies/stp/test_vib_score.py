@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stp import vib_score
+
+
+def score_loop(data_ops, bin_size=timedelta(days=15), window=1000):
+    # Reference: the former implementation, one bin at a time
+    data_ops = data_ops.ffill()
+    start_ts = min(data_ops.index)
+    end_ts = max(data_ops.index)
+    n_bin = (end_ts - start_ts) // bin_size
+    anomaly_score = {}
+    for b in range(n_bin + 1):
+        start_index = start_ts + b * bin_size
+        end_index = start_index + bin_size if b != n_bin else end_ts
+        data_bin = data_ops[(data_ops.index >= start_index) & (data_ops.index < end_index)]
+        vib_b_trend = data_bin['Vibration B'].dropna().rolling(window).mean().dropna().values
+        vib_h_trend = data_bin['Vibration H'].dropna().rolling(window).mean().dropna().values
+        n = min(len(vib_b_trend), len(vib_h_trend))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.corrcoef(vib_b_trend[:n], vib_h_trend[:n]) if n > 0 else np.full((2, 2), np.nan)
+        anomaly_score[end_index] = (1 - r[0, 1]) / 2
+    return anomaly_score
+
+
+def make_data(seed, n, freq='10min'):
+    # Random walks with gaps in time and missing values
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2021-01-01 00:00:07', periods=n, freq=freq)
+    index = index[np.sort(rng.choice(n, int(n * 0.8), replace=False))]
+    b = np.cumsum(rng.normal(size=len(index)))
+    h = b * rng.choice([1, -1]) + rng.normal(size=len(index)) * 3
+    b[rng.random(len(index)) < 0.1] = np.nan
+    h[rng.random(len(index)) < 0.1] = np.nan
+    b[:5], h[:50] = np.nan, np.nan
+    return pd.DataFrame({'Vibration B': b, 'Vibration H': h, 'Other': 1.0}, index=index)
+
+
+def assert_scores_equal(actual, expected):
+    assert list(actual) == list(expected)
+    np.testing.assert_allclose(list(actual.values()), list(expected.values()), atol=1e-9)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_score(seed):
+    data = make_data(seed, int(np.random.default_rng(seed).integers(300, 6000)))
+    copy = data.copy()
+    actual = vib_score.score(data, plot=False, bin_size=timedelta(days=3), window=100)
+    pd.testing.assert_frame_equal(data, copy)
+    assert_scores_equal(actual, score_loop(data, bin_size=timedelta(days=3), window=100))
+
+
+def test_score_default_bins():
+    data = make_data(0, 50000, freq='1min')
+    assert_scores_equal(vib_score.score(data, plot=False), score_loop(data))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_score_previous(seed):
+    # Scores of complete bins of a former call are reused, only new bins are computed
+    data = make_data(seed, 6000)
+    bin_size = timedelta(days=3)
+    part = data[data.index < data.index[0] + timedelta(days=int(np.random.default_rng(seed).integers(1, 30)))]
+    previous = vib_score.score(part, plot=False, bin_size=bin_size, window=100)
+    actual = vib_score.score(data, plot=False, bin_size=bin_size, window=100, previous=previous)
+    assert_scores_equal(actual, vib_score.score(data, plot=False, bin_size=bin_size, window=100))
+
+    # Reused scores are not recomputed
+    first = list(previous)[0]
+    actual = vib_score.score(data, plot=False, bin_size=bin_size, window=100, previous={first: 2.0})
+    assert actual[first] == 2.0
+
+
+def test_score_exact_multiple():
+    # Data spanning exactly two bins: the last timestamp is not in any bin, so the former implementation overwrote the
+    # score of the second bin, which ends at the last timestamp, with the score of an empty bin, NaN. It is now the
+    # score of the second bin.
+    data = make_data(0, 1000)
+    start, last = data.index[0], data.index[0] + timedelta(days=6)
+    data = data[data.index < last]
+    data.loc[last] = 1.0
+    expected = score_loop(data, bin_size=timedelta(days=3), window=100)
+    actual = vib_score.score(data, plot=False, bin_size=timedelta(days=3), window=100)
+    assert list(actual) == list(expected) == [start + timedelta(days=3), last]
+    assert np.isnan(expected[last])
+
+    x = data.ffill()
+    x = x[x.index >= start + timedelta(days=3)].iloc[:-1]
+    trend_b = x['Vibration B'].dropna().rolling(100).mean().dropna().values
+    trend_h = x['Vibration H'].dropna().rolling(100).mean().dropna().values
+    n = min(len(trend_b), len(trend_h))
+    assert np.isclose(actual[last], (1 - np.corrcoef(trend_b[:n], trend_h[:n])[0, 1]) / 2)
+
+
+def test_score_empty():
+    assert vib_score.score(make_data(0, 100).iloc[:0], plot=False) == {}
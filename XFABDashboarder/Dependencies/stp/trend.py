@@ -4,91 +4,234 @@ Created on Mon Jun 14 09:58:34 2021
 
 @author: Dennis Hou
 """
+import functools
+
 import numpy as np
 import pandas as pd
-import scipy
-import cvxpy
+import scipy.linalg
+import scipy.optimize
 
 
-def trend_filter(data, reg_norm=2, lambda_value=50, batch_size=100):
+def trend_filter(data, reg_norm=2, lambda_value=50, batch_size=None):
     """
     Hodrick-Prescott (H-P) version of trend filtering and L1 trend filtering
 
+    Solve min 0.5 * ||y - x||_2^2 + lambda_value * ||D x||_p, where D is the second order difference matrix and p is
+    `reg_norm`, over the full series at once. All linear systems are banded, so each solve is O(n).
+    p = 2: the solution is the H-P filter (I + mu D'D)^-1 y, whose mu is found by root finding
+    p = 1: the dual box-constrained problem is solved by a primal-dual interior point method (Kim et al., 2009)
+
     :param data: pandas Series with datetime index to be filtered
-    :param reg_norm: L1 or L2 norm of penalty for smoothness 
+    :param reg_norm: L1 or L2 norm of penalty for smoothness
     :param lambda_value: regularisation paramter
-    :param batch_size: number of data points to be process in one optimisation
-    :return : filtered data array
+    :param batch_size: number of data points to be process in one optimisation, None to process the full series
+    without seams between batches
+    :return : filtered data Series
     """
-    values = data.values
+    if reg_norm not in [1, 2]:
+        raise ValueError('reg_norm should be either 1 or 2')
+    solve = _l1_trend if reg_norm == 1 else _l2_trend
+
+    values = np.asarray(data.values, dtype=float)
     if batch_size:
-        try:
-            assert len(values) > batch_size
-        except AssertionError:
-            print('Data must be longer than batch_size')
-        try:
-            assert reg_norm in [1,2]
-            if reg_norm == 1:
-                solver = cvxpy.ECOS
-            else:
-                solver = cvxpy.CVXOPT
-        except AssertionError:
-            print('reg_norm should be either 1 or 2')
-        batch = len(values) // batch_size
-        remain = len(values) % batch_size
-
-        X = np.array([])
-        for b in range(batch):
-            y = values[b * batch_size: (b + 1) * batch_size]
-            n = y.size
-            ones_row = np.ones((1, n))
-            D = scipy.sparse.spdiags(np.vstack((ones_row, -2*ones_row, ones_row)), range(3), n-2, n)
-
-            x = cvxpy.Variable(shape=n)     # x is the filtered trend that we initialize
-            objective = cvxpy.Minimize(0.5 * cvxpy.sum_squares(y-x) + lambda_value * cvxpy.norm(D@x, reg_norm))    # Note: D@x is syntax for matrix multiplication
-            problem = cvxpy.Problem(objective)
-            problem.solve(solver=solver, verbose=False)
-
-            X = np.append(X, np.array(x.value))
-
-        y = values[(b + 1) * batch_size: (b + 1) * batch_size + remain]
-        if len(y) > 2:
-            n = y.size
-            ones_row = np.ones((1, n))
-            D = scipy.sparse.spdiags(np.vstack((ones_row, -2*ones_row, ones_row)), range(3), n-2, n)
-
-            x = cvxpy.Variable(shape=n)     # x is the filtered trend that we initialize
-            objective = cvxpy.Minimize(0.5 * cvxpy.sum_squares(y-x) + lambda_value * cvxpy.norm(D@x, reg_norm))    # Note: D@x is syntax for matrix multiplication
-            problem = cvxpy.Problem(objective)
-            problem.solve(solver=solver, verbose=False)
-            X = np.append(X, np.array(x.value))
-        else:
-            X = np.append(X, X[-1])
-    else:
-        try:
-            assert reg_norm in [1,2]
-            if reg_norm == 1:
-                solver = cvxpy.ECOS
-            else:
-                solver = cvxpy.CVXOPT
-        except AssertionError:
-            print('reg_norm should be either 1 or 2')
-        X = np.array([])
-        y = values
-        n = y.size
-        ones_row = np.ones((1, n))
-        D = scipy.sparse.spdiags(np.vstack((ones_row, -2 * ones_row, ones_row)), range(3), n - 2, n)
-
-        x = cvxpy.Variable(shape=n)  # x is the filtered trend that we initialize
-        objective = cvxpy.Minimize(0.5 * cvxpy.sum_squares(y - x) + lambda_value * cvxpy.norm(D @ x,
-                                                                                              reg_norm))  # Note: D@x is syntax for matrix multiplication
-        problem = cvxpy.Problem(objective)
-        problem.solve(solver=solver, verbose=False)
-        X = np.append(X, np.array(x.value))
-
-    if len(X) == len(data.index):
-        X_series = pd.Series(X, data.index)
+        # Remaining data points too few to be filtered are added to the last batch
+        edges = list(range(0, len(values) - 2, batch_size)) + [len(values)]
+        if len(edges) > 2 and edges[-1] - edges[-2] < 3:
+            del edges[-2]
+        X = np.concatenate([solve(values[a:b], lambda_value) for a, b in zip(edges[:-1], edges[1:])])
     else:
-        X_series = pd.Series(X[:len(data.index)], data.index)
+        X = solve(values, lambda_value)
+
+    return pd.Series(X, data.index)
+
+
+def trend_filter_batch(values, lambda_value=50):
+    """
+    L2 trend filtering of many series of the same length at once
+
+    Equivalent to trend_filter with reg_norm=2 and batch_size=None applied to each series. With the eigendecomposition
+    D'D = Q diag(w) Q', x(mu) = Q diag(1 / (1 + mu w)) Q'y, so ||D x(mu)|| is cheap to evaluate for all series and mu is
+    found for all series at once by bisection. The eigendecomposition is O(n^3), so a few series are rather filtered one
+    by one.
+
+    :param values: 2-D array, one series per row
+    :param lambda_value: regularisation paramter
+    :return: 2-D array of filtered series
+    """
+    y = np.atleast_2d(np.asarray(values, dtype=float))
+    n = y.shape[1]
+    if n < 3:
+        return y.copy()
+    if len(y) * 8000 < n ** 2:
+        return np.array([_l2_trend(x, lambda_value) if np.isfinite(x).all() else np.full(n, np.nan) for x in y])
+
+    w, q = _dtd_eigh(n)
+    c = y @ q
+    wc2 = w * c ** 2
+
+    def log_phi(s):
+        # log(mu * ||D x(mu)||) with mu = exp(s)
+        mu = np.exp(s)[:, None]
+        return 0.5 * np.log(np.sum(wc2 * (mu / (1 + mu * w)) ** 2, axis=1))
+
+    # mu * ||D x(mu)|| increases from 0 to ||(D D')^-1 D y||, above which x is the least squares line (mu = inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        is_line = np.sum(wc2[:, 2:] / w[2:] ** 2, axis=1) <= lambda_value ** 2
+        lower = np.log(lambda_value) - 0.5 * np.log(np.sum(wc2, axis=1))
+    lower[is_line | ~np.isfinite(lower)] = 0
+    upper = lower + 2
+    target = np.log(lambda_value)
+    while True:
+        is_low = (log_phi(upper) < target) & ~is_line
+        if not is_low.any():
+            break
+        upper[is_low] += 2 * (upper[is_low] - lower[is_low])
+    for _ in range(64):
+        middle = (lower + upper) / 2
+        is_low = log_phi(middle) < target
+        lower = np.where(is_low, middle, lower)
+        upper = np.where(is_low, upper, middle)
+
+    scale = 1 / (1 + np.exp((lower + upper) / 2)[:, None] * w)
+    scale[is_line] = np.where(w == 0, 1.0, 0.0)
+    return (c * scale) @ q.T
+
+
+@functools.lru_cache(maxsize=8)
+def _dtd_eigh(n):
+    """
+    Eigendecomposition of D'D, whose two smallest eigenvalues are exactly 0
+
+    The next eigenvalues are close to 0 for large n, so the eigenvectors of the null space, constants and lines, are
+    taken exact and the other eigenvectors are made orthogonal to them. Otherwise constants and lines would not be
+    their own trend.
+    """
+    d = np.diff(np.eye(n), n=2, axis=0)
+    w, q = np.linalg.eigh(d.T @ d)
+    w[:2] = 0
+    null, _ = np.linalg.qr(np.vander(np.arange(n, dtype=float) - (n - 1) / 2, 2))
+    q[:, 2:] -= null @ (null.T @ q[:, 2:])
+    q, r = np.linalg.qr(np.c_[null, q[:, 2:]])
+    return w, q * np.sign(np.diag(r))
+
+
+def _diff(x):
+    """Second order difference D x"""
+    return x[:-2] - 2 * x[1:-1] + x[2:]
+
+
+def _diff_t(v):
+    """Transposed second order difference D' v"""
+    x = np.zeros(v.size + 2)
+    x[:-2] += v
+    x[1:-1] -= 2 * v
+    x[2:] += v
+    return x
+
+
+def _dtd_banded(n, mu):
+    """I + mu D'D in upper banded form of scipy.linalg.solveh_banded"""
+    diag = np.full(n, 6.0)
+    diag[[0, -1]] = 1
+    diag[[1, -2]] = 5 if n > 3 else 4
+    ab = np.zeros((3, n))
+    ab[0, 2:] = mu
+    ab[1, 1:] = -4 * mu
+    ab[1, [1, -1]] = -2 * mu
+    ab[2] = 1 + mu * diag
+    return ab
+
+
+def _ddt_banded(m):
+    """D D' in upper banded form of scipy.linalg.solveh_banded"""
+    ab = np.zeros((3, m))
+    ab[0, 2:] = 1
+    ab[1, 1:] = -4
+    ab[2] = 6
+    return ab
+
+
+def _l2_trend(y, lambda_value):
+    """
+    L2 trend filtering by H-P filter
+
+    The optimal x satisfies x = (I + mu D'D)^-1 y with mu = lambda_value / ||D x||, so mu is the root of
+    mu * ||D x(mu)|| = lambda_value, which is increasing in mu. If lambda_value >= ||(D D')^-1 D y||, D x = 0, i.e.,
+    x is the least squares line.
+    """
+    if y.size < 3:
+        return y.copy()
+
+    v = scipy.linalg.solveh_banded(_ddt_banded(y.size - 2), _diff(y))
+    if np.linalg.norm(v) <= lambda_value:
+        return y - _diff_t(v)
+
+    def hp(s):
+        return scipy.linalg.solveh_banded(_dtd_banded(y.size, np.exp(s)), y)
+
+    def f(s):
+        return np.exp(s) * np.linalg.norm(_diff(hp(s))) - lambda_value
+
+    lower, upper = 0.0, 0.0
+    while f(upper) < 0:
+        upper += 2
+    while f(lower) > 0:
+        lower -= 2
+    s = scipy.optimize.brentq(f, lower, upper, xtol=1e-12, rtol=1e-14)
+    return hp(s)
+
+
+def _l1_trend(y, lambda_value, tol=1e-8, max_iter=100):
+    """
+    L1 trend filtering by primal-dual interior point method
+
+    Solve the dual min 0.5 * v'D D'v - y'D'v s.t. -lambda_value <= v <= lambda_value, then x = y - D'v. Each Newton
+    step solves a pentadiagonal system. Converges in a few tens of steps regardless of the length of y.
+    """
+    if y.size < 3:
+        return y.copy()
+
+    m = y.size - 2
+    b = _diff(y)
+    ddt = _ddt_banded(m)
+    v = np.zeros(m)
+    mu1, mu2 = np.ones(m), np.ones(m)
+    f1, f2 = v - lambda_value, -v - lambda_value
+    t = 4 * m / -(f1 @ mu1 + f2 @ mu2)
+
+    def residual(v, mu1, mu2, t):
+        f1, f2 = v - lambda_value, -v - lambda_value
+        return np.sqrt(np.sum((_diff(_diff_t(v)) - b + mu1 - mu2) ** 2)
+                       + np.sum((mu1 * f1 + 1 / t) ** 2) + np.sum((mu2 * f2 + 1 / t) ** 2))
+
+    for _ in range(max_iter):
+        r_dual = _diff(_diff_t(v)) - b + mu1 - mu2
+        gap = -(f1 @ mu1 + f2 @ mu2)
+        dual_obj = 0.5 * np.sum(_diff_t(v) ** 2) - b @ v
+        if (gap <= tol * max(1, abs(dual_obj))) and (np.linalg.norm(r_dual) <= tol * max(1, np.linalg.norm(b))):
+            break
+
+        # Newton step of the centrality conditions mu1 * f1 = mu2 * f2 = -1 / t
+        t = max(4 * m / gap, t)
+        r_cent1, r_cent2 = -mu1 * f1 - 1 / t, -mu2 * f2 - 1 / t
+        ab = ddt.copy()
+        ab[2] -= mu1 / f1 + mu2 / f2
+        dv = scipy.linalg.solveh_banded(ab, -r_dual - r_cent1 / f1 + r_cent2 / f2)
+        dmu1 = (r_cent1 - mu1 * dv) / f1
+        dmu2 = (r_cent2 + mu2 * dv) / f2
+
+        # Largest step keeping strict feasibility, then backtracking line search
+        step = 1.0
+        for x, dx in [(mu1, dmu1), (mu2, dmu2), (-f1, -dv), (-f2, dv)]:
+            is_neg = dx < 0
+            if is_neg.any():
+                step = min(step, 0.99 * np.min(-x[is_neg] / dx[is_neg]))
+        r = residual(v, mu1, mu2, t)
+        while (residual(v + step * dv, mu1 + step * dmu1, mu2 + step * dmu2, t) > (1 - 0.01 * step) * r) \
+                and (step > 1e-12):
+            step *= 0.5
+
+        v, mu1, mu2 = v + step * dv, mu1 + step * dmu1, mu2 + step * dmu2
+        f1, f2 = v - lambda_value, -v - lambda_value
 
-    return X_series
+    return y - _diff_t(v)
@@ -14,44 +14,66 @@ And, when it is around 0.8 to 1, it means that VibXYb and VibXYh are moving in o
 """
 
 
-def score(data_ops, plot=True):
-    data_ops.fillna(method='ffill', inplace=True)
-    start_ts = min(data_ops.index)
-    end_ts = max(data_ops.index)
-    length_ts = end_ts - start_ts
-    size_bin = timedelta(days=15)
-    n_bin = length_ts // size_bin
-    reminder_bin = length_ts % size_bin
-
-    # plt.figure()
-    # spilt the data
-    anomaly_score = {}
-    for b in range(n_bin + 1):
-        if b != n_bin:
-            start_index = start_ts + b * size_bin
-            end_index = start_index + size_bin
-        else:
-            start_index = start_ts + n_bin * size_bin
-            end_index = start_index + reminder_bin
-
-        data_bin = data_ops[
-            (pd.to_datetime(data_ops.index) >= start_index) & (pd.to_datetime(data_ops.index) < end_index)]
-        vib_H = data_bin['Vibration H'].fillna(method='ffill').dropna()
-        vib_B = data_bin['Vibration B'].fillna(method='ffill').dropna()
-        vib_H_trend = vib_H.rolling(1000).mean()
-        vib_B_trend = vib_B.rolling(1000).mean()
-        len_B = len(vib_B_trend.dropna().values)
-        len_H = len(vib_H_trend.dropna().values)
-        try:
-            r = np.corrcoef(vib_B_trend.dropna().values[:len_H], vib_H_trend.dropna().values)
-            anomaly_score[end_index] = (1 - r[0, 1]) / 2
-        except ValueError:
-            r = np.corrcoef(vib_B_trend.dropna().values, vib_H_trend.dropna().values[:len_B])
-            anomaly_score[end_index] = (1 - r[0, 1]) / 2
+def score(data_ops, plot=True, bin_size=timedelta(days=15), window=1000, previous=None):
+    """
+    Anomaly score of Vibration B and Vibration H in bins of time
+
+    Data are forward filled, without modifying data_ops, and split into bins of `bin_size` from the first timestamp.
+    In each bin, the trends of Vibration B and Vibration H are their rolling means over `window` samples, and the score
+    is (1 - r) / 2, where r is the correlation coefficient of the trends. All bins are processed at once by grouping
+    samples by bin.
+
+    :param data_ops: dataframe with datetime index and columns 'Vibration B' and 'Vibration H'
+    :param plot: bool, if true, plot the vibrations and the scores
+    :param bin_size: timedelta, length of a bin
+    :param window: int, number of samples of the rolling mean
+    :param previous: dictionary of scores from an earlier call with the same first timestamp and bin size, scores of
+    complete bins in it are reused without recomputing, so only new bins are computed when data are appended
+    :return: dictionary with the end of bin as key, score as value
+    """
+    x = data_ops[['Vibration B', 'Vibration H']].ffill()
+    if len(x) == 0:
+        return {}
+    index = pd.to_datetime(x.index)
+    start_ts, end_ts = index.min(), index.max()
+    n_bin = (end_ts - start_ts) // bin_size
+    # The last bin ends at the last timestamp, which is not in any bin
+    ends = [start_ts + (b + 1) * bin_size for b in range(n_bin)] + [end_ts]
+    b = np.asarray((index - start_ts) // bin_size)
+
+    anomaly_score = dict.fromkeys(ends, np.nan)
+    is_new = index < end_ts
+    if previous:
+        is_reused = np.array([(e in previous) for e in ends[:-1]] + [False])
+        for e in np.asarray(ends)[is_reused]:
+            anomaly_score[e] = previous[e]
+        is_new &= ~is_reused[b]
+
+    # Trends of each bin, numbered by position after the first full window, so that the trends of Vibration B and
+    # Vibration H are paired by position, up to the shorter of them
+    trends = []
+    for c in ['Vibration B', 'Vibration H']:
+        v = x[c].to_numpy(dtype=float)[is_new]
+        is_valid = ~np.isnan(v)
+        trend = pd.Series(v[is_valid]).groupby(b[is_new][is_valid]).rolling(window).mean().dropna()
+        trend.index = pd.MultiIndex.from_arrays([trend.index.get_level_values(0),
+                                                 trend.groupby(level=0).cumcount().to_numpy()])
+        trends.append(trend.rename(c))
+    trends = pd.concat(trends, axis=1, join='inner')
+
+    # Correlation coefficient of each bin
+    centered = trends - trends.groupby(level=0).transform('mean')
+    sums = pd.DataFrame({'bh': centered['Vibration B'] * centered['Vibration H'],
+                         'bb': centered['Vibration B'] ** 2,
+                         'hh': centered['Vibration H'] ** 2}).groupby(level=0).sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = sums['bh'] / np.sqrt(sums['bb'] * sums['hh'])
+    for k, s in zip(r.index, (1 - r.to_numpy()) / 2):
+        anomaly_score[ends[k]] = s
 
     if plot:
         _, axs = plt.subplots(2, 1, sharex=True)
-        data_ops[data_ops['Vibration B'] < 1][['Vibration B', 'Vibration H']].plot(ax=axs[0])
+        x[x['Vibration B'] < 1][['Vibration B', 'Vibration H']].plot(ax=axs[0])
         axs[1].plot(anomaly_score.keys(), anomaly_score.values(), label='Anomaly Score')
         plt.grid()
         plt.legend()
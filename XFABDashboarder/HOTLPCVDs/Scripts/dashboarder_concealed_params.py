@@ -1,8 +1,6 @@
 import os
 import sys
 import pandas as pd
-import numpy as np
-import datetime
 import json
 import pyodbc
 import re
@@ -22,6 +20,8 @@ import math
 from sympy.ntheory import primefactors
 import statsmodels as sm
 from ev_utilities import DataAvailability
+from ev_utilities import detect_swaps
+from ev_utilities import save_system_data, load_wide
 import time
 
 # Prompts, Inputs and Data Retrieval #
@@ -279,6 +279,10 @@ DATA_FOLDER_PATH = os.path.join(MAIN_FOLDER_PATH, 'Data')
 
 ## Retrieve data for each system to store in parquet files ##
 
+# Store the data in wide format (a column per parameter), which saves pivoting the data every time they are
+# prepared for plotting. Data stored in either format can be plotted.
+WIDE_DATA_STORE = False
+
 systems_with_data = []
 systems_withou_data = []
 systems_param_mapping = {}
@@ -343,7 +347,7 @@ for system in systems:
 
     if system_data is not None:
         file_path = os.path.join(DATA_FOLDER_PATH, system+'.parquet')
-        system_data.to_parquet(file_path, compression=None)
+        save_system_data(system_data, file_path, wide=WIDE_DATA_STORE)
         print(f'Data retrieved for {system}.')
         systems_with_data.append(system)
     
@@ -425,18 +429,12 @@ def plot_prep_from_parquet(data_files_dir, include_system_names_like=None):
 
         system_name = re.split(r'\.', file_name)[0]
         system_names.append(system_name)
-        system_data = pd.read_parquet(os.path.join(data_files_dir, file_name))
+        # Read the data in wide format sorted by LogTime, data stored in long format are converted:
+
+        system_data = load_wide(os.path.join(data_files_dir, file_name))
         print(f'Preparing the {system_name} data for plotting.')
-        
-        # Convert DataFrame from long to wide format and sort by LogTime:
-        
-        system_data = system_data.pivot_table(index='LogTime',
-                                              columns='ParameterInfo',
-                                              values='Value').sort_values(by='LogTime')
-        
+
         system_data = system_data.rename(columns={col_name:col_name.replace(' ', '') for col_name in system_data.columns})
-        
-        system_data.sort_values(by='LogTime')
 
         run_time_cols = list(set([col_name for col_name in system_data.columns 
                                                         if 'Time' in col_name 
@@ -460,68 +458,7 @@ def plot_prep_from_parquet(data_files_dir, include_system_names_like=None):
         # Separate data by the swap number:
 
         run_hours = system_data[[run_time_col]][~system_data[run_time_col].isna()]
-        run_hours_idx_list = list(run_hours.index)
-        first_datum_idx = run_hours.index.min()
-        first_datum_idx_num = run_hours_idx_list.index(first_datum_idx)
-        swap_dates = [first_datum_idx]
-        current_swap_num = 1
-
-        run_hours['pump_num'] = current_swap_num
-        for idx_num in range(0, len(run_hours.index)-1):
-
-            if idx_num in [0]:
-                continue
-
-            # *old condition_1* condition_1 = abs(run_hours.iloc[idx_num][run_time_col] - run_hours.iloc[idx_num + 1][run_time_col]) > 100
-
-            # New condition_1 checks for a percentage drop (of greater than 60%) as opposed to a numerical drop for more robust detection
-
-            if  run_hours.iloc[idx_num][run_time_col] != 0:
-                condition_1 = run_hours.iloc[idx_num + 1][run_time_col] / run_hours.iloc[idx_num][run_time_col] < 0.4
-            else:
-                condition_1 = False
-
-            # condition_2 ensures that the low difference in run_hours identified by condition_1 is 
-            # not due to a break in incoming data
-
-            current_dt = run_hours.index[idx_num]
-            prev_dt = run_hours.index[idx_num-2]
-            try:
-                current_run_hrs = run_hours[run_time_col].loc[current_dt].iloc[0]
-            except:
-                try:
-                    current_run_hrs = run_hours[run_time_col].loc[current_dt]
-                except:
-                    print('wtf')
-
-            time_diff = ((run_hours.index[idx_num+1] - run_hours.index[idx_num])) + datetime.timedelta(hours=24)
-            hrs_diff = float((time_diff/np.timedelta64(1, 'h')))
-            future_dt = run_hours.index[idx_num] + time_diff
-            current_dt = run_hours.index[idx_num]
-            try:
-                current_run_hrs = run_hours.loc[current_dt].iloc[0]
-            except:
-                current_run_hrs = run_hours.loc[current_dt]
-            # print(run_hours.index[idx_num], run_hours.loc[run_hours.index[idx_num]]) 
-            # print(run_hours.index[idx_num+1], run_hours.loc[run_hours.index[idx_num+1]])
-            # print(hrs_diff) 
-            # print(future_dt, run_hours.loc[future_dt[0]-datetime.timedelta(hours=2):future_dt[0]])
-            local_future_run_hrs = run_hours.loc[current_dt:future_dt]
-            last_future_val = local_future_run_hrs.iloc[-1]
-            condition_2 = (current_run_hrs - last_future_val)[run_time_col] > hrs_diff
-
-            try:
-                if condition_1 and condition_2:
-                    print(f'condition_1: \n{condition_1}\n\ncondition_2: \n{condition_2}\n\ncurrent_run_hrs: \n{current_run_hrs}\n\nlast_future_val: \n{last_future_val}')
-            #                 print(7)
-                    current_swap_num += 1
-                    swap_dates.append(run_hours.index[idx_num+1])
-            except:
-                raise ValueError(f'condition_1: \n{condition_1}\n\ncondition_2: \n{condition_2}\n\ncurrent_run_hrs: \n{current_run_hrs}\n\nlast_future_val: \n{last_future_val}')
-
-            run_hours.loc[run_hours.index[idx_num], 'pump_num'] = current_swap_num
-
-        run_hours['pump_num'] = run_hours['pump_num'].fillna(method='ffill').fillna(method='bfill')
+        swap_dates, run_hours['pump_num'] = detect_swaps(run_hours[run_time_col])
 
         print(f'Swap dates for system {system_name} isolated.')
 
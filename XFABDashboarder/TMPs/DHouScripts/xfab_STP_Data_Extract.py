@@ -1,6 +1,7 @@
 import datetime
 import pyodbc
 from edwards.old_edwards import Odbc
+from stp.event_index import EventIndex
 import pandas as pd
 import matplotlib.pyplot as plt
 from os import path, listdir, mkdir, makedirs
@@ -126,4 +127,6 @@ for system_name in systems_namelist[:]:
     if data_all is not None:
         file_name = system_name + '.parquet'
         file_path = path.join(indicators_data_folder, file_name)
-        df.to_parquet(file_path, compression=None)
\ No newline at end of file
+        df.to_parquet(file_path, compression=None)
+        # Only samples after the last sync are scanned for new events
+        EventIndex(indicators_data_folder, system_name).update(df).save()
\ No newline at end of file
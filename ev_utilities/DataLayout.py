@@ -0,0 +1,64 @@
+import pandas as pd
+
+LONG_COLUMNS = ['LogTime', 'ParameterInfo', 'Value']
+
+
+def to_wide(system_data):
+
+    """
+    Converts system data from long to wide format, with one column per parameter, sorted by LogTime. Values of the same
+    parameter at the same LogTime are averaged.
+
+    Inputs:
+    - system_data (pd.DataFrame): Long format data, with a row per value and the columns 'LogTime', 'ParameterInfo' and 'Value'.
+
+    Outputs:
+    - A pd.DataFrame indexed by LogTime, with a column per ParameterInfo.
+
+    """
+
+    return system_data.pivot_table(index='LogTime',
+                                   columns='ParameterInfo',
+                                   values='Value').sort_values(by='LogTime')
+
+
+def save_system_data(system_data, file_path, wide=False):
+
+    """
+    Writes the long format system data retrieved from the database to a parquet file, either as is or in wide format.
+
+    Storing the data in wide format resolves duplicate timestamps and pivots the data once, at extraction, rather than
+    every time the data are prepared for plotting.
+
+    Inputs:
+    - system_data (pd.DataFrame): Long format data, with a row per value and the columns 'LogTime', 'ParameterInfo' and 'Value'.
+
+    - file_path (str): Path of the parquet file.
+
+    - wide (bool): Whether to write the data in wide format (see `to_wide`). DEFAULT is False.
+
+    """
+
+    if wide:
+        system_data = to_wide(system_data)
+    system_data.to_parquet(file_path, compression=None)
+
+
+def load_wide(file_path):
+
+    """
+    Reads system data from a parquet file written by `save_system_data` in either format, and returns it in wide
+    format. Only data stored in long format are pivoted.
+
+    Inputs:
+    - file_path (str): Path of the parquet file.
+
+    Outputs:
+    - A pd.DataFrame indexed by LogTime, with a column per ParameterInfo, sorted by LogTime.
+
+    """
+
+    system_data = pd.read_parquet(file_path)
+    if all(col in system_data.columns for col in LONG_COLUMNS):
+        system_data = to_wide(system_data)
+    return system_data
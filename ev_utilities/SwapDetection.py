@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+
+def detect_swaps(run_hours, max_ratio=0.4, margin_hours=24):
+
+    """
+    Detects the swaps of a system from its run hours, comparing every sample to the next one at once rather than
+    looping over the samples.
+
+    A swap takes place between the samples i and i + 1 (for every sample but the first and the last one) if both:
+    - condition_1: the run hours drop to less than `max_ratio` of the current run hours (which must not be 0).
+    - condition_2: the run hours drop by more than the elapsed time, i.e. the current run hours minus the run hours of the
+      last sample up to `margin_hours` after the next sample is greater than the time between the current sample and
+      then, in hours. This ensures that the drop is not due to a break in incoming data.
+
+    Inputs:
+    - run_hours (pd.Series): Run hours of the system without missing values, with a sorted DatetimeIndex.
+
+    - max_ratio (float): Ratio of the next to the current run hours below which the run hours have dropped. DEFAULT is 0.4, i.e. a drop of more than 60%.
+
+    - margin_hours (float): Hours after the next sample within which the run hours must stay low. DEFAULT is 24.
+
+    Outputs:
+    - swap_dates: A list of the first timestamp, followed by the timestamp of the first sample after each swap.
+
+    - system_num: A pd.Series named 'system_num' with the same index as `run_hours`, numbering the system of each sample from 1, which increases at each swap date.
+
+    """
+
+    if len(run_hours) == 0:
+        return [], pd.Series(dtype=int, name='system_num')
+
+    values = run_hours.to_numpy(dtype=float)
+    times = run_hours.index.values
+    current_run_hrs, next_run_hrs = values[1:-1], values[2:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        condition_1 = (current_run_hrs != 0) & (next_run_hrs / current_run_hrs < max_ratio)
+
+    # The last sample up to margin_hours after the next sample, found by an as-of lookup
+    time_diff = times[2:] - times[1:-1] + np.timedelta64(int(margin_hours * 3600 * 10 ** 9), 'ns')
+    hrs_diff = time_diff / np.timedelta64(1, 'h')
+    last_future_idx = np.searchsorted(times, times[1:-1] + time_diff, 'right') - 1
+    condition_2 = current_run_hrs - values[last_future_idx] > hrs_diff
+
+    # Position of the first sample after each swap
+    swap_idx = np.flatnonzero(condition_1 & condition_2) + 2
+    swap_dates = [run_hours.index[0]] + list(run_hours.index[swap_idx])
+
+    is_swap = np.zeros(len(values), dtype=int)
+    is_swap[swap_idx] = 1
+    system_num = pd.Series(1 + np.cumsum(is_swap), index=run_hours.index, name='system_num')
+
+    return swap_dates, system_num
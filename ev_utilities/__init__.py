@@ -1 +1,3 @@
-from .DataAvailability import con_create, get_avail
\ No newline at end of file
+from .DataAvailability import con_create, get_avail
+from .SwapDetection import detect_swaps
+from .DataLayout import save_system_data, load_wide, to_wide
\ No newline at end of file
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ev_utilities import load_wide, save_system_data, to_wide
+
+
+def make_long(seed, n=2000):
+    # Long format data as retrieved from the database, unsorted, with repeated values at the same LogTime
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2021-06-01', periods=n // 4, freq='37s')
+    data = pd.DataFrame({'LogTime': rng.choice(times, n),
+                         'ParameterInfo': rng.choice(['Motor Current', 'Run Hours', 'Vibration B'], n),
+                         'Value': rng.normal(size=n)})
+    return pd.concat([data, data.iloc[:50].assign(Value=1.0)], ignore_index=True)
+
+
+def pivot(system_data):
+    # Reference: the pivot of plot_prep_from_parquet before data could be stored in wide format
+    return system_data.pivot_table(index='LogTime', columns='ParameterInfo', values='Value').sort_values(by='LogTime')
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_long_and_wide_files(tmp_path, seed):
+    # Both layouts load to the same frame as the former pivot, duplicate LogTimes averaged
+    data = make_long(seed)
+    save_system_data(data, str(tmp_path / 'long.parquet'))
+    save_system_data(data, str(tmp_path / 'wide.parquet'), wide=True)
+    expected = pivot(data)
+    assert expected.index.is_unique
+
+    long = load_wide(str(tmp_path / 'long.parquet'))
+    wide = load_wide(str(tmp_path / 'wide.parquet'))
+    pd.testing.assert_frame_equal(long, expected)
+    pd.testing.assert_frame_equal(wide, expected)
+    pd.testing.assert_frame_equal(pd.read_parquet(str(tmp_path / 'long.parquet')), data)
+
+
+def test_load_wide_idempotent(tmp_path):
+    # Wide data are not pivoted again, however often they are saved and loaded
+    expected = to_wide(make_long(0))
+    expected.to_parquet(str(tmp_path / 'wide.parquet'))
+    for _ in range(2):
+        actual = load_wide(str(tmp_path / 'wide.parquet'))
+        pd.testing.assert_frame_equal(actual, expected)
+        actual.to_parquet(str(tmp_path / 'wide.parquet'))
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ev_utilities import detect_swaps
+
+
+def detect_swaps_loop(run_hours):
+    # Reference: the former loop of plot_prep_from_parquet, one sample at a time
+    run_hours = run_hours.to_frame('run_hours')
+    swap_dates = [run_hours.index.min()]
+    current_swap_num = 1
+    run_hours['system_num'] = current_swap_num
+    for idx_num in range(1, len(run_hours.index) - 1):
+        if run_hours.iloc[idx_num]['run_hours'] != 0:
+            condition_1 = run_hours.iloc[idx_num + 1]['run_hours'] / run_hours.iloc[idx_num]['run_hours'] < 0.4
+        else:
+            condition_1 = False
+
+        time_diff = (run_hours.index[idx_num + 1] - run_hours.index[idx_num]) + pd.Timedelta(hours=24)
+        hrs_diff = float(time_diff / np.timedelta64(1, 'h'))
+        current_dt = run_hours.index[idx_num]
+        current_run_hrs = run_hours.loc[current_dt, 'run_hours']
+        last_future_val = run_hours.loc[current_dt:current_dt + time_diff, 'run_hours'].iloc[-1]
+        condition_2 = current_run_hrs - last_future_val > hrs_diff
+
+        if condition_1 and condition_2:
+            current_swap_num += 1
+            swap_dates.append(run_hours.index[idx_num + 1])
+        run_hours.loc[current_dt, 'system_num'] = current_swap_num
+    return swap_dates, run_hours['system_num']
+
+
+def make_run_hours(seed, n, n_swaps):
+    # Samples about every hour with gaps of days, run hours of a new or used pump after each swap, zero readings and
+    # drops that do not last
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(3600, n) * np.where(rng.random(n) < 0.02, 100, 1)
+    t = (pd.Timestamp('2020-01-01') + pd.to_timedelta(np.cumsum(gaps), unit='s')).round('s')
+    hours = np.cumsum(np.diff(t.values, prepend=t.values[0]) / np.timedelta64(1, 'h')) + 500
+    for p in rng.choice(np.arange(5, n - 5), n_swaps, replace=False):
+        hours[p:] -= hours[p] - rng.uniform(0, 100)
+    hours[rng.random(n) < 0.01] = 0
+    hours[rng.choice(n, 3)] *= 0.3
+    return pd.Series(hours, index=pd.DatetimeIndex(t, name='LogTime'))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('n, n_swaps', [(20, 1), (500, 4), (3000, 8)])
+def test_detect_swaps(seed, n, n_swaps):
+    run_hours = make_run_hours(seed, n, n_swaps)
+    swap_dates, system_num = detect_swaps(run_hours)
+    expected_dates, expected_num = detect_swaps_loop(run_hours)
+    assert swap_dates == expected_dates
+
+    # The system number increases at each swap date
+    assert system_num.index.equals(run_hours.index)
+    np.testing.assert_array_equal(system_num, np.searchsorted(swap_dates[1:], run_hours.index, 'right') + 1)
+
+    # The former loop increased it one sample before the swap date, and left the last sample as 1
+    previous_num = system_num.to_numpy().copy()
+    previous_num[:-1] = system_num.to_numpy()[1:]
+    previous_num[-1] = 1
+    np.testing.assert_array_equal(expected_num, previous_num)
+
+
+def test_detect_swaps_short():
+    assert detect_swaps(pd.Series([], index=pd.DatetimeIndex([]), dtype=float))[0] == []
+    run_hours = make_run_hours(0, 2, 0)
+    swap_dates, system_num = detect_swaps(run_hours)
+    assert swap_dates == [run_hours.index[0]]
+    assert list(system_num) == [1, 1]